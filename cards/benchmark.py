@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Pipeline Benchmark
+
+Builds synthetic decks whose card lengths and vocabulary follow batches/*.txt,
+times each pipeline stage on its own plus an end-to-end render, and writes the
+results as JSON so runs from different commits can be compared.
+
+Usage:
+    python3 benchmark.py                             # 1k, 10k and 100k card decks
+    python3 benchmark.py --sizes 1000 --sample 50    # quick run
+    python3 benchmark.py -o bench_before.json
+    python3 benchmark.py -o bench_after.json --compare bench_before.json
+
+Stages over the whole deck:
+    read_cards          make_deck.read_cards() on numbered batch files
+    near_dupes          make_deck.find_near_duplicates() (MinHash/LSH)
+    load_scores         score_cards.load_scores() on batch_*.json files
+    select_top_cards    score_cards.select_top_cards()
+    pick_font_size      generate_cards.pick_font_size(), cold metric caches
+    wrap_text           generate_cards.wrap_text() at the picked size
+    cah_text            cah-generator get_cards/format_card_text/check_for_custom_img_tag
+
+Stages over the first --sample cards (rasterising is ~tens of ms per card):
+    composite           CardCompositor.render() from a precomputed layout
+    png_encode          save_png() into memory
+    zip                 zip_png() into a deck ZIP on disk
+    end_to_end          layout + render + encode (render_cards) + ZIP
+    cah_branding        cah-generator add_custom_game_name/add_custom_deck_version
+
+The cah-generator stages skip the PHP renderer and the /app bundling step;
+generator.py is imported from its own directory with DECK=benchmark. A stage
+that raises is recorded with an "error" instead of timings.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import PIL
+
+import generate_cards
+import make_deck
+import score_cards
+
+BASE_DIR = Path(__file__).parent
+BATCH_DIR = BASE_DIR / "batches"
+CAH_SCRIPT_DIR = BASE_DIR / "cah-generator" / "generators" / "single-card-output"
+CAH_GENERATOR = CAH_SCRIPT_DIR / "script" / "generator.py"
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_SAMPLE = 100
+SCORES_PER_FILE = 150     # cards per synthetic scores/batch_*.json, like the real batches
+GAME_NAME = "Cards Against Maya"
+FONT_CACHES = {"font_path", "_load_font"}   # kept warm: fonts are loaded, not measured
+
+
+# ── Synthetic decks ────────────────────────────────────────────────────────────
+def card_model(batch_dir: Path) -> dict[str, dict]:
+    """Word-count distribution and vocabulary of each card type in batch_dir."""
+    model = {}
+    for kind, pattern in [("Prompt", "prompts_batch*.txt"), ("Response", "responses_batch*.txt")]:
+        cards = [text for _, text in make_deck.read_cards(sorted(batch_dir.glob(pattern)))]
+        model[kind] = {
+            "count": len(cards),
+            "lengths": [len(card.split()) for card in cards],
+            "words": [word for card in cards for word in card.split()],
+        }
+    return model
+
+
+def synth_deck(model: dict[str, dict], size: int, seed: int) -> list[tuple[str, str]]:
+    """size (type, text) cards, with prompt/response mix, lengths and words drawn from model."""
+    rng = random.Random(seed)
+    kinds = list(model)
+    weights = [model[kind]["count"] for kind in kinds]
+    deck = []
+    for kind in sorted(rng.choices(kinds, weights, k=size), key=kinds.index):
+        words = rng.choices(model[kind]["words"], k=rng.choice(model[kind]["lengths"]))
+        deck.append((kind, " ".join(words)))
+    return deck
+
+
+def write_batches(deck: list[tuple[str, str]], out_dir: Path) -> dict[str, list[Path]]:
+    """Write the deck as numbered batch .txt files; return the files per type."""
+    files = {}
+    for kind, stem in [("Prompt", "prompts"), ("Response", "responses")]:
+        cards = [text for k, text in deck if k == kind]
+        files[kind] = []
+        for start in range(0, len(cards), SCORES_PER_FILE):
+            path = out_dir / f"{stem}_batch{start // SCORES_PER_FILE + 1}.txt"
+            with open(path, "w", encoding="utf-8") as f:
+                for i, text in enumerate(cards[start:start + SCORES_PER_FILE], start + 1):
+                    f.write(f"{i}. {text}\n")
+            files[kind].append(path)
+    return files
+
+
+def write_scores(deck: list[tuple[str, str]], out_dir: Path, seed: int):
+    """Write random rubric scores for the deck as scores/batch_*.json files."""
+    rng = random.Random(seed)
+    out_dir.mkdir()
+    for start in range(0, len(deck), SCORES_PER_FILE):
+        batch = [{"card_text": text, "type": kind,
+                  **{dim: rng.randint(1, 5) for dim in score_cards.DIMENSIONS}}
+                 for kind, text in deck[start:start + SCORES_PER_FILE]]
+        with open(out_dir / f"batch_{start // SCORES_PER_FILE + 1}.json", "w", encoding="utf-8") as f:
+            json.dump(batch, f)
+
+
+def load_cah_generator():
+    """Import cah-generator's generator.py (it reads DECK from the environment)."""
+    os.environ.setdefault("DECK", "benchmark")
+    spec = importlib.util.spec_from_file_location("cah_generator", CAH_GENERATOR)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ── Timing ─────────────────────────────────────────────────────────────────────
+def timed(fn, repeat: int = 1) -> tuple[float, object]:
+    """Best wall time of repeat calls to fn, and fn's last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def clear_metric_caches():
+    """Empty every lru_cache in generate_cards but the font loaders (preload_fonts() warms those)."""
+    for name, obj in vars(generate_cards).items():
+        if hasattr(obj, "cache_clear") and name not in FONT_CACHES:
+            obj.cache_clear()
+
+
+def bench_deck(deck: list[tuple[str, str]], sample: int, workers: int, repeat: int,
+               seed: int, cah) -> list[dict]:
+    """Time every stage on one deck; return one result row per stage."""
+    results = []
+
+    def record(stage: str, cards: int, seconds: float):
+        results.append({"deck": len(deck), "stage": stage, "cards": cards,
+                        "seconds": round(seconds, 6),
+                        "ms_per_card": round(1000 * seconds / max(cards, 1), 4)})
+        print(f"    {stage:18s} {cards:>7d} cards  {seconds:9.3f}s  "
+              f"{1000 * seconds / max(cards, 1):8.3f} ms/card")
+
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    texts = [text for _, text in deck]
+    with tempfile.TemporaryDirectory(prefix="cam-bench-") as tmp:
+        tmp = Path(tmp)
+
+        # make_deck: batch text files
+        files = write_batches(deck, tmp)
+        seconds, _ = timed(lambda: (make_deck.read_cards(files["Prompt"]),
+                                    make_deck.read_cards(files["Response"])), repeat)
+        record("read_cards", len(deck), seconds)
+        seconds, _ = timed(lambda: make_deck.find_near_duplicates(texts), repeat)
+        record("near_dupes", len(deck), seconds)
+
+        # score_cards: JSON batches
+        write_scores(deck, tmp / "scores", seed)
+        score_cards.SCORES_DIR = tmp / "scores"
+        with quiet:
+            seconds, scored = timed(score_cards.load_scores, repeat)
+        record("load_scores", len(deck), seconds)
+        seconds, _ = timed(lambda: score_cards.select_top_cards(scored), repeat)
+        record("select_top_cards", len(deck), seconds)
+
+        # generate_cards: fitting and wrapping, from cold metric caches
+        generate_cards.preload_fonts()
+        clear_metric_caches()
+        w, h = generate_cards.TEXT_WIDTH, generate_cards.TEXT_HEIGHT
+        seconds, sizes = timed(lambda: [generate_cards.pick_font_size(t, w, h) for t in texts])
+        record("pick_font_size", len(deck), seconds)
+        seconds, _ = timed(lambda: [generate_cards.wrap_text(t, generate_cards.get_font(s), w)
+                                    for t, s in zip(texts, sizes)], repeat)
+        record("wrap_text", len(deck), seconds)
+
+        # generate_cards: rasterising a sample
+        picked = deck[:sample]
+        templates = {kind: generate_cards.rebrand_template(generate_cards.CARD_TEMPLATES[kind],
+                                                           *generate_cards.CARD_COLORS[kind])
+                     for kind in generate_cards.CARD_COLORS}
+        kinds = {"Prompt": "black", "Response": "white"}
+        compositors = {kind: generate_cards.CardCompositor(t) for kind, t in templates.items()}
+        layouts = [generate_cards.layout_card(text) for _, text in picked]
+
+        def composite():
+            for (kind, _), layout in zip(picked, layouts):
+                compositors[kinds[kind]].render(layout, generate_cards.CARD_COLORS[kinds[kind]][1])
+        seconds, _ = timed(composite, repeat)
+        record("composite", len(picked), seconds)
+
+        def encode():
+            pngs = []
+            seconds = 0.0
+            for (kind, _), layout in zip(picked, layouts):
+                img = compositors[kinds[kind]].render(layout, generate_cards.CARD_COLORS[kinds[kind]][1])
+                buf = io.BytesIO()
+                start = time.perf_counter()
+                generate_cards.save_png(img, buf, "RGB")
+                seconds += time.perf_counter() - start
+                pngs.append(buf.getvalue())
+            return seconds, pngs
+        seconds, pngs = min((encode() for _ in range(repeat)), key=lambda r: r[0])
+        record("png_encode", len(picked), seconds)
+
+        def write_zip():
+            with zipfile.ZipFile(tmp / "deck.zip", "w") as zf:
+                for i, data in enumerate(pngs, 1):
+                    generate_cards.zip_png(zf, f"cards/card_{i:06d}.png", data)
+        seconds, _ = timed(write_zip, repeat)
+        record("zip", len(picked), seconds)
+
+        def end_to_end():
+            clear_metric_caches()
+            jobs = [(text, kinds[kind], tmp / f"card_{i:06d}.png", generate_cards.CARD_DPI)
+                    for i, (kind, text) in enumerate(picked, 1)]
+            rendered = generate_cards.render_cards(
+                jobs, {(kind, generate_cards.CARD_DPI): t for kind, t in templates.items()},
+                workers, write_files=False, return_png=True)
+            with zipfile.ZipFile(tmp / "deck.zip", "w") as zf:
+                for out, data in rendered:
+                    generate_cards.zip_png(zf, out.name, data)
+        seconds, _ = timed(end_to_end)
+        record("end_to_end", len(picked), seconds)
+
+        # cah-generator: everything but the PHP renderer and /app bundling
+        for kind, name in [("Response", "white.txt"), ("Prompt", "black.txt")]:
+            with open(tmp / name, "w", encoding="utf-8") as f:
+                f.writelines(f"{text}\n" for k, text in deck if k == kind)
+
+        def cah_text():
+            for name in ("white.txt", "black.txt"):
+                for card in cah.get_cards(tmp / name):
+                    cah.format_card_text(card)
+                    cah.check_for_custom_img_tag(card)
+        seconds, _ = timed(cah_text, repeat)
+        record("cah_text", len(deck), seconds)
+
+        # generator.py edits files/cards/cards_0.png relative to its working dir
+        work = tmp / "cah"
+        (work / "files" / "cards").mkdir(parents=True)
+        (work / "fonts").symlink_to(CAH_SCRIPT_DIR / "fonts")
+        card_png = work / "files" / "cards" / "cards_0.png"
+        cwd = os.getcwd()
+        os.chdir(work)
+        try:
+            seconds = 0.0
+            for kind, _ in picked:
+                shutil.copyfile(generate_cards.CARD_TEMPLATES[kinds[kind]], card_png)
+                start = time.perf_counter()
+                cah.add_custom_game_name(GAME_NAME, invert=kind == "Prompt")
+                cah.add_custom_deck_version("v1")
+                seconds += time.perf_counter() - start
+            record("cah_branding", len(picked), seconds)
+        except Exception as e:
+            results.append({"deck": len(deck), "stage": "cah_branding", "cards": len(picked),
+                            "error": f"{type(e).__name__}: {e}"})
+            print(f"    {'cah_branding':18s} FAILED: {type(e).__name__}: {e}")
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+# ── Reporting ──────────────────────────────────────────────────────────────────
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def compare(results: list[dict], baseline_path: Path):
+    """Print each stage's ms/card against a previous results file."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["deck"], r["stage"]): r for r in baseline["results"]}
+    print(f"\n  Compared with {baseline_path} (commit {baseline.get('commit') or '?'}):")
+    for r in results:
+        old = before.get((r["deck"], r["stage"]))
+        if "error" in r or not old or not old.get("ms_per_card"):
+            continue
+        ratio = r["ms_per_card"] / old["ms_per_card"]
+        print(f"    {r['deck']:>7d} {r['stage']:18s} {old['ms_per_card']:8.3f} -> "
+              f"{r['ms_per_card']:8.3f} ms/card  ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the card pipeline on synthetic decks.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated deck sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE,
+                        help=f"cards rasterised per deck (default: {DEFAULT_SAMPLE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="render processes for the end-to-end stage (default: 1)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="report the best of N runs of each cheap stage (default: 1)")
+    parser.add_argument("--seed", type=int, default=612)
+    parser.add_argument("-o", "--output", type=Path,
+                        help="results JSON (default: bench_<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    print("\n=== Cards Against Maya — Pipeline Benchmark ===\n")
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(",")]
+    except ValueError:
+        print(f"ERROR: --sizes must be comma-separated integers, got {args.sizes!r}")
+        sys.exit(1)
+    if not generate_cards.font_path():
+        print("ERROR: no card font found; see FONT_CANDIDATES in generate_cards.py")
+        sys.exit(1)
+
+    model = card_model(BATCH_DIR)
+    cah = load_cah_generator()
+    print(f"  Card model: {model['Prompt']['count']} prompts, "
+          f"{model['Response']['count']} responses from {BATCH_DIR.name}/")
+
+    commit = git_commit()
+    results = []
+    for size in sizes:
+        print(f"\n  Deck of {size} cards:")
+        deck = synth_deck(model, size, args.seed)
+        results += bench_deck(deck, min(args.sample, size), max(1, args.workers),
+                              max(1, args.repeat), args.seed, cah)
+
+    output = args.output or Path(f"bench_{commit or 'nogit'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "font": str(generate_cards.font_path()),
+            "seed": args.seed,
+            "sample": args.sample,
+            "workers": args.workers,
+            "results": results,
+        }, f, indent=1)
+    print(f"\n  Results: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,51 @@
+import json
 import os
 import re
 import shutil
 import subprocess
+import time
+from contextlib import contextmanager
 from sys import stdout
 
 import PIL.ImageOps
 from PIL import Image, ImageDraw, ImageFont
 
 DECK = os.environ['DECK']
+# PROFILE=1 writes per-card span timings (php, brand, move) to decks/deck_<DECK>_profile.jsonl
+PROFILE = os.environ.get('PROFILE', '') not in ('', '0')
+PROFILE_PATH = f"/app/decks/deck_{DECK}_profile.jsonl"
+
+@contextmanager
+def span(timings, name):
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+def write_profile(card, color, counter, timings, total):
+    record = {
+        "card": f"{color}/card_{counter}",
+        "text": card,
+        "spans": {name: round(seconds, 6) for name, seconds in timings.items()},
+        "total": round(total, 6)
+    }
+    with open(PROFILE_PATH, 'a') as profile_file:
+        profile_file.write(json.dumps(record) + "\n")
+
+def print_slowest_cards(count=10):
+    with open(PROFILE_PATH) as profile_file:
+        records = [json.loads(line) for line in profile_file if line.strip()]
+    records.sort(key=lambda record: -record["total"])
+
+    print(f"\n[i] Slowest {min(count, len(records))} of {len(records)} cards:")
+    for record in records[:count]:
+        spans = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in record["spans"].items())
+        print(f"   {record['total'] * 1000:8.1f}ms  {record['card']}  ({spans})")
+    stdout.flush()
 
 def get_cards(path):
     with open(path, 'r') as file_contents:
@@ -19,6 +57,19 @@ def get_cards(path):
 
     return cards
 
+def get_card_names(path, count):
+    # black.ids / white.ids (written by make_deck.py) hold a stable ID per card line;
+    # without them, cards are numbered by position
+    if not os.path.exists(path):
+        return [str(n) for n in range(count)]
+    names = get_cards(path)[:count]
+    seen = {}
+    for n, name in enumerate(names):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            names[n] = f"{name}-{seen[name]}"
+    return names + [str(n) for n in range(len(names), count)]
+
 def create_card(card, color):
 
     command = ["php", "generator.php", f"batch-id=cards&card-text={card}&card-color={color}&icon=none&mechanic=none"]
@@ -71,7 +122,7 @@ def add_custom_game_name(game_name, invert=False):
     draw = ImageDraw.Draw(img)
 
     # create blank white rectangle to cover CAH word logo
-    shape = (3000, 5000, 800, 3700)
+    shape = (800, 3700, 3000, 5000)
     if invert:
         draw.rectangle(shape, fill="#000000")
     else:
@@ -189,36 +240,44 @@ def format_card_text(card):
     return fmt_card
 
 def generate_card(card, color, game_info, counter):
+    timings = {} if PROFILE else None
+    start = time.perf_counter()
     try:
         # Format the card text
         fmt_card = format_card_text(card)
 
         # Create the card
-        create_card(fmt_card, color)
-
-        # Add the custom game name if there is one
-        if game_info["game_name"]:
+        with span(timings, "php"):
+            create_card(fmt_card, color)
+
+        with span(timings, "brand"):
+            # Add the custom game name if there is one
+            if game_info["game_name"]:
+                if color == "black":
+                    add_custom_game_name(game_info["game_name"], invert=True)
+                else:
+                    add_custom_game_name(game_info["game_name"])
+
+            # Add a custom game version if there is one
+            if game_info["game_version"]:
+                add_custom_deck_version(game_info["game_version"])
+
+            # Add a custom image if there is one
+            image_tag = check_for_custom_img_tag(card)
             if color == "black":
-                add_custom_game_name(game_info["game_name"], invert=True)
+                if image_tag:
+                    add_custom_img("custom_img/" + game_info["custom_img_" + str(image_tag)], invert=True)
+                add_black_card_info_image(card)
             else:
-                add_custom_game_name(game_info["game_name"])
-
-        # Add a custom game version if there is one
-        if game_info["game_version"]:
-            add_custom_deck_version(game_info["game_version"])
-
-        # Add a custom image if there is one
-        image_tag = check_for_custom_img_tag(card)
-        if color == "black":
-            if image_tag:
-                add_custom_img("custom_img/" + game_info["custom_img_" + str(image_tag)], invert=True)
-            add_black_card_info_image(card)
-        else:
-            if image_tag:
-                add_custom_img("custom_img/" + game_info["custom_img_" + str(image_tag)])
+                if image_tag:
+                    add_custom_img("custom_img/" + game_info["custom_img_" + str(image_tag)])
 
         # Move the file to the output folder because we're done with it
-        move_to_output(color, counter)
+        with span(timings, "move"):
+            move_to_output(color, counter)
+
+        if PROFILE:
+            write_profile(card, color, counter, timings, time.perf_counter() - start)
     except:
         print("[!] Error generating card: " + card + " - " + color)
         stdout.flush()
@@ -245,18 +304,22 @@ def main():
     print(f"\n # Generating Cards...")
     stdout.flush()
 
-    counter = 0
-    for card in white_cards:
-        generate_card(card, "white", game_info, counter)
-        counter += 1
+    if PROFILE and os.path.exists(PROFILE_PATH):
+        os.remove(PROFILE_PATH)
 
-    counter = 0
-    for card in black_cards:
-        generate_card(card, "black", game_info, counter)
-        counter += 1
+    white_names = get_card_names(f"cards/deck_{DECK}/white.ids", len(white_cards))
+    for card, name in zip(white_cards, white_names):
+        generate_card(card, "white", game_info, name)
+
+    black_names = get_card_names(f"cards/deck_{DECK}/black.ids", len(black_cards))
+    for card, name in zip(black_cards, black_names):
+        generate_card(card, "black", game_info, name)
 
     create_zip_package()
 
+    if PROFILE and os.path.exists(PROFILE_PATH):
+        print_slowest_cards()
+
     file_count = sum(len(files) for _, _, files in os.walk('/app/output'))
 
     print(f'\n[i] Total files bundled: {file_count}')
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Card IDs
+
+Stable card identity shared by the whole pipeline: a hash of the card text
+after normalisation, so a card keeps its ID through re-ordering, re-scoring
+and spacing or Unicode-form edits. Case and punctuation are part of a card
+("The Sudarshana Chakra." and "THE SUDARSHANA CHAKRA!" are two cards):
+
+    from card_ids import card_id, index_ids
+
+    cid = card_id("All I want for Janmashtami is _______.")     # "252d36f7e628e036"
+    position = index_ids(ids)                                    # ID -> first row
+    row = position.get(card_id(text))
+
+make_deck.py writes each card's ID into the CardID column of the CSVs and
+alongside the cah-generator files, score batches may carry it as card_id,
+and image files are named after it. A card listed twice keeps one ID;
+unique_names() tells its files apart.
+"""
+
+import hashlib
+import unicodedata
+
+# Bump when normalize_text() changes, so stores keyed by ID re-hash their cards
+ID_SCHEME = 3
+
+
+def normalize_text(text: str) -> str:
+    """Card text as compared for identity: NFKC, with runs of whitespace made one space."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def card_id(text: str) -> str:
+    """Stable card identity: 16 hex digits of the normalised text's SHA-256."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def is_card_id(value) -> bool:
+    return isinstance(value, str) and len(value) == 16 and all(c in "0123456789abcdef"
+                                                               for c in value)
+
+
+def index_ids(ids) -> dict[str, int]:
+    """Position of the first occurrence of each ID, for constant-time joins."""
+    index = {}
+    for n, cid in enumerate(ids):
+        index.setdefault(cid, n)
+    return index
+
+
+def unique_names(ids) -> list[str]:
+    """IDs as file name stems; repeats of an ID get -2, -3, ... in order."""
+    seen = {}
+    names = []
+    for cid in ids:
+        seen[cid] = seen.get(cid, 0) + 1
+        names.append(cid if seen[cid] == 1 else f"{cid}-{seen[cid]}")
+    return names
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Binary Deck File
+
+A compact, memory-mappable deck written by make_deck.py, so tools can open a
+deck and read card N without parsing a CSV:
+
+    from deckfile import DeckFile
+
+    with DeckFile("cards_against_maya.deck") as deck:
+        print(len(deck), deck[41].text, deck[41].score)
+
+Opening a deck reads only the header; each card lookup reads its two offsets
+and its text from the mapping, so both are constant-time whatever the deck
+size.
+
+Layout (little-endian, sections 8-byte aligned, in this order):
+    header      HEADER: magic, version, flags, card count, then the byte
+                offset of each section below (0 if absent) and the blob size
+    types       bitmap, ceil(count / 8) bytes; bit n set = card n is a Prompt
+    top         bitmap of top-scored cards (flag FLAG_TOP)
+    scores      count float32 weighted scores, NaN = unscored (flag FLAG_SCORES)
+    offsets     count + 1 uint32 byte offsets into the blob
+    blob        card texts, UTF-8, back to back
+
+Usage:
+    python3 deckfile.py cards_against_maya.deck          # summary
+    python3 deckfile.py cards_against_maya.deck 1 42     # cards 1 and 42 (1-based)
+"""
+
+import math
+import mmap
+import struct
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+MAGIC = b"CAMD"
+VERSION = 1
+FLAG_SCORES = 1
+FLAG_TOP = 2
+
+# magic, version, flags, count, types, top, scores, offsets, blob offsets, blob size
+HEADER = struct.Struct("<4sHHI5II")
+ALIGN = 8
+
+
+class Card(NamedTuple):
+    type: str           # "Prompt" or "Response"
+    text: str
+    score: float | None
+    top: bool
+
+
+def _pad(size: int) -> int:
+    return -size % ALIGN
+
+
+def _bitmap(bits: list[bool]) -> bytes:
+    out = bytearray((len(bits) + 7) // 8)
+    for n, bit in enumerate(bits):
+        if bit:
+            out[n >> 3] |= 1 << (n & 7)
+    return bytes(out)
+
+
+def pack_deck(cards: list[tuple[str, str]], scores: dict[str, float] | None = None,
+              top: set[str] | None = None) -> bytes:
+    """Deck file for (type, text) cards.
+
+    scores maps card text to its weighted score and top holds the texts of
+    top-scored cards; either column is left out when not given.
+    """
+    texts = [text.encode("utf-8") for _, text in cards]
+    offsets = [0]
+    for text in texts:
+        offsets.append(offsets[-1] + len(text))
+    if offsets[-1] > 0xFFFFFFFF:
+        raise ValueError("deck text exceeds 4 GiB")
+
+    sections = [("types", _bitmap([kind == "Prompt" for kind, _ in cards]))]
+    flags = 0
+    if top is not None:
+        flags |= FLAG_TOP
+        sections.append(("top", _bitmap([text in top for _, text in cards])))
+    if scores is not None:
+        flags |= FLAG_SCORES
+        sections.append(("scores", struct.pack(f"<{len(cards)}f", *(
+            scores.get(text, math.nan) for _, text in cards))))
+    sections.append(("offsets", struct.pack(f"<{len(offsets)}I", *offsets)))
+    sections.append(("blob", b"".join(texts)))
+
+    body = bytearray()
+    where = {}
+    pos = HEADER.size + _pad(HEADER.size)
+    for name, data in sections:
+        where[name] = pos
+        body += data + bytes(_pad(len(data)))
+        pos += len(data) + _pad(len(data))
+
+    header = HEADER.pack(MAGIC, VERSION, flags, len(cards), where["types"],
+                         where.get("top", 0), where.get("scores", 0), where["offsets"],
+                         where["blob"], offsets[-1])
+    return header + bytes(_pad(HEADER.size)) + bytes(body)
+
+
+class DeckFile:
+    """Read-only, memory-mapped view of a deck file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{self.path}: not a deck file")
+        (magic, version, self.flags, self.count, self._types, self._top, self._scores,
+         self._offsets, self._blob, blob_size) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a deck file")
+        if version != VERSION:
+            raise ValueError(f"{self.path}: deck file version {version}, expected {VERSION}")
+        if self._blob + blob_size > len(self._map):
+            raise ValueError(f"{self.path}: truncated deck file")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, n: int) -> Card:
+        n = self._index(n)
+        return Card(self.type(n), self.text(n), self.score(n), self.is_top(n))
+
+    def __iter__(self):
+        return (self[n] for n in range(self.count))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def _index(self, n: int) -> int:
+        if n < 0:
+            n += self.count
+        if not 0 <= n < self.count:
+            raise IndexError("card index out of range")
+        return n
+
+    def _bit(self, section: int, n: int) -> bool:
+        return bool(self._map[section + (n >> 3)] >> (n & 7) & 1)
+
+    def text(self, n: int) -> str:
+        start, end = struct.unpack_from("<2I", self._map, self._offsets + 4 * self._index(n))
+        return self._map[self._blob + start:self._blob + end].decode("utf-8")
+
+    def type(self, n: int) -> str:
+        return "Prompt" if self._bit(self._types, self._index(n)) else "Response"
+
+    def score(self, n: int) -> float | None:
+        """Weighted score, or None if the deck has no scores or the card is unscored."""
+        if not self.flags & FLAG_SCORES:
+            return None
+        (score,) = struct.unpack_from("<f", self._map, self._scores + 4 * self._index(n))
+        return None if math.isnan(score) else score
+
+    def is_top(self, n: int) -> bool:
+        return bool(self.flags & FLAG_TOP) and self._bit(self._top, self._index(n))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+    try:
+        deck = DeckFile(sys.argv[1])
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    with deck:
+        if len(sys.argv) == 2:
+            prompts = sum(deck.type(n) == "Prompt" for n in range(len(deck)))
+            print(f"  {deck.path.name}: {len(deck)} cards "
+                  f"({prompts} prompts, {len(deck) - prompts} responses)")
+            print(f"    scores: {'yes' if deck.flags & FLAG_SCORES else 'no'}, "
+                  f"top-scored flags: {'yes' if deck.flags & FLAG_TOP else 'no'}")
+            return
+        for arg in sys.argv[2:]:
+            try:
+                n = int(arg)
+                if not 1 <= n <= len(deck):
+                    raise IndexError(n)
+            except (ValueError, IndexError):
+                print(f"ERROR: no card {arg} (deck has {len(deck)})")
+                continue
+            card = deck[n - 1]
+            score = f"{card.score:.2f}" if card.score is not None else "-"
+            print(f"  {arg:>5s}  {card.type:8s} {score:>5s} {'top' if card.top else '   '}  "
+                  f"{card.text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,330 @@
 #!/usr/bin/env python3
 """
-Extract unique Prompt and Response cards from the CAH Family Edition CSV.
+Extract unique Prompt and Response cards from CAH card spreadsheets (CSV)
+and printable card sheets (PDF).
 
-The CSV has two independent sections:
-  - Left section:  col[0] = card type ("Prompt"/"Response"), col[1] = card text
-  - Right section:  col[11] = card type ("Prompt"/"Response"), col[12] = card text
+A spreadsheet holds any number of side-by-side sections, each a pair of
+columns: the card type ("Prompt"/"Response") and the card text next to it.
+The CAH Family Edition CSV has two (columns 0-1 and 11-12). Sections are
+found by scanning the first HEADER_ROWS rows of each file for type cells, so
+other community spreadsheets need no column settings.
 
 Cards may contain embedded newlines (handled by Python's csv module).
-We collect unique card texts across both sections.
+
+PDFs are read with pypdf 6 or later (pip install "pypdf>=6"). A card is the
+text inside one of the card-sized rectangles a sheet draws as cut lines; as
+in the CAH Family Edition PDF, light text (printed on black) makes it a
+Prompt and dark text a Response. Blanks drawn as rules become "______".
+Each PDF's pages are split across the workers, and their cards merged in
+page order.
+
+Files are read on a process pool, one file (or run of PDF pages) per worker,
+streaming rows. Each worker keeps at most RUN_CARDS unique cards in memory:
+when full they are sorted and spilled to a temporary run file. The runs of every file are then
+k-way merged (heapq.merge), dropping repeats, straight into the numbered
+output lists, so memory stays flat however large the spreadsheets are.
+
+Usage:
+    python3 extract_cards.py                          # the CAH Family Edition CSV
+    python3 extract_cards.py a.csv b.csv --workers 4  # many spreadsheets, merged
+    python3 extract_cards.py source/CAH_FamilyGame-1.1-SmallCards.pdf
+    python3 extract_cards.py --profile   # time each stage (--cprofile adds a cProfile dump)
 """
 
+import argparse
 import csv
+import heapq
+import itertools
+import json
 import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from profiling import profiler
+
 BASE_DIR = Path(__file__).parent
-CSV_PATH = str(BASE_DIR / "source" / "A Different CAH spreadsheet - CAH Family Edition.csv")
-OUT_DIR = str(BASE_DIR / "extracted")
-
-prompts = set()
-responses = set()
-
-with open(CSV_PATH, "r", encoding="utf-8") as f:
-    reader = csv.reader(f)
-    for row in reader:
-        # Left section: columns 0-1
-        if len(row) > 1 and row[0].strip() in ("Prompt", "Response"):
-            text = row[1].strip()
-            if text:
-                if row[0].strip() == "Prompt":
-                    prompts.add(text)
-                else:
-                    responses.add(text)
-
-        # Right section: columns 11-12
-        if len(row) > 12 and row[11].strip() in ("Prompt", "Response"):
-            text = row[12].strip()
-            if text:
-                if row[11].strip() == "Prompt":
-                    prompts.add(text)
-                else:
-                    responses.add(text)
-
-# Sort for consistent output
-prompts_sorted = sorted(prompts)
-responses_sorted = sorted(responses)
-
-# Write prompts
-prompts_path = os.path.join(OUT_DIR, "extracted_prompts.txt")
-with open(prompts_path, "w", encoding="utf-8") as f:
-    for i, p in enumerate(prompts_sorted, 1):
-        # Replace any internal newlines with a space so each card is one line
-        f.write(f"{i}. {p.replace(chr(10), ' ')}\n")
-
-# Write responses
-responses_path = os.path.join(OUT_DIR, "extracted_responses.txt")
-with open(responses_path, "w", encoding="utf-8") as f:
-    for i, r in enumerate(responses_sorted, 1):
-        f.write(f"{i}. {r.replace(chr(10), ' ')}\n")
-
-print(f"Unique prompts:   {len(prompts_sorted)}  ->  {prompts_path}")
-print(f"Unique responses: {len(responses_sorted)}  ->  {responses_path}")
-print(f"Total unique cards: {len(prompts_sorted) + len(responses_sorted)}")
+CSV_PATH = BASE_DIR / "source" / "A Different CAH spreadsheet - CAH Family Edition.csv"
+OUT_DIR = BASE_DIR / "extracted"
+
+CARD_TYPES = ("Prompt", "Response")
+HEADER_ROWS = 100           # rows scanned for type columns
+RUN_CARDS = 200_000         # unique cards a worker holds before spilling a sorted run
+CELL_SIZE = (72, 288)       # PDF card rectangles: 1-4 inches a side, in points
+BLANK = "______"
+BLANK_RULE = 20             # shortest stroked rule read as a blank, in points
+LINE_SLACK = 3              # points a chunk may sit off its line's baseline
+BLANK_GAP = re.compile(r"(?<=_) (?=[.,!?;:”’\"])")
+
+
+def detect_sections(rows: list[list[str]]) -> list[tuple[int, int]]:
+    """(type column, text column) of each section whose type cells appear in rows."""
+    columns = sorted({i for row in rows for i, cell in enumerate(row[:-1])
+                      if cell.strip() in CARD_TYPES})
+    # A text column that also holds a type word (a card reading "Prompt") is not a section
+    return [(i, i + 1) for i in columns if i - 1 not in columns]
+
+
+def iter_cards(path: Path):
+    """Stream (type, text) of every card in a spreadsheet, in row order.
+
+    Raises ValueError if no Prompt/Response column is found.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        head = list(itertools.islice(reader, HEADER_ROWS))
+        sections = detect_sections(head)
+        if not sections:
+            raise ValueError(f"{path.name}: no Prompt/Response column "
+                             f"in the first {HEADER_ROWS} rows")
+        for row in itertools.chain(head, reader):
+            for kind_col, text_col in sections:
+                if len(row) > text_col and row[kind_col].strip() in CARD_TYPES:
+                    text = row[text_col].strip()
+                    if text:
+                        yield row[kind_col].strip(), text
+
+
+def pdf_page_count(path: Path) -> int:
+    """Page count from the page tree root (reader.pages would load every page first)."""
+    from pypdf import PdfReader
+    return int(PdfReader(path).trailer["/Root"]["/Pages"]["/Count"])
+
+
+def fill_lightness(operator: bytes, operands: list) -> float | None:
+    """0 (black) to 1 (white) for a fill colour operator, None for any other operator."""
+    values = [float(v) for v in operands]
+    if operator == b"g":
+        return values[0]
+    if operator == b"rg":
+        return sum(values) / 3
+    if operator == b"k":
+        return (1 - values[3]) * (1 - max(values[:3]))
+    return None
+
+
+def page_cards(page):
+    """(type, text) of each card cell on a PDF page, top to bottom, left to right."""
+    cells = []              # x0, y0, x1, y1 in page space
+    chunks = []             # x, y, text, fill lightness
+    state = {"fill": 0.0, "saved": [], "path": []}
+
+    def point(cm, x, y) -> tuple[float, float]:
+        return x * cm[0] + y * cm[2] + cm[4], x * cm[1] + y * cm[3] + cm[5]
+
+    def before(operator, operands, cm, tm):
+        if operator == b"q":
+            state["saved"].append(state["fill"])
+        elif operator == b"Q":
+            if state["saved"]:
+                state["fill"] = state["saved"].pop()
+        elif operator in (b"g", b"rg", b"k"):
+            state["fill"] = fill_lightness(operator, operands)
+        elif operator == b"re":
+            x, y, w, h = (float(v) for v in operands)
+            (x0, y0), (x1, y1) = point(cm, x, y), point(cm, x + w, y + h)
+            if all(CELL_SIZE[0] <= abs(b - a) <= CELL_SIZE[1] for a, b in ((x0, x1), (y0, y1))):
+                cells.append((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)))
+        elif operator in (b"m", b"l"):
+            state["path"].append((operator, point(cm, *(float(v) for v in operands))))
+        elif operator in (b"S", b"s"):
+            # A blank is drawn as a stroked horizontal rule under the baseline
+            for (_, (x0, y0)), (op, (x1, y1)) in zip(state["path"], state["path"][1:]):
+                if op == b"l" and abs(y1 - y0) < 0.5 and abs(x1 - x0) >= BLANK_RULE:
+                    chunks.append((min(x0, x1), y0, f" {BLANK} ", None))
+            state["path"] = []
+        elif operator in (b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*", b"n"):
+            state["path"] = []
+
+    def text(t, cm, tm, font, size):
+        if t.strip():
+            chunks.append((*point(cm, tm[4], tm[5]), t, state["fill"]))
+
+    page.extract_text(visitor_operand_before=before, visitor_text=text)
+
+    lines, fills = {}, {}   # cell -> [[baseline, [(x, text)...]]...]
+    for x, y, t, fill in chunks:
+        cell = next((i for i, (x0, y0, x1, y1) in enumerate(cells)
+                     if x0 <= x <= x1 and y0 <= y <= y1), None)
+        if cell is None:
+            continue
+        if fill is not None:
+            fills.setdefault(cell, fill)
+        line = next((line for line in lines.setdefault(cell, [])
+                     if abs(line[0] - y) <= LINE_SLACK), None)
+        if line is None:
+            lines[cell].append(line := [y, []])
+        line[1].append((x, t))
+    for i in sorted(fills, key=lambda i: (-cells[i][3], cells[i][0])):
+        # Chunks carry their own spacing within a line
+        words = " ".join("".join(t for _, t in sorted(line[1], key=lambda chunk: chunk[0]))
+                         for line in sorted(lines[i], key=lambda line: -line[0]))
+        card = BLANK_GAP.sub("", " ".join(words.split()))
+        if card:
+            yield ("Prompt" if fills[i] > 0.5 else "Response"), card
+
+
+def iter_pdf_cards(path: Path, pages: range):
+    """Stream (type, text) of every card on the given pages of a PDF, in page order."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    for n in pages:
+        yield from page_cards(reader.pages[n])
+
+
+def write_run(run_dir: str, cards: set[str]) -> str:
+    """Spill cards to a sorted run file (one JSON string per line; texts keep their newlines)."""
+    fd, path = tempfile.mkstemp(suffix=".run", dir=run_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(card) + "\n" for card in sorted(cards))
+    return path
+
+
+def read_run(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def extract_runs(job: tuple[Path, range | None, str]
+                 ) -> tuple[str, dict[str, list[str]] | None, int]:
+    """Split the unique cards of a spreadsheet (or PDF pages) into sorted run files per type.
+
+    Returns the file name, the run files of each type (None if the file has
+    no card columns) and the number of cards read.
+    """
+    path, pages, run_dir = job
+    runs = {kind: [] for kind in CARD_TYPES}
+    pending = {kind: set() for kind in CARD_TYPES}
+    cards = 0
+    try:
+        for kind, text in iter_cards(path) if pages is None else iter_pdf_cards(path, pages):
+            cards += 1
+            pending[kind].add(text)
+            if len(pending[kind]) >= RUN_CARDS:
+                runs[kind].append(write_run(run_dir, pending[kind]))
+                pending[kind] = set()
+    except ValueError as e:
+        print(f"  ⚠ {e}")
+        return path.name, None, 0
+    for kind in CARD_TYPES:
+        if pending[kind]:
+            runs[kind].append(write_run(run_dir, pending[kind]))
+    return path.name, runs, cards
+
+
+def extract(files: list[Path], run_dir: str,
+            workers: int | None = None) -> tuple[dict[str, list[str]], list[str]]:
+    """Sorted run files of every source, per type, read on up to workers processes.
+
+    Also returns the names of the files that could not be read, each with a warning printed.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = []
+    skipped = []
+    for path in files:
+        if path.suffix.lower() != ".pdf":
+            jobs.append((path, None, run_dir))
+            continue
+        try:
+            pages = pdf_page_count(path)
+        except ImportError:
+            print(f"  ⚠ pypdf not installed (needed for {path.name}). Run:  pip install 'pypdf>=6'")
+            skipped.append(path.name)
+            continue
+        # One contiguous run of pages per worker: each opens the PDF, and pypdf
+        # loads the whole page tree on a reader's first page
+        step = max(1, -(-pages // workers))
+        jobs += [(path, range(first, min(first + step, pages)), run_dir)
+                 for first in range(0, pages, step)]
+    workers = min(workers, len(jobs))
+    runs = {kind: [] for kind in CARD_TYPES}
+    totals = {}
+    if workers <= 1:
+        results = map(extract_runs, jobs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(extract_runs, jobs)
+    try:
+        # Results come back in job order, so a PDF's pages merge in page order
+        for name, job_runs, cards in results:
+            if job_runs is None:
+                skipped.append(name)
+                continue
+            totals[name] = totals.get(name, 0) + cards
+            for kind in CARD_TYPES:
+                runs[kind] += job_runs[kind]
+    finally:
+        if workers > 1:
+            pool.shutdown()
+    for name, cards in totals.items():
+        print(f"  {name}: {cards} cards")
+    return runs, skipped
+
+
+def merge_unique(runs: list[str]):
+    """k-way merge of sorted run files, each card once."""
+    last = None
+    for card in heapq.merge(*map(read_run, runs)):
+        if card != last:
+            yield card
+            last = card
+
+
+def write_numbered(path: Path, cards) -> int:
+    """Write cards as numbered lines, one card per line; return the count."""
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for n, card in enumerate(cards, 1):
+            # Replace any internal newlines with a space so each card is one line
+            f.write(f"{n}. {card.replace(chr(10), ' ')}\n")
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("files", nargs="*", type=Path, default=[CSV_PATH], metavar="FILE",
+                        help="CSV or PDF files to extract from (default: the CAH Family Edition CSV)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes reading files and PDF pages (default: one per CPU)")
+    parser.add_argument("--profile", action="store_true", help="time each stage")
+    parser.add_argument("--cprofile", action="store_true", help="--profile plus a cProfile dump")
+    args = parser.parse_args()
+    if args.profile or args.cprofile:
+        profiler.enable("extract_cards", args.cprofile)
+
+    missing = [str(path) for path in args.files if not path.is_file()]
+    if missing:
+        print(f"ERROR: not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    OUT_DIR.mkdir(exist_ok=True)
+    prompts_path = OUT_DIR / "extracted_prompts.txt"
+    responses_path = OUT_DIR / "extracted_responses.txt"
+    with tempfile.TemporaryDirectory(prefix="extract_cards.") as run_dir:
+        with profiler.span("load"):
+            runs, skipped = extract(args.files, run_dir, max(1, args.workers))
+
+        # A partial or empty read would overwrite the previous extraction with less
+        if skipped:
+            print(f"ERROR: could not read {', '.join(skipped)}; {OUT_DIR.name}/ left unchanged")
+            sys.exit(1)
+        if not any(runs.values()):
+            print(f"ERROR: no cards found; {OUT_DIR.name}/ left unchanged")
+            sys.exit(1)
+
+        # Merged runs come out sorted, for consistent output
+        with profiler.span("write"):
+            n_prompts = write_numbered(prompts_path, merge_unique(runs["Prompt"]))
+            n_responses = write_numbered(responses_path, merge_unique(runs["Response"]))
+
+    print(f"Unique prompts:   {n_prompts}  ->  {prompts_path}")
+    print(f"Unique responses: {n_responses}  ->  {responses_path}")
+    print(f"Total unique cards: {n_prompts + n_responses}")
+    profiler.finish()
+
+
+if __name__ == "__main__":
+    main()
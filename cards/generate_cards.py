@@ -9,36 +9,66 @@ Usage:
     source venv/bin/activate
     python3 generate_cards.py                        # uses top612 curated deck
     python3 generate_cards.py cards_against_maya.csv  # uses specified CSV
+    python3 generate_cards.py --workers 4            # render on 4 processes
+    python3 generate_cards.py --force                # ignore the render cache
+    python3 generate_cards.py --zip-only             # only write the upload ZIP
+    python3 generate_cards.py --sheets letter --grid 3x3 --crop-marks  # N-up PDF
+    python3 generate_cards.py --mode L               # 8-bit greyscale cards
+    python3 generate_cards.py --dpi 1200,300         # print deck + 300 DPI proofs
+    python3 generate_cards.py layout batches/*.txt   # fit only; report overflowing cards
+    python3 generate_cards.py --profile              # per-card timings + slowest cards
+    python3 generate_cards.py --vector pdf           # vector deck PDF (or svg) instead of PNGs
+
+Card files are named after card IDs (prompt_<CardID>.png), so reordering the
+deck renames nothing. Unchanged cards are skipped using
+printable_cards/render_manifest.json.
 """
 
+import argparse
 import csv
+import hashlib
+import io
+import json
 import os
 import re
 import sys
+import time
 import zipfile
 import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from typing import NamedTuple
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from card_ids import card_id, unique_names
+from impose import SHEET_SIZES, PdfWriter, SheetImposer
+from profiling import profiler
 
 # ── Paths ──────────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).parent
 TEMPLATE_DIR = BASE_DIR / "cah-generator" / "generators" / "single-card-output" / "img"
 FONT_DIR = BASE_DIR / "cah-generator" / "generators" / "single-card-output" / "fonts"
 # Default to curated top-612 deck; accept CLI arg to override
-CSV_FILE = Path(sys.argv[1]) if len(sys.argv) > 1 else BASE_DIR / "cards_against_maya_top612.csv"
+CSV_FILE = BASE_DIR / "cards_against_maya_top612.csv"
 OUTPUT_DIR = BASE_DIR / "printable_cards"
 
 BLACK_TEMPLATE = TEMPLATE_DIR / "black.png"
 WHITE_TEMPLATE = TEMPLATE_DIR / "white.png"
+MANIFEST_FILE = OUTPUT_DIR / "render_manifest.json"
+LAYOUT_FILE = OUTPUT_DIR / "card_layouts.json"
 
 # ── Card Layout (3288x4488 template at 1200 DPI) ──────────────────────────────
 CARD_W, CARD_H = 3288, 4488
+CARD_DPI = 1200         # layout units: all lengths below are pixels at this DPI
+CARD_BLEED = 144       # 0.12in bleed around the 2.5x3.5in trim
 TEXT_X = 444           # left margin for text
 TEXT_Y = 444           # top margin for text
 TEXT_WIDTH = 2400      # max text width in pixels
 TEXT_HEIGHT = 2800     # max text height before we shrink font
 FONT_SIZE_DEFAULT = 200  # larger base font size
 FONT_SIZE_MIN = 110
+FONT_SIZE_STEP = 5
 LINE_SPACING = 75        # increased line spacing
 
 # Logo / footer area
@@ -50,60 +80,266 @@ LOGO_COVER_Y = 3700
 LOGO_COVER_H = 788      # covers from LOGO_COVER_Y to bottom of card (minus border)
 LOGO_TEXT_Y = 3850       # where to draw new logo text
 LOGO_ICON_SIZE = 140     # size of the card icon next to logo
+BACK_FONT_SIZE = 500
+BACK_TITLE = ["Cards", "Against", "Maya"]
+BACK_TITLE_Y = 400       # top of the first back title line
+BACK_TITLE_STEP = 580    # back title line pitch
+
+# Card kind → (background, text colour)
+CARD_COLORS = {
+    "black": ("black", "white"),
+    "white": ("white", "black"),
+}
+CARD_TEMPLATES = {
+    "black": BLACK_TEMPLATE,
+    "white": WHITE_TEMPLATE,
+}
+
+# Output colour mode → Pillow mode used while drawing. Cards are pure
+# black/white/grey, so "L" is lossless; "1" is drawn anti-aliased in "L" and
+# only dithered (Floyd-Steinberg) to 1 bit when encoded, so the anti-aliased
+# edges survive as dither instead of being thresholded away.
+COLOR_MODES = {
+    "RGB": "RGB",
+    "L": "L",
+    "1": "L",
+}
+
+
+# ── Fonts ──────────────────────────────────────────────────────────────────────
+FONT_CANDIDATES = [
+    FONT_DIR / "NimbusSanL-Bol.otf",
+    Path("/System/Library/Fonts/Helvetica.ttc"),
+    Path("/System/Library/Fonts/HelveticaNeue.ttc"),
+]
+
+
+@lru_cache(maxsize=None)
+def font_path() -> str | None:
+    """Path of the best available font, or None to use Pillow's default."""
+    for p in FONT_CANDIDATES:
+        if p.exists():
+            return str(p)
+    return None
+
+
+@lru_cache(maxsize=None)
+def _load_font(path: str | None, size: int) -> ImageFont.FreeTypeFont:
+    """Load a font face once per (path, size) per process."""
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, size)
 
 
 def get_font(size: int) -> ImageFont.FreeTypeFont:
     """Load the best available font."""
-    nimbus = FONT_DIR / "NimbusSanL-Bol.otf"
-    if nimbus.exists():
-        return ImageFont.truetype(str(nimbus), size)
-    for p in ["/System/Library/Fonts/Helvetica.ttc",
-              "/System/Library/Fonts/HelveticaNeue.ttc"]:
-        if os.path.exists(p):
-            return ImageFont.truetype(p, size)
-    return ImageFont.load_default()
+    return _load_font(font_path(), size)
+
+
+def preload_fonts():
+    """Warm the font cache with every size the renderer can ask for."""
+    for size in FONT_SIZES:
+        get_font(size)
+    get_font(LOGO_FONT_SIZE)
+    get_font(BACK_FONT_SIZE)
+
+
+def font_cache_info():
+    """Hit/miss counters for the font cache in this process."""
+    return _load_font.cache_info()
+
+
+# ── Text fitting ───────────────────────────────────────────────────────────────
+# Font sizes tried by pick_font_size(), largest first
+FONT_SIZES = list(range(FONT_SIZE_DEFAULT, FONT_SIZE_MIN - 1, -FONT_SIZE_STEP))
+
+
+@lru_cache(maxsize=4096)
+def _glyph_metrics(font: ImageFont.FreeTypeFont, char: str) -> tuple[float, tuple[int, int, int, int]]:
+    return font.getlength(char), font.getbbox(char)
+
+
+@lru_cache(maxsize=65536)
+def _kerning(font: ImageFont.FreeTypeFont, before: str, after: str) -> float:
+    return font.getlength(before + after) - _glyph_metrics(font, before)[0] - _glyph_metrics(font, after)[0]
+
+
+@lru_cache(maxsize=65536)
+def _word_metrics(font: ImageFont.FreeTypeFont, word: str) -> tuple[float, tuple[int, int, int, int]]:
+    """(advance, bbox) of a word, measured once per font.
+
+    Pillow's basic layout places each glyph at the summed advances and kerning
+    of the glyphs before it, so a word's metrics are composed from cached
+    per-glyph and per-pair metrics instead of loading every glyph of every
+    word again. Complex layout (raqm: ligatures, shaping) is measured whole.
+    """
+    if getattr(font, "layout_engine", None) != ImageFont.Layout.BASIC:
+        return font.getlength(word), font.getbbox(word)
+    pen = 0.0
+    left = top = float("inf")
+    right = bottom = float("-inf")
+    for i, char in enumerate(word):
+        if i:
+            pen += _kerning(font, word[i - 1], char)
+        advance, (g_left, g_top, g_right, g_bottom) = _glyph_metrics(font, char)
+        left, right = min(left, pen + g_left), max(right, pen + g_right)
+        top, bottom = min(top, g_top), max(bottom, g_bottom)
+        pen += advance
+    return pen, (left, top, right, bottom)
+
+
+@lru_cache(maxsize=65536)
+def _space_advance(font: ImageFont.FreeTypeFont, before: str, after: str) -> float:
+    """Advance of a space between two characters, including kerning against both."""
+    return font.getlength(f"{before} {after}") - font.getlength(before) - font.getlength(after)
+
+
+@lru_cache(maxsize=None)
+def _line_spacing(font: ImageFont.FreeTypeFont) -> int:
+    """Baseline-to-baseline step used by multiline_text() for this font."""
+    return font.getbbox("A")[3] + LINE_SPACING
+
+
+def _wrap_lines(text: str, font: ImageFont.FreeTypeFont,
+                max_width: int) -> tuple[list[str], list[tuple[float, float, float, float]]]:
+    """Greedily wrap text to max_width; return the lines and each line's ink box.
+
+    Line boxes are summed from cached per-word metrics rather than laid out
+    again for every prefix. Widths within a pixel of max_width are measured
+    exactly, so breaks match textbbox().
+    """
+    lines = []
+    boxes = []             # (left, top, right, bottom) of each finished line
+    current = []           # words on the current line
+    advance = 0.0          # pen position after the last word
+    left = top = right = bottom = 0.0
+
+    for word in text.split():
+        word_advance, (w_left, w_top, w_right, w_bottom) = _word_metrics(font, word)
+        if current:
+            offset = advance + _space_advance(font, current[-1][-1], word[0])
+            test_left = min(left, offset + w_left)
+            test_right = max(right, offset + w_right)
+            w = test_right - test_left
+            if abs(w - max_width) <= 1:
+                bbox = font.getbbox(" ".join(current + [word]))
+                w = bbox[2] - bbox[0]
+            if w <= max_width:
+                current.append(word)
+                advance, left, right = offset + word_advance, test_left, test_right
+                top, bottom = min(top, w_top), max(bottom, w_bottom)
+                continue
+            lines.append(" ".join(current))
+            boxes.append((left, top, right, bottom))
+        current = [word]
+        advance, left, top, right, bottom = word_advance, w_left, w_top, w_right, w_bottom
+    if current:
+        lines.append(" ".join(current))
+        boxes.append((left, top, right, bottom))
+    return lines, boxes
+
+
+def _text_bbox(font: ImageFont.FreeTypeFont,
+               boxes: list[tuple[float, float, float, float]]) -> tuple[float, float, float, float]:
+    """Ink box of wrapped lines as multiline_text() stacks them from the origin."""
+    step = _line_spacing(font)
+    return (min(b[0] for b in boxes),
+            min(i * step + b[1] for i, b in enumerate(boxes)),
+            max(b[2] for b in boxes),
+            max(i * step + b[3] for i, b in enumerate(boxes)))
+
+
+def layout_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> tuple[list[str], int]:
+    """Greedily wrap text to max_width; return the lines and their total height.
+
+    Heights match multiline_textbbox() for the wrapped text.
+    """
+    lines, boxes = _wrap_lines(text, font, max_width)
+    if not lines:
+        return lines, 0
+    _, top, _, bottom = _text_bbox(font, boxes)
+    return lines, bottom - top
 
 
 def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> str:
     """Word-wrap text to fit within max_width pixels."""
-    words = text.split()
-    lines = []
-    current_line = ""
-    tmp = Image.new("RGB", (1, 1))
-    draw = ImageDraw.Draw(tmp)
-
-    for word in words:
-        test = f"{current_line} {word}".strip()
-        bbox = draw.textbbox((0, 0), test, font=font)
-        w = bbox[2] - bbox[0]
-        if w <= max_width:
-            current_line = test
-        else:
-            if current_line:
-                lines.append(current_line)
-            current_line = word
-    if current_line:
-        lines.append(current_line)
-    return "\n".join(lines)
+    return "\n".join(layout_text(text, font, max_width)[0])
+
+
+def _fits(text: str, size: int, max_width: int, max_height: int) -> bool:
+    return layout_text(text, get_font(size), max_width)[1] <= max_height
 
 
 def pick_font_size(text: str, max_width: int, max_height: int) -> int:
-    """Pick a font size that fits the text in the available area."""
-    tmp = Image.new("RGB", (1, 1))
-    draw = ImageDraw.Draw(tmp)
+    """Pick a font size that fits the text in the available area.
+
+    Wrapped height grows with font size, so the largest fitting size is found
+    by galloping down FONT_SIZES and binary-searching the bracket. Short cards
+    fit at the first probe.
+    """
+    # Gallop: probe indices 0, 1, 3, 7, ... until one fits
+    lo, hi = 0, 0
+    while hi < len(FONT_SIZES) and not _fits(text, FONT_SIZES[hi], max_width, max_height):
+        lo, hi = hi + 1, 2 * hi + 1
+    hi = min(hi, len(FONT_SIZES))
+
+    # First fitting index lies in [lo, hi]; hi == len(FONT_SIZES) means none fit
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _fits(text, FONT_SIZES[mid], max_width, max_height):
+            hi = mid
+        else:
+            lo = mid + 1
+    return FONT_SIZES[lo] if lo < len(FONT_SIZES) else FONT_SIZE_MIN
+
+
+class CardLayout(NamedTuple):
+    """Resolution-independent text layout of a card, in CARD_DPI pixels.
+
+    bbox is the ink box of the text relative to (TEXT_X, TEXT_Y).
+    """
+    font_size: int
+    lines: tuple[str, ...]
+    height: int
+    bbox: tuple[int, int, int, int] = (0, 0, 0, 0)
+
+    @property
+    def overflow(self) -> bool:
+        """True if the text does not fit the text area even at FONT_SIZE_MIN."""
+        left, _, right, _ = self.bbox
+        return self.height > TEXT_HEIGHT or right - left > TEXT_WIDTH
 
-    for size in range(FONT_SIZE_DEFAULT, FONT_SIZE_MIN - 1, -5):
-        font = get_font(size)
-        wrapped = wrap_text(text, font, max_width)
-        bbox = draw.multiline_textbbox((0, 0), wrapped, font=font, spacing=LINE_SPACING)
-        h = bbox[3] - bbox[1]
-        if h <= max_height:
-            return size
-    return FONT_SIZE_MIN
 
+def layout_card(text: str) -> CardLayout:
+    """Fit and wrap a card's text once; the result can be drawn at any DPI."""
+    with profiler.span("fit"):
+        font_size = pick_font_size(text, TEXT_WIDTH, TEXT_HEIGHT)
+    with profiler.span("wrap"):
+        font = get_font(font_size)
+        lines, boxes = _wrap_lines(text, font, TEXT_WIDTH)
+    if not lines:
+        return CardLayout(font_size, (), 0)
+    bbox = tuple(round(v) for v in _text_bbox(font, boxes))
+    return CardLayout(font_size, tuple(lines), bbox[3] - bbox[1], bbox)
 
-def rebrand_template(template_path: Path, bg_color: str, fg_color: str) -> Image.Image:
-    """Load template image, cover old logo, draw 'Cards Against Maya' logo."""
+
+def scaled(length: float, dpi: int) -> float:
+    """Convert a CARD_DPI length to pixels at dpi (kept integral when exact)."""
+    length = length * dpi / CARD_DPI
+    return int(length) if length == int(length) else length
+
+
+def card_size(dpi: int) -> tuple[int, int]:
+    return round(CARD_W * dpi / CARD_DPI), round(CARD_H * dpi / CARD_DPI)
+
+
+def rebrand_template(template_path: Path, bg_color: str, fg_color: str,
+                     mode: str = "RGB", dpi: int = CARD_DPI) -> Image.Image:
+    """Load template image, cover old logo, draw 'Cards Against Maya' logo.
+
+    The template is returned at dpi, in the drawing mode for the output
+    colour mode.
+    """
     img = Image.open(template_path).copy()
     draw = ImageDraw.Draw(img)
 
@@ -136,118 +372,964 @@ def rebrand_template(template_path: Path, bg_color: str, fg_color: str) -> Image
         font=logo_font,
     )
 
-    return img
+    if dpi != CARD_DPI:
+        img = img.resize(card_size(dpi), Image.Resampling.LANCZOS)
+    # The only coloured pixels (the old logo) are covered by now
+    return img if COLOR_MODES[mode] == "RGB" else img.convert(COLOR_MODES[mode])
 
 
-def generate_card(text: str, template_img: Image.Image, output_path: Path, fill_color: str):
-    """Generate a single card image from a pre-rebranded template."""
-    img = template_img.copy()
-    draw = ImageDraw.Draw(img)
+def save_png(img: Image.Image, output_path, mode: str = "RGB"):
+    """Encode a rendered image as PNG in the output colour mode."""
+    if mode == "1":
+        img = img.convert("1", dither=Image.Dither.FLOYDSTEINBERG)
+    img.save(output_path, "PNG")
 
-    # Pick font size and wrap
-    font_size = pick_font_size(text, TEXT_WIDTH, TEXT_HEIGHT)
-    font = get_font(font_size)
-    wrapped = wrap_text(text, font, TEXT_WIDTH)
-
-    # Draw card text
-    draw.multiline_text(
-        (TEXT_X, TEXT_Y),
-        wrapped,
-        fill=fill_color,
-        font=font,
-        spacing=LINE_SPACING,
-    )
 
-    img.save(output_path, "PNG")
+class CardCompositor:
+    """Render cards onto one reused copy of a rebranded template.
+
+    Only the text changes between cards, so each card's text is rasterised
+    into a mask the size of its bounding box and pasted onto the working
+    buffer. Before the next card, that region is restored from the pristine
+    template. Per-card allocation is the text region, not the full frame.
+    """
+
+    def __init__(self, template_img: Image.Image, dpi: int = CARD_DPI):
+        self.template = template_img
+        self.buffer = template_img.copy()
+        self.dpi = dpi
+        self.dirty = None   # box drawn by the previous card
+
+    def render(self, layout: CardLayout | str, fill_color: str) -> Image.Image:
+        """Return the working buffer with a card's text drawn on the template.
 
+        layout is a CardLayout from layout_card() (or the card text). Its line
+        breaks are kept as-is at every DPI. The buffer is only valid until the
+        next call.
+        """
+        if self.dirty:
+            self.buffer.paste(self.template.crop(self.dirty), self.dirty[:2])
+            self.dirty = None
 
-def generate_back(bg_color: str, fg_color: str, output_path: Path):
+        if isinstance(layout, str):
+            layout = layout_card(layout)
+        if not layout.lines:
+            return self.buffer
+        font = get_font(scaled(layout.font_size, self.dpi))
+        wrapped = "\n".join(layout.lines)
+        xy = (scaled(TEXT_X, self.dpi), scaled(TEXT_Y, self.dpi))
+        spacing = scaled(LINE_SPACING, self.dpi)
+
+        # Draw card text into a mask covering just its bounding box
+        left, top, right, bottom = (int(v) for v in ImageDraw.Draw(self.buffer).multiline_textbbox(
+            xy, wrapped, font=font, spacing=spacing))
+        mask = Image.new("L", (right - left, bottom - top), 0)
+        ImageDraw.Draw(mask).multiline_text(
+            (xy[0] - left, xy[1] - top),
+            wrapped,
+            fill=255,
+            font=font,
+            spacing=spacing,
+        )
+        self.dirty = (left, top, right, bottom)
+        self.buffer.paste(fill_color, self.dirty, mask)
+        return self.buffer
+
+
+def generate_card(text: str, template_img: Image.Image, output_path, fill_color: str,
+                  mode: str = "RGB", dpi: int = CARD_DPI):
+    """Generate a single card image from a pre-rebranded template.
+
+    output_path may be a path or a binary file object (e.g. io.BytesIO).
+    Batch renders should keep a CardCompositor per template instead.
+    """
+    save_png(CardCompositor(template_img, dpi).render(text, fill_color), output_path, mode)
+
+
+def generate_back(bg_color: str, fg_color: str, output_path, mode: str = "RGB",
+                  dpi: int = CARD_DPI):
     """Generate a card back image with 'Cards Against Maya' branding."""
-    img = Image.new("RGB", (CARD_W, CARD_H), bg_color)
+    img = Image.new(COLOR_MODES[mode], card_size(dpi), bg_color)
     draw = ImageDraw.Draw(img)
 
     # Draw "Cards Against Maya" left-aligned, large text
-    title_lines = ["Cards", "Against", "Maya"]
-    title_font = get_font(500)
+    title_font = get_font(scaled(BACK_FONT_SIZE, dpi))
     x = TEXT_X
-    y = 400
-    for line in title_lines:
-        draw.text((x, y), line, fill=fg_color, font=title_font)
-        y += 580
+    y = BACK_TITLE_Y
+    for line in BACK_TITLE:
+        draw.text((scaled(x, dpi), scaled(y, dpi)), line, fill=fg_color, font=title_font)
+        y += BACK_TITLE_STEP
 
-    img.save(output_path, "PNG")
+    save_png(img, output_path, mode)
+
+
+# ── Vector backend ─────────────────────────────────────────────────────────────
+# Cards as PDF pages or SVG files, from the same CardLayout as the raster path.
+# Each rebranded template is embedded once and shared by every card of its
+# kind; text is set in the card font rather than rasterised.
+PT_PER_PX = 72 / CARD_DPI
+VECTOR_FORMATS = ("pdf", "svg")
+
+
+def _sfnt_tables(data: bytes) -> dict[bytes, bytes]:
+    """Tables of an OpenType/TrueType font file (not a .ttc collection)."""
+    if data[:4] not in (b"OTTO", b"\x00\x01\x00\x00", b"true"):
+        raise ValueError("vector output needs a single .otf/.ttf card font, not a collection")
+    count = int.from_bytes(data[4:6], "big")
+    tables = {}
+    for i in range(count):
+        rec = data[12 + 16 * i:28 + 16 * i]
+        offset, length = int.from_bytes(rec[8:12], "big"), int.from_bytes(rec[12:16], "big")
+        tables[rec[:4]] = data[offset:offset + length]
+    return tables
+
+
+def _pdf_string(text: str) -> str:
+    """A PDF string literal of text in WinAnsi (cp1252) encoding."""
+    out = []
+    for b in text.encode("cp1252", errors="replace"):
+        if b in b"()\\":
+            out.append("\\" + chr(b))
+        elif 32 <= b < 127:
+            out.append(chr(b))
+        else:
+            out.append(f"\\{b:03o}")
+    return "(" + "".join(out) + ")"
+
+
+@lru_cache(maxsize=65536)
+def _pair_kern(font: ImageFont.FreeTypeFont, pair: str) -> float:
+    """Kerning Pillow applies between two characters, in font units per 1000 em."""
+    return (font.getlength(pair) - font.getlength(pair[0]) - font.getlength(pair[1])) \
+        * 1000 / font.size
+
+
+def _pdf_show(line: str, font: ImageFont.FreeTypeFont) -> str:
+    """TJ operator drawing a line with the same pair kerning as Pillow."""
+    parts, start = [], 0
+    for i in range(1, len(line)):
+        kern = _pair_kern(font, line[i - 1:i + 1])
+        if kern:
+            parts.append(f"{_pdf_string(line[start:i])} {-kern:.1f}")
+            start = i
+    parts.append(_pdf_string(line[start:]))
+    return f"[{' '.join(parts)}] TJ"
+
+
+class VectorDeck:
+    """Write a deck as a PDF, one card per page at the card's full bleed size.
+
+    The card font is embedded once and each template is a single image
+    XObject that every page of that kind draws underneath its text.
+    """
+
+    def __init__(self, fp, templates: dict[str, bytes]):
+        self.pdf = PdfWriter(fp)
+        self.templates = templates     # kind -> template PNG
+        self.images = {}               # kind -> image object id
+        self.size = (CARD_W * PT_PER_PX, CARD_H * PT_PER_PX)
+        self.font = self._embed_font(font_path())
+
+    def _embed_font(self, path: Path) -> int:
+        data = Path(path).read_bytes()
+        tables = _sfnt_tables(data)
+        head = tables[b"head"]
+        per_em = int.from_bytes(head[18:20], "big")
+        bbox = [int.from_bytes(head[i:i + 2], "big", signed=True) * 1000 // per_em
+                for i in range(36, 44, 2)]
+        if b"CFF " in tables:
+            program = self.pdf.add_object("<< /Subtype /Type1C >>", tables[b"CFF "])
+            subtype, file_key = "Type1", "FontFile3"
+        else:
+            program = self.pdf.add_object(f"<< /Length1 {len(data)} >>", data)
+            subtype, file_key = "TrueType", "FontFile2"
+
+        font = get_font(1000)
+        ascent, descent = font.getmetrics()
+        widths = []
+        for code in range(32, 256):
+            try:
+                widths.append(round(font.getlength(bytes([code]).decode("cp1252"))))
+            except UnicodeDecodeError:
+                widths.append(0)
+        name = re.sub(r"[^A-Za-z0-9-]", "", Path(path).stem)
+        descriptor = self.pdf.add_object(
+            f"<< /Type /FontDescriptor /FontName /{name} /Flags 32 "
+            f"/FontBBox [{' '.join(map(str, bbox))}] /ItalicAngle 0 /Ascent {ascent} "
+            f"/Descent {-descent} /CapHeight {font.getbbox('H')[3] - font.getbbox('H')[1]} "
+            f"/StemV 140 /{file_key} {program} 0 R >>")
+        return self.pdf.add_object(
+            f"<< /Type /Font /Subtype /{subtype} /BaseFont /{name} /FirstChar 32 "
+            f"/LastChar 255 /Widths [{' '.join(map(str, widths))}] "
+            f"/Encoding /WinAnsiEncoding /FontDescriptor {descriptor} 0 R >>")
+
+    def _text(self, lines, size: int, x: float, y: float, step: float, color: str) -> str:
+        """Content stream operators drawing lines whose first top-left is (x, y) px."""
+        font = get_font(size)
+        baseline = y + font.getmetrics()[0]
+        ops = [f"BT /F1 {size * PT_PER_PX:.3f} Tf {ImageColor.getcolor(color, 'L') / 255:g} g"]
+        for i, line in enumerate(lines):
+            ops.append(f"1 0 0 1 {x * PT_PER_PX:.3f} "
+                       f"{(CARD_H - baseline - i * step) * PT_PER_PX:.3f} Tm "
+                       f"{_pdf_show(line, font)}")
+        ops.append("ET")
+        return "\n".join(ops)
+
+    def add_card(self, layout: CardLayout, kind: str):
+        """Add a card page: the kind's template with the layout's text on top."""
+        if kind not in self.images:
+            self.images[kind] = self.pdf.add_image(self.templates[kind])
+        image = self.images[kind]
+        w, h = self.size
+        content = f"q {w:.3f} 0 0 {h:.3f} 0 0 cm /Im{image} Do Q\n"
+        if layout.lines:
+            font = get_font(layout.font_size)
+            content += self._text(layout.lines, layout.font_size, TEXT_X, TEXT_Y,
+                                  _line_spacing(font), CARD_COLORS[kind][1])
+        self.pdf.add_page(self.size, content, [image], {"F1": self.font})
+
+    def add_back(self, bg_color: str, fg_color: str):
+        """Add a card back page, drawn entirely in vectors."""
+        w, h = self.size
+        content = (f"{ImageColor.getcolor(bg_color, 'L') / 255:g} g 0 0 {w:.3f} {h:.3f} re f\n"
+                   + "\n".join(self._text([line], BACK_FONT_SIZE, TEXT_X,
+                                          BACK_TITLE_Y + i * BACK_TITLE_STEP, 0, fg_color)
+                               for i, line in enumerate(BACK_TITLE)))
+        self.pdf.add_page(self.size, content, [], {"F1": self.font})
+
+    def close(self):
+        self.pdf.close()
+
+
+def _svg_kerning(line: str, font: ImageFont.FreeTypeFont) -> str:
+    """dx attribute shifting each character by the pair kerning Pillow laid it out with."""
+    shifts = [0.0] + [_pair_kern(font, line[i - 1:i + 1]) * font.size / 1000
+                      for i in range(1, len(line))]
+    if not any(shifts):
+        return ""
+    return f' dx="{" ".join(f"{d:.3f}".rstrip("0").rstrip(".") for d in shifts)}"'
+
+
+def _svg_text(lines, size: int, x: float, y: float, step: float, color: str) -> str:
+    font = get_font(size)
+    baseline = y + font.getmetrics()[0]
+    spans = "".join(
+        f'<tspan x="{x:g}" y="{baseline + i * step:g}"{_svg_kerning(line, font)}>'
+        f'{line.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")}</tspan>'
+        for i, line in enumerate(lines))
+    return (f'<text font-family="CardFont" font-size="{size}" fill="{color}" '
+            f'xml:space="preserve">{spans}</text>')
+
+
+def _svg(body: str, font_href: str) -> str:
+    # The viewer's own kerning is off: lines carry exactly the kerning the layout
+    # measured (as dx shifts, like the PDF's TJ kerns), so widths match the PNGs
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{CARD_W / CARD_DPI:g}in" '
+            f'height="{CARD_H / CARD_DPI:g}in" viewBox="0 0 {CARD_W} {CARD_H}">\n'
+            f'<style>@font-face {{ font-family: "CardFont"; src: url("{font_href}"); }} '
+            f'text {{ font-kerning: none; }}</style>\n{body}\n</svg>\n')
+
+
+def card_svg(layout: CardLayout, kind: str, template_href: str, font_href: str) -> str:
+    """SVG of a card that links its template image and the card font."""
+    body = f'<image href="{template_href}" width="{CARD_W}" height="{CARD_H}"/>'
+    if layout.lines:
+        body += "\n" + _svg_text(layout.lines, layout.font_size, TEXT_X, TEXT_Y,
+                                 _line_spacing(get_font(layout.font_size)),
+                                 CARD_COLORS[kind][1])
+    return _svg(body, font_href)
+
+
+def back_svg(bg_color: str, fg_color: str, font_href: str) -> str:
+    """SVG of a card back."""
+    body = f'<rect width="{CARD_W}" height="{CARD_H}" fill="{bg_color}"/>\n' + "\n".join(
+        _svg_text([line], BACK_FONT_SIZE, TEXT_X, BACK_TITLE_Y + i * BACK_TITLE_STEP, 0,
+                  fg_color) for i, line in enumerate(BACK_TITLE))
+    return _svg(body, font_href)
+
+
+def export_vector(cards: list[tuple[str, str, str]], fmt: str, mode: str = "RGB") -> Path:
+    """Write (text, kind, name) cards and both backs as a deck PDF or SVG files.
+
+    Returns the PDF path or the SVG directory.
+    """
+    layouts = load_layouts(LAYOUT_FILE)
+    with profiler.span("templates"):
+        templates = {}
+        for kind in CARD_COLORS:
+            buf = io.BytesIO()
+            save_png(rebrand_template(CARD_TEMPLATES[kind], *CARD_COLORS[kind], mode), buf, mode)
+            templates[kind] = buf.getvalue()
+
+    if fmt == "pdf":
+        out = OUTPUT_DIR / "cards_against_maya_deck.pdf"
+        tmp = out.with_suffix(".pdf.tmp")
+        with open(tmp, "wb") as f:
+            deck = VectorDeck(f, templates)
+            for bg, fg in (CARD_COLORS["black"], CARD_COLORS["white"]):
+                deck.add_back(bg, fg)
+            for text, kind, name in cards:
+                layout = layouts.get(text_key(text)) or layout_card(text)
+                with profiler.span("vector"):
+                    deck.add_card(layout, kind)
+            deck.close()
+        os.replace(tmp, out)
+        return out
+
+    out = OUTPUT_DIR / "svg"
+    dirs = {"black": out / "prompts_black", "white": out / "responses_white"}
+    for d in [*dirs.values(), out / "backs", out / "templates", out / "fonts"]:
+        d.mkdir(parents=True, exist_ok=True)
+        for old in d.glob("*.svg"):
+            old.unlink()
+    font_file = out / "fonts" / Path(font_path()).name
+    font_file.write_bytes(Path(font_path()).read_bytes())
+    for kind, png in templates.items():
+        (out / "templates" / f"{kind}.png").write_bytes(png)
+    font_href = f"../fonts/{font_file.name}"
+    for bg, fg in (CARD_COLORS["black"], CARD_COLORS["white"]):
+        (out / "backs" / f"back_{bg}.svg").write_text(back_svg(bg, fg, font_href), encoding="utf-8")
+    for text, kind, name in cards:
+        layout = layouts.get(text_key(text)) or layout_card(text)
+        with profiler.span("vector"):
+            (dirs[kind] / f"{name}.svg").write_text(
+                card_svg(layout, kind, f"../templates/{kind}.png", font_href), encoding="utf-8")
+    return out
+
+
+# ── Parallel rendering ─────────────────────────────────────────────────────────
+# A job is one output image: (text, kind, output_path, dpi). Jobs for the same
+# card are grouped into one task so the card is fitted once for all DPIs.
+#
+# Compositors over the rebranded templates for the current process, keyed by
+# (card kind, dpi). Workers get the templates once through the pool
+# initializer; tasks then only carry text + paths.
+_compositors: dict[tuple[str, int], CardCompositor] = {}
+_outputs = {"files": True, "png": False, "mode": "RGB"}
+_layouts: dict[str, CardLayout] = {}   # precomputed layouts by text_key()
+
+
+def _init_worker(templates: dict[tuple[str, int], Image.Image], write_files: bool = True,
+                 return_png: bool = False, mode: str = "RGB",
+                 layouts: dict[str, CardLayout] | None = None,
+                 profile: str = ""):
+    """Install the rebranded templates and output options in a render worker."""
+    if profile and not profiler.enabled:
+        profiler.enable(profile, reset=False)
+    _compositors.update(((kind, dpi), CardCompositor(t, dpi))
+                        for (kind, dpi), t in templates.items())
+    _outputs.update(files=write_files, png=return_png, mode=mode)
+    _layouts.update(layouts or {})
+    preload_fonts()
+
+
+def _render_task(task: list[tuple[str, str, Path, int]]) -> list[tuple[Path, bytes | None]]:
+    """Lay out one card once and render it for each of its jobs.
+
+    Each PNG is encoded once in memory, written to its output path if loose
+    files are wanted, and returned if the caller is streaming it into a ZIP.
+    """
+    text, kind = task[0][:2]
+    results = []
+    with profiler.card(task[0][2].stem, kind=kind):
+        layout = _layouts.get(text_key(text)) or layout_card(text)
+        for _, _, output_path, dpi in task:
+            buf = io.BytesIO()
+            with profiler.span("draw"):
+                img = _compositors[kind, dpi].render(layout, CARD_COLORS[kind][1])
+            with profiler.span("encode"):
+                save_png(img, buf, _outputs["mode"])
+            data = buf.getvalue()
+            if _outputs["files"]:
+                with profiler.span("write"):
+                    output_path.write_bytes(data)
+            results.append((output_path, data if _outputs["png"] else None))
+    return results
+
+
+def group_tasks(jobs: list[tuple[str, str, Path, int]]) -> list[list[tuple[str, str, Path, int]]]:
+    """Group consecutive jobs for the same card text and kind into tasks."""
+    tasks = []
+    for job in jobs:
+        if tasks and tasks[-1][0][:2] == job[:2]:
+            tasks[-1].append(job)
+        else:
+            tasks.append([job])
+    return tasks
+
+
+def render_cards(jobs: list[tuple[str, str, Path, int]],
+                 templates: dict[tuple[str, int], Image.Image],
+                 workers: int, write_files: bool = True, return_png: bool = False,
+                 mode: str = "RGB", layouts: dict[str, CardLayout] | None = None):
+    """Render card jobs, yielding (output_path, png bytes or None) in job order.
+
+    Cards found in layouts (see load_layouts()) are not fitted again.
+    """
+    tasks = group_tasks(jobs)
+    profile = profiler.name if profiler.enabled else ""
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(templates, write_files, return_png, mode, layouts)
+        for task in tasks:
+            yield from _render_task(task)
+        return
+
+    # Small chunks keep ordered results flowing for progress reporting
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(templates, write_files, return_png, mode,
+                                       layouts, profile)) as pool:
+        for results in pool.map(_render_task, tasks, chunksize=chunksize):
+            yield from results
+
+
+def zip_png(zf: zipfile.ZipFile, arcname: str, data: bytes | None = None,
+            path: Path | None = None):
+    """Add a PNG to the deck ZIP, stored as-is (PNG data is already deflated)."""
+    with profiler.span("zip"):
+        if data is not None:
+            zf.writestr(arcname, data, compress_type=zipfile.ZIP_STORED)
+        else:
+            zf.write(path, arcname, compress_type=zipfile.ZIP_STORED)
+
+
+# ── Incremental render cache ───────────────────────────────────────────────────
+# Everything besides the card text and artwork that changes the rendered pixels.
+# Bump RENDER_VERSION when drawing code changes.
+RENDER_VERSION = 1
+LAYOUT_KEY = {
+    "version": RENDER_VERSION,
+    "card": [CARD_W, CARD_H],
+    "text": [TEXT_X, TEXT_Y, TEXT_WIDTH, TEXT_HEIGHT, LINE_SPACING],
+    "font_sizes": [FONT_SIZE_DEFAULT, FONT_SIZE_MIN, FONT_SIZE_STEP],
+    "logo": [GAME_NAME, LOGO_FONT_SIZE, LOGO_COVER_Y, LOGO_TEXT_Y, LOGO_ICON_SIZE],
+    "back": BACK_FONT_SIZE,
+}
+
+
+@lru_cache(maxsize=None)
+def file_hash(path: Path | str | None) -> str:
+    """SHA-256 of a file's contents ("" for a missing file)."""
+    if path is None or not os.path.exists(path):
+        return ""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def render_key(*parts) -> str:
+    """Content hash of one output image: layout, font and the given parts."""
+    payload = json.dumps([LAYOUT_KEY, file_hash(font_path()), *parts], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def mode_key(mode: str) -> str:
+    """The colour mode as it enters render keys (1-bit output used to be thresholded)."""
+    return "1/dither" if mode == "1" else mode
+
+
+def card_key(text: str, kind: str, mode: str = "RGB", dpi: int = CARD_DPI) -> str:
+    return render_key(kind, text, file_hash(CARD_TEMPLATES[kind]), mode_key(mode), dpi)
+
+
+def load_manifest(path: Path) -> dict:
+    """Load a previous run's manifest.
+
+    "outputs" maps output paths relative to OUTPUT_DIR to render keys; "zip"
+    is the key of the deck ZIP built from them.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    return {"outputs": data.get("outputs", {}), "zip": data.get("zip", "")}
+
+
+def save_manifest(path: Path, outputs: dict[str, str], zip_key: str = ""):
+    """Write the manifest atomically."""
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": RENDER_VERSION, "outputs": outputs, "zip": zip_key},
+                  f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def plan_renders(jobs: list[tuple[str, str, Path, int]], keys: dict[Path, str],
+                 manifest: dict[str, str], root: Path):
+    """Split jobs into unchanged outputs, moves of existing renders, and renders.
+
+    Returns (kept, moves, todo): kept is a list of output paths already up to
+    date, moves is a list of (src, dst) paths, todo the jobs left to render.
+    """
+    kept = set()
+    for _, _, out, _ in jobs:
+        rel = out.relative_to(root).as_posix()
+        if manifest.get(rel) == keys[out] and out.exists():
+            kept.add(out)
+
+    # Existing renders not kept in place can be reused under a new name
+    sources: dict[str, list[Path]] = {}
+    for rel, key in manifest.items():
+        path = root / rel
+        if path not in kept and path.exists():
+            sources.setdefault(key, []).append(path)
+
+    moves, todo = [], []
+    for job in jobs:
+        out = job[2]
+        if out in kept:
+            continue
+        if sources.get(keys[out]):
+            moves.append((sources[keys[out]].pop(), out))
+        else:
+            todo.append(job)
+    return sorted(kept), moves, todo
+
+
+def apply_moves(moves: list[tuple[Path, Path]]):
+    """Rename files; sources go through temporary names so swaps are safe."""
+    staged = []
+    for src, dst in moves:
+        tmp = src.with_name(src.name + ".moving")
+        os.replace(src, tmp)
+        staged.append((tmp, dst))
+    for tmp, dst in staged:
+        os.replace(tmp, dst)
+
+
+def prune_orphans(dirs: list[Path], wanted: set[Path]) -> int:
+    """Delete PNGs in dirs that no longer belong to the deck."""
+    pruned = 0
+    for folder in dirs:
+        for png in folder.glob("*.png"):
+            if png not in wanted:
+                png.unlink()
+                pruned += 1
+    return pruned
+
+
+# ── Layout precompute ──────────────────────────────────────────────────────────
+# `generate_cards.py layout` fits every card without rasterising and merges the
+# results into LAYOUT_FILE: {text_key: layout}, read by the renderer and by
+# make_deck.py's proofs so neither fits a linted card again.
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_layouts(path: Path) -> dict[str, CardLayout]:
+    """Load cached layouts, or {} if the file is missing or was made with other fonts/metrics."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("key") != render_key("layout"):
+        return {}
+    return {key: CardLayout(c["font_size"], tuple(c["lines"]), c["height"], tuple(c["bbox"]))
+            for key, c in data.get("cards", {}).items()}
+
+
+def save_layouts(path: Path, layouts: dict[str, CardLayout], texts: dict[str, str]):
+    """Merge layouts (and the card text they were made from) into the file, atomically.
+
+    Cached layouts of other cards are kept, so linting one batch does not
+    throw away the rest of the deck's.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        cards = data["cards"] if data.get("key") == render_key("layout") else {}
+    except (OSError, ValueError, KeyError):
+        cards = {}
+    cards.update((key, {"text": texts[key], "font_size": layout.font_size,
+                        "lines": list(layout.lines), "height": layout.height,
+                        "bbox": list(layout.bbox), "overflow": layout.overflow})
+                 for key, layout in layouts.items())
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": RENDER_VERSION, "key": render_key("layout"), "dpi": CARD_DPI,
+                   "text_box": [TEXT_X, TEXT_Y, TEXT_WIDTH, TEXT_HEIGHT], "cards": cards},
+                  f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def read_card_texts(path: Path) -> list[tuple[str, str]]:
+    """Read (location, text) pairs from a deck CSV or a numbered batch .txt file."""
+    cards = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                cards.append((f"{path}:{reader.line_num}", row["CardText"]))
+        else:
+            for lineno, line in enumerate(f, 1):
+                text = re.sub(r"^\d+\.\s*", "", line.strip())
+                if text:
+                    cards.append((f"{path}:{lineno}", text))
+    return cards
+
+
+def layout_main(argv: list[str]):
+    """Lay out every card, write LAYOUT_FILE and report cards that overflow."""
+    parser = argparse.ArgumentParser(
+        prog="generate_cards.py layout",
+        description="Fit every card without rendering and report text that overflows.")
+    parser.add_argument("inputs", nargs="*", type=Path, default=[CSV_FILE],
+                        help="deck CSVs or batch .txt files (default: cards_against_maya_top612.csv)")
+    parser.add_argument("-o", "--output", type=Path, default=LAYOUT_FILE,
+                        help="layout file to write (default: printable_cards/card_layouts.json)")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the existing layout file and fit every card again")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    cards = []
+    for path in args.inputs:
+        if not path.exists():
+            print(f"ERROR: {path} not found.")
+            sys.exit(1)
+        cards += read_card_texts(path)
+
+    cached = {} if args.force else load_layouts(args.output)
+    texts = {}
+    layouts = {}
+    overflows = []
+    for where, text in cards:
+        key = text_key(text)
+        if key not in layouts:
+            layouts[key] = cached.get(key) or layout_card(text)
+            texts[key] = text
+        if layouts[key].overflow:
+            overflows.append((where, text, layouts[key]))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    save_layouts(args.output, layouts, texts)
+    elapsed = time.perf_counter() - start
+
+    fitted = sum(1 for key in layouts if key not in cached)
+    print(f"  Laid out {len(cards)} cards ({len(layouts) - fitted} cached, {fitted} fitted) "
+          f"in {elapsed:.2f}s")
+    print(f"  Layouts: {args.output}")
+    if overflows:
+        print(f"\n  {len(overflows)} card(s) overflow the {TEXT_WIDTH}x{TEXT_HEIGHT} text area "
+              f"at size {FONT_SIZE_MIN}:")
+        for where, text, layout in overflows:
+            left, _, right, _ = layout.bbox
+            print(f"    {where}: {right - left}x{layout.height}  {text[:60]}")
+        sys.exit(1)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate print-ready card images.")
+    parser.add_argument("csv", nargs="?", type=Path, default=CSV_FILE,
+                        help="deck CSV (default: cards_against_maya_top612.csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="render processes (default: number of CPU cores)")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the render manifest and re-render every card")
+    parser.add_argument("--zip-only", action="store_true",
+                        help="stream cards straight into the ZIP without writing loose PNGs")
+    parser.add_argument("--mode", choices=list(COLOR_MODES), default="RGB",
+                        help="output colour depth: RGB, L (8-bit grey) or 1 (1-bit, dithered "
+                             "from the anti-aliased grey render)")
+    parser.add_argument("--dpi", default=str(CARD_DPI),
+                        help="comma-separated output resolutions, e.g. 1200,300; the first "
+                             "one feeds the ZIP and sheets (default: 1200)")
+    parser.add_argument("--vector", choices=VECTOR_FORMATS,
+                        help="write a vector deck instead of PNGs: one PDF, or SVG files")
+    parser.add_argument("--sheets", choices=sorted(SHEET_SIZES),
+                        help="also impose cards N-up on sheets of this size into a PDF")
+    parser.add_argument("--grid", default="3x3",
+                        help="cards per sheet as COLSxROWS (default: 3x3)")
+    parser.add_argument("--bleed", action="store_true",
+                        help="keep each card's bleed on the sheets instead of trimming it")
+    parser.add_argument("--crop-marks", action="store_true",
+                        help="draw crop marks around the grid on each sheet")
+    parser.add_argument("--profile", action="store_true",
+                        help="write per-card timings to profile/generate_cards/ and "
+                             "print the slowest cards")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="with --profile, also dump cProfile stats of the main process "
+                             "(use --workers 1 to include rendering)")
+    return parser.parse_args(argv)
 
 
 def main():
+    if sys.argv[1:2] == ["layout"]:
+        layout_main(sys.argv[2:])
+        return
+    args = parse_args()
+    csv_file = args.csv
+    workers = max(1, args.workers)
+    mode = args.mode
+    try:
+        dpis = list(dict.fromkeys(int(d) for d in args.dpi.split(",")))
+    except ValueError:
+        dpis = []
+    if not dpis or min(dpis) < 1:
+        print(f"ERROR: --dpi must be a comma-separated list of resolutions, got {args.dpi!r}")
+        return
+
     print("\n=== Cards Against Maya — Card Image Generator ===\n")
 
-    if not CSV_FILE.exists():
-        print(f"ERROR: {CSV_FILE} not found. Run make_deck.py first.")
+    if not csv_file.exists():
+        print(f"ERROR: {csv_file} not found. Run make_deck.py first.")
         return
     if not BLACK_TEMPLATE.exists():
         print(f"ERROR: Template not found at {BLACK_TEMPLATE}")
         return
 
-    # Read CSV
+    if args.profile or args.cprofile:
+        profiler.enable("generate_cards", args.cprofile)
+
+    # Read CSV; decks written before card IDs get them from their text
     prompts = []
     responses = []
-    with open(CSV_FILE, "r", encoding="utf-8") as f:
+    with profiler.span("load"), open(csv_file, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
+            card = (row.get("CardID") or card_id(row["CardText"]), row["CardText"])
             if row["Type"] == "Prompt":
-                prompts.append(row["CardText"])
+                prompts.append(card)
             else:
-                responses.append(row["CardText"])
+                responses.append(card)
+    prompt_names = unique_names(cid for cid, _ in prompts)
+    response_names = unique_names(cid for cid, _ in responses)
 
     print(f"  Loaded {len(prompts)} prompts, {len(responses)} responses\n")
 
-    # Create output dirs
-    prompt_dir = OUTPUT_DIR / "prompts_black"
-    response_dir = OUTPUT_DIR / "responses_white"
-    backs_dir = OUTPUT_DIR / "backs"
-    prompt_dir.mkdir(parents=True, exist_ok=True)
-    response_dir.mkdir(parents=True, exist_ok=True)
-    backs_dir.mkdir(parents=True, exist_ok=True)
-
-    # Generate rebranded card backs
-    print("  Generating card backs...")
-    generate_back("black", "white", backs_dir / "back_black.png")
-    generate_back("white", "black", backs_dir / "back_white.png")
-    print("  Card backs saved to backs/\n")
-
-    # Pre-rebrand templates (do it once, reuse for all cards)
-    print("  Preparing rebranded templates...")
-    black_tmpl = rebrand_template(BLACK_TEMPLATE, "black", "white")
-    white_tmpl = rebrand_template(WHITE_TEMPLATE, "white", "black")
-
-    # Generate prompt cards (black background, white text)
-    print(f"  Generating {len(prompts)} prompt cards (black)...")
-    for i, text in enumerate(prompts, 1):
-        out = prompt_dir / f"prompt_{i:03d}.png"
-        generate_card(text, black_tmpl, out, "white")
-        if i % 25 == 0 or i == len(prompts):
-            print(f"    {i}/{len(prompts)}")
-
-    # Generate response cards (white background, black text)
-    print(f"\n  Generating {len(responses)} response cards (white)...")
-    for i, text in enumerate(responses, 1):
-        out = response_dir / f"response_{i:03d}.png"
-        generate_card(text, white_tmpl, out, "black")
-        if i % 50 == 0 or i == len(responses):
-            print(f"    {i}/{len(responses)}")
-
-    # Create ZIP
+    if args.vector:
+        if not font_path():
+            print("ERROR: vector output needs the card font; see FONT_CANDIDATES")
+            return
+        cards = [(text, "black", f"prompt_{name}")
+                 for name, (_, text) in zip(prompt_names, prompts)]
+        cards += [(text, "white", f"response_{name}")
+                  for name, (_, text) in zip(response_names, responses)]
+        print(f"  Writing {len(cards)} cards as {args.vector.upper()}...")
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            out = export_vector(cards, args.vector, mode)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return
+        size = (out.stat().st_size if out.is_file()
+                else sum(f.stat().st_size for f in out.rglob("*") if f.is_file()))
+        print(f"\n=== Done! {len(cards)} cards + 2 backs ===\n")
+        print(f"  Vector deck: {out}  ({size / 1e6:.1f} MB)")
+        profiler.finish()
+        print()
+        return
+
     zip_path = OUTPUT_DIR / "cards_against_maya_deck.zip"
-    print(f"\n  Creating ZIP file...")
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for folder in [prompt_dir, response_dir, backs_dir]:
-            for png in sorted(folder.glob("*.png")):
-                zf.write(png, f"{folder.name}/{png.name}")
-
-    total = len(prompts) + len(responses)
-    print(f"\n=== Done! {total} card images generated ===")
-    print(f"\n  Card images: {OUTPUT_DIR}/")
+    write_files = not args.zip_only
+
+    # The first DPI is the print deck: it goes into the ZIP and onto sheets.
+    # Other DPIs are loose files under printable_cards/<dpi>dpi/.
+    primary = dpis[0]
+    if not write_files:
+        dpis = [primary]
+
+    def dpi_dir(dpi: int) -> Path:
+        return OUTPUT_DIR if dpi == CARD_DPI else OUTPUT_DIR / f"{dpi}dpi"
+
+    def path_dpi(path: str) -> int:
+        top = path.split("/", 1)[0]
+        return int(top[:-3]) if re.fullmatch(r"\d+dpi", top) else CARD_DPI
+
+    def rel(out: Path) -> str:
+        return out.relative_to(OUTPUT_DIR).as_posix()
+
+    def arcname(out: Path) -> str:
+        return out.relative_to(dpi_dir(primary)).as_posix()
+
+    card_dirs = [dpi_dir(dpi) / name for dpi in dpis
+                 for name in ("prompts_black", "responses_white")]
+
+    # Create output dirs
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    if write_files:
+        for dpi in dpis:
+            for name in ("prompts_black", "responses_white", "backs"):
+                (dpi_dir(dpi) / name).mkdir(parents=True, exist_ok=True)
+
+    # Print sheets reuse the PNGs rendered for the deck, one sheet in memory
+    sheets_path = OUTPUT_DIR / "cards_against_maya_sheets.pdf"
+    sheets_tmp = sheets_path.with_suffix(".pdf.tmp")
+    imposer = None
+    if args.sheets:
+        sheets_file = open(sheets_tmp, "wb")
+        try:
+            imposer = SheetImposer(sheets_file, args.sheets, args.grid, card_size(primary),
+                                   primary, round(scaled(CARD_BLEED, primary)),
+                                   args.bleed, args.crop_marks)
+        except ValueError as e:
+            sheets_file.close()
+            sheets_tmp.unlink()
+            print(f"ERROR: {e}")
+            return
+
+    preload_fonts()
+
+    backs = [(bg, fg, dpi_dir(dpi) / "backs" / f"back_{bg}.png", dpi)
+             for dpi in dpis for bg, fg in [CARD_COLORS["black"], CARD_COLORS["white"]]]
+    jobs = [(text, "black", dpi_dir(dpi) / "prompts_black" / f"prompt_{name}.png", dpi)
+            for name, (_, text) in zip(prompt_names, prompts) for dpi in dpis]
+    jobs += [(text, "white", dpi_dir(dpi) / "responses_white" / f"response_{name}.png", dpi)
+             for name, (_, text) in zip(response_names, responses) for dpi in dpis]
+    keys = {out: render_key("back", bg, fg, mode_key(mode), dpi) for bg, fg, out, dpi in backs}
+    keys.update((out, card_key(text, kind, mode, dpi)) for text, kind, out, dpi in jobs)
+
+    # Skip unchanged cards, move renamed ones, prune the rest
+    manifest = load_manifest(MANIFEST_FILE)
+    # Other DPIs' renders stay on record until a run at that DPI reuses or prunes them
+    outputs = {path: key for path, key in manifest["outputs"].items() if path_dpi(path) not in dpis}
+    if args.force or not write_files:
+        manifest = {"outputs": {}, "zip": ""}
+    previous = manifest["outputs"]
+    with profiler.span("plan"):
+        kept, moves, todo = plan_renders(jobs, keys, previous, OUTPUT_DIR)
+        if write_files:
+            apply_moves(moves)
+            pruned = prune_orphans(card_dirs, set(keys))
+    if write_files:
+        print(f"  {len(kept)} unchanged, {len(moves)} moved, {pruned} pruned, "
+              f"{len(todo)} to render\n")
+    for out in kept + [dst for _, dst in moves]:
+        outputs[rel(out)] = keys[out]
+
+    # The ZIP holds the primary DPI. It is rebuilt in the same pass: fresh
+    # renders are streamed in from memory and only unchanged cards are read
+    # back from disk.
+    deck = [job[2] for job in backs + jobs if job[3] == primary]
+    zip_key = render_key("zip", [(rel(out), keys[out]) for out in deck])
+    build_zip = manifest["zip"] != zip_key or not zip_path.exists()
+    zip_tmp = zip_path.with_suffix(".zip.tmp")
+    zf = zipfile.ZipFile(zip_tmp, "w") if build_zip else None
+    if build_zip:
+        print(f"  Writing ZIP file...")
+    if imposer:
+        print(f"  Imposing {args.grid} on {args.sheets} sheets...")
+
+    try:
+        # Generate rebranded card backs
+        print("  Generating card backs...")
+        for bg, fg, out, dpi in backs:
+            data = None
+            if previous.get(rel(out)) != keys[out] or not out.exists():
+                buf = io.BytesIO()
+                with profiler.span("backs"):
+                    generate_back(bg, fg, buf, mode, dpi)
+                data = buf.getvalue()
+                if write_files:
+                    out.write_bytes(data)
+            outputs[rel(out)] = keys[out]
+            if zf and dpi == primary:
+                zip_png(zf, arcname(out), data, out)
+        print("  Card backs saved to backs/\n")
+
+        todo_prompts = sum(1 for job in todo if job[1] == "black")
+        todo_responses = len(todo) - todo_prompts
+        templates = {}
+        if todo:
+            # Pre-rebrand templates (do it once per DPI, reuse for all cards)
+            print("  Preparing rebranded templates...")
+            with profiler.span("templates"):
+                templates = {
+                    (kind, dpi): rebrand_template(CARD_TEMPLATES[kind], *CARD_COLORS[kind],
+                                                  mode, dpi)
+                    for kind, dpi in sorted({(job[1], job[3]) for job in todo})
+                }
+
+            # Prompt cards (black background, white text), then response cards
+            # (white background, black text). Results arrive in job order, so
+            # progress stays ordered whatever the worker count.
+            print(f"  Rendering on {workers} worker(s) at {', '.join(map(str, dpis))} DPI")
+            if todo_prompts:
+                print(f"  Generating {todo_prompts} prompt card images (black)...")
+            else:
+                print(f"  Generating {todo_responses} response card images (white)...")
+
+        # Reuse fits from `generate_cards.py layout` where they are current
+        layouts = load_layouts(LAYOUT_FILE) if todo else {}
+        rendered = render_cards(todo, templates, workers, write_files,
+                                build_zip or imposer is not None, mode,
+                                {key: layouts[key] for key in map(text_key, {job[0] for job in todo})
+                                 if key in layouts})
+        todo_paths = {job[2] for job in todo}
+        imposed_kind = None
+        n = 0
+        try:
+            for _, kind, out, dpi in jobs:
+                in_deck = dpi == primary
+                if imposer and in_deck and imposed_kind not in (None, kind):
+                    imposer.new_sheet()   # responses start on a fresh sheet
+                if out not in todo_paths:
+                    if zf and in_deck:
+                        zip_png(zf, arcname(out), path=out)
+                    if imposer and in_deck:
+                        with profiler.span("impose"):
+                            imposer.add_card(out.read_bytes())
+                        imposed_kind = kind
+                    continue
+
+                _, data = next(rendered)
+                outputs[rel(out)] = keys[out]
+                if zf and in_deck:
+                    zip_png(zf, arcname(out), data)
+                if imposer and in_deck:
+                    with profiler.span("impose"):
+                        imposer.add_card(data)
+                    imposed_kind = kind
+                n += 1
+                if n <= todo_prompts:
+                    if n % 25 == 0 or n == todo_prompts:
+                        print(f"    {n}/{todo_prompts}")
+                    if n == todo_prompts and todo_responses:
+                        print(f"\n  Generating {todo_responses} response card images (white)...")
+                else:
+                    i = n - todo_prompts
+                    if i % 50 == 0 or i == todo_responses:
+                        print(f"    {i}/{todo_responses}")
+        finally:
+            rendered.close()
+            # Record whatever finished, so an interrupted run resumes
+            if write_files:
+                save_manifest(MANIFEST_FILE, outputs, manifest["zip"])
+    except BaseException:
+        if zf:
+            zf.close()
+            zip_tmp.unlink()
+        if imposer:
+            sheets_file.close()
+            sheets_tmp.unlink()
+        raise
+
+    if zf:
+        zf.close()
+        os.replace(zip_tmp, zip_path)
+        if write_files:
+            save_manifest(MANIFEST_FILE, outputs, zip_key)
+    else:
+        print(f"\n  ZIP file up to date.")
+    if imposer:
+        imposer.close()
+        sheets_file.close()
+        os.replace(sheets_tmp, sheets_path)
+
+    total = len(jobs)
+    print(f"\n=== Done! {total} card images ({len(todo)} rendered) ===\n")
+    if write_files:
+        print(f"  Card images: {OUTPUT_DIR}/")
     print(f"  ZIP file:    {zip_path}")
+    if imposer:
+        print(f"  Sheets PDF:  {sheets_path}  ({imposer.cards} cards on {imposer.sheets} sheets)")
+    info = font_cache_info()
+    print(f"  Font cache:  {info.hits} hits, {info.misses} misses (main process)")
+    profiler.finish()
     print()
 
 
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Print Sheet Imposition
+
+Lays rendered card PNGs out N-up on Letter/A4/SRA3 sheets and writes a
+multi-page PDF. The PDF is streamed: each card image is written as soon as it
+arrives and each page as soon as it is full, so memory stays at one sheet's
+worth of placements however large the deck is.
+
+Card PNGs are embedded without re-rasterising: the PNG's own compressed
+pixel data is copied into the PDF as a FlateDecode stream with PNG
+predictors.
+
+Usage (normally driven by generate_cards.py --sheets):
+    python3 impose.py printable_cards/prompts_black/*.png -o sheets.pdf
+    python3 impose.py cards/*.png -o sheets.pdf --sheet a4 --grid 3x3 --bleed --crop-marks
+"""
+
+import argparse
+import io
+import struct
+import zlib
+from pathlib import Path
+
+# ── Sheet geometry (PDF points, 72 per inch) ───────────────────────────────────
+SHEET_SIZES = {
+    "letter": (612.0, 792.0),
+    "a4": (595.28, 841.89),
+    "sra3": (907.09, 1275.59),
+}
+CROP_MARK_LEN = 12.0     # length of each crop mark
+CROP_MARK_GAP = 3.0      # gap between the outermost bleed edge and a mark
+CROP_MARK_WIDTH = 0.25   # line width
+
+# Card geometry of the 1200 DPI renders: 2.5 x 3.5 in trim + 0.12 in bleed
+CARD_DPI = 1200
+CARD_BLEED_PX = 144
+
+
+def parse_grid(grid: str) -> tuple[int, int]:
+    """Parse "COLSxROWS" (e.g. "3x3")."""
+    try:
+        cols, rows = (int(n) for n in grid.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"grid must look like 3x3, got {grid!r}")
+    if cols < 1 or rows < 1:
+        raise ValueError(f"grid must be at least 1x1, got {grid!r}")
+    return cols, rows
+
+
+def sheet_layout(sheet: str, cols: int, rows: int, trim_w: float, trim_h: float,
+                 bleed: float = 0.0) -> list[tuple[float, float]]:
+    """Trim-box origins (lower-left, points) for each cell, top-left first.
+
+    Cells are spaced by the trim size plus bleed on every side, and the grid
+    is centred on the sheet. Raises ValueError if the grid does not fit.
+    """
+    page_w, page_h = SHEET_SIZES[sheet]
+    pitch_w, pitch_h = trim_w + 2 * bleed, trim_h + 2 * bleed
+    grid_w, grid_h = cols * pitch_w, rows * pitch_h
+    if grid_w > page_w or grid_h > page_h:
+        raise ValueError(
+            f"{cols}x{rows} cards ({grid_w / 72:.2f} x {grid_h / 72:.2f} in) "
+            f"do not fit on {sheet} ({page_w / 72:.2f} x {page_h / 72:.2f} in)"
+        )
+    left = (page_w - grid_w) / 2 + bleed
+    top = (page_h + grid_h) / 2 - bleed
+    return [(left + c * pitch_w, top - trim_h - r * pitch_h)
+            for r in range(rows) for c in range(cols)]
+
+
+def crop_marks(cells: list[tuple[float, float]], trim_w: float, trim_h: float,
+               bleed: float, page_size: tuple[float, float]) -> list[tuple[float, float, float, float]]:
+    """Crop-mark line segments (x1, y1, x2, y2) in the margins around the grid."""
+    xs = sorted({x for x, _ in cells} | {x + trim_w for x, _ in cells})
+    ys = sorted({y for _, y in cells} | {y + trim_h for _, y in cells})
+    page_w, page_h = page_size
+    left, right = xs[0] - bleed - CROP_MARK_GAP, xs[-1] + bleed + CROP_MARK_GAP
+    bottom, top = ys[0] - bleed - CROP_MARK_GAP, ys[-1] + bleed + CROP_MARK_GAP
+
+    lines = []
+    for x in xs:
+        lines.append((x, top, x, min(page_h, top + CROP_MARK_LEN)))
+        lines.append((x, bottom, x, max(0.0, bottom - CROP_MARK_LEN)))
+    for y in ys:
+        lines.append((left, y, max(0.0, left - CROP_MARK_LEN), y))
+        lines.append((right, y, min(page_w, right + CROP_MARK_LEN), y))
+    # Marks only make sense where the margin has room for them
+    return [l for l in lines if l[:2] != l[2:]]
+
+
+# ── PNG → PDF image ────────────────────────────────────────────────────────────
+def png_image_stream(png: bytes) -> tuple[dict, bytes]:
+    """Return (image dictionary entries, stream data) for a PNG.
+
+    Non-interlaced 1/8-bit greyscale and 8-bit RGB PNGs (what Pillow writes
+    for cards) are passed through untouched; anything else is decoded with
+    Pillow and re-compressed.
+    """
+    if png[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("not a PNG file")
+    pos, idat = 8, []
+    width = height = depth = color = interlace = None
+    while pos < len(png):
+        length, ctype = struct.unpack(">I4s", png[pos:pos + 8])
+        data = png[pos + 8:pos + 8 + length]
+        if ctype == b"IHDR":
+            width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", data)
+        elif ctype == b"IDAT":
+            idat.append(data)
+        elif ctype == b"IEND":
+            break
+        pos += 12 + length
+
+    colors = {0: 1, 2: 3}.get(color)
+    if colors and (depth == 8 or (colors == 1 and depth == 1)) and not interlace:
+        return {
+            "Width": width, "Height": height, "BitsPerComponent": depth,
+            "ColorSpace": "/DeviceGray" if colors == 1 else "/DeviceRGB",
+            "Filter": "/FlateDecode",
+            "DecodeParms": f"<< /Predictor 15 /Colors {colors} /BitsPerComponent {depth} "
+                           f"/Columns {width} >>",
+        }, b"".join(idat)
+
+    from PIL import Image
+    img = Image.open(io.BytesIO(png))
+    img = img.convert("L" if img.mode in ("1", "L", "LA") else "RGB")
+    return {
+        "Width": img.width, "Height": img.height, "BitsPerComponent": 8,
+        "ColorSpace": "/DeviceGray" if img.mode == "L" else "/DeviceRGB",
+        "Filter": "/FlateDecode",
+    }, zlib.compress(img.tobytes(), 6)
+
+
+# ── Streaming PDF writer ───────────────────────────────────────────────────────
+class PdfWriter:
+    """Minimal PDF writer that emits objects as they are produced.
+
+    Objects 1 (catalog) and 2 (page tree) are reserved and written on close,
+    once every page is known.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.pos = 0
+        self.offsets = {}
+        self.next_id = 3
+        self.pages = []
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data: bytes):
+        self.fp.write(data)
+        self.pos += len(data)
+
+    def _object(self, body: str, stream: bytes | None = None, obj_id: int | None = None) -> int:
+        """Write one object; a stream's /Length is added to its dictionary."""
+        if obj_id is None:
+            obj_id, self.next_id = self.next_id, self.next_id + 1
+        self.offsets[obj_id] = self.pos
+        if stream is None:
+            self._write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        else:
+            body = f"{body[:-2].rstrip()} /Length {len(stream)} >>"
+            self._write(f"{obj_id} 0 obj\n{body}\nstream\n".encode("latin-1"))
+            self._write(stream)
+            self._write(b"\nendstream\nendobj\n")
+        return obj_id
+
+    def add_object(self, body: str, stream: bytes | None = None) -> int:
+        """Write a dictionary (or stream) object and return its object id."""
+        return self._object(body, stream)
+
+    def add_image(self, png: bytes) -> int:
+        """Write a PNG as an image XObject and return its object id."""
+        entries, data = png_image_stream(png)
+        body = " ".join(f"/{k} {v}" for k, v in entries.items())
+        return self._object(f"<< /Type /XObject /Subtype /Image {body} >>", data)
+
+    def add_page(self, size: tuple[float, float], content: str, images: list[int],
+                 fonts: dict[str, int] | None = None):
+        """Write a page whose content stream draws the given image objects.
+
+        Images are named /Im<object id>; fonts maps resource names (F1, ...)
+        to font object ids.
+        """
+        contents = self._object("<< /Filter /FlateDecode >>",
+                                zlib.compress(content.encode("latin-1")))
+        resources = f"/XObject << {' '.join(f'/Im{i} {i} 0 R' for i in images)} >>"
+        if fonts:
+            resources += f" /Font << {' '.join(f'/{k} {v} 0 R' for k, v in fonts.items())} >>"
+        self.pages.append(self._object(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {size[0]:.2f} {size[1]:.2f}] "
+            f"/Resources << {resources} >> /Contents {contents} 0 R >>"
+        ))
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        kids = " ".join(f"{p} 0 R" for p in self.pages)
+        self._object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>", obj_id=2)
+        self._object("<< /Type /Catalog /Pages 2 0 R >>", obj_id=1)
+        xref = self.pos
+        count = max(self.offsets) + 1
+        rows = ["0000000000 65535 f "]
+        rows += [f"{self.offsets.get(i, 0):010d} 00000 n " for i in range(1, count)]
+        self._write(f"xref\n0 {count}\n".encode("latin-1"))
+        self._write("".join(f"{r}\n" for r in rows).encode("latin-1"))
+        self._write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+                    .encode("latin-1"))
+
+
+# ── Imposition ─────────────────────────────────────────────────────────────────
+class SheetImposer:
+    """Place card PNGs N-up on sheets, streaming them into a PdfWriter.
+
+    Card images are assumed to be full-bleed renders: trim size plus
+    bleed_px on every side at the given DPI. Without keep_bleed the bleed is
+    clipped away and cards butt up against each other at the trim line.
+    """
+
+    def __init__(self, fp, sheet: str = "letter", grid: str = "3x3",
+                 card_px: tuple[int, int] = (3288, 4488), dpi: int = CARD_DPI,
+                 bleed_px: int = CARD_BLEED_PX, keep_bleed: bool = False,
+                 marks: bool = False):
+        cols, rows = parse_grid(grid)
+        scale = 72 / dpi
+        self.bleed = bleed_px * scale
+        self.image_w, self.image_h = card_px[0] * scale, card_px[1] * scale
+        self.trim_w = self.image_w - 2 * self.bleed
+        self.trim_h = self.image_h - 2 * self.bleed
+        self.page_size = SHEET_SIZES[sheet]
+        self.cells = sheet_layout(sheet, cols, rows, self.trim_w, self.trim_h,
+                                  self.bleed if keep_bleed else 0.0)
+        self.keep_bleed = keep_bleed
+        self.marks = (crop_marks(self.cells, self.trim_w, self.trim_h,
+                                 self.bleed if keep_bleed else 0.0, self.page_size)
+                      if marks else [])
+        self.writer = PdfWriter(fp)
+        self.placed = []   # image object ids on the current sheet
+        self.cards = 0
+
+    def add_card(self, png: bytes):
+        """Add one card; the sheet is written out as soon as it is full."""
+        self.placed.append(self.writer.add_image(png))
+        self.cards += 1
+        if len(self.placed) == len(self.cells):
+            self.new_sheet()
+
+    def new_sheet(self):
+        """Finish the current sheet (if it has any cards)."""
+        if not self.placed:
+            return
+        ops = []
+        for image_id, (x, y) in zip(self.placed, self.cells):
+            ops.append("q")
+            if not self.keep_bleed:
+                ops.append(f"{x:.3f} {y:.3f} {self.trim_w:.3f} {self.trim_h:.3f} re W n")
+            ops.append(f"{self.image_w:.3f} 0 0 {self.image_h:.3f} "
+                       f"{x - self.bleed:.3f} {y - self.bleed:.3f} cm /Im{image_id} Do Q")
+        if self.marks:
+            ops.append(f"q 0 G {CROP_MARK_WIDTH} w")
+            ops += [f"{x1:.3f} {y1:.3f} m {x2:.3f} {y2:.3f} l S" for x1, y1, x2, y2 in self.marks]
+            ops.append("Q")
+        self.writer.add_page(self.page_size, "\n".join(ops), self.placed)
+        self.placed = []
+
+    @property
+    def sheets(self) -> int:
+        return len(self.writer.pages)
+
+    def close(self):
+        self.new_sheet()
+        self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impose card PNGs onto print sheets.")
+    parser.add_argument("pngs", nargs="+", type=Path, help="card images, in order")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="PDF to write")
+    parser.add_argument("--sheet", choices=sorted(SHEET_SIZES), default="letter")
+    parser.add_argument("--grid", default="3x3", help="cards per sheet, COLSxROWS")
+    parser.add_argument("--dpi", type=int, default=CARD_DPI, help="resolution of the PNGs")
+    parser.add_argument("--bleed", action="store_true", help="keep each card's bleed area")
+    parser.add_argument("--crop-marks", action="store_true", help="draw crop marks")
+    args = parser.parse_args()
+
+    from PIL import Image
+    with Image.open(args.pngs[0]) as first:
+        card_px = first.size
+    bleed_px = round(CARD_BLEED_PX * args.dpi / CARD_DPI)
+
+    print("\n=== Cards Against Maya — Print Sheet Imposition ===\n")
+    try:
+        with open(args.output, "wb") as f:
+            imposer = SheetImposer(f, args.sheet, args.grid, card_px, args.dpi,
+                                   bleed_px, args.bleed, args.crop_marks)
+            for png in args.pngs:
+                imposer.add_card(png.read_bytes())
+            imposer.close()
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+    print(f"  {imposer.cards} cards on {imposer.sheets} {args.sheet} sheets -> {args.output}\n")
+
+
+if __name__ == "__main__":
+    main()
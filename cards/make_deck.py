@@ -3,184 +3,579 @@
 Cards Against Maya - CSV & Deck Generator
 
 Reads the batch text files and produces:
-  1. cards_against_maya.csv           — master CSV (Type, CardText)
+  1. cards_against_maya.csv           — master CSV (CardID, Type, CardText)
   2. cah_generator/black.txt          — prompt cards for github.com/GrantBirki/cah-generator
   3. cah_generator/white.txt          — response cards for the same tool
+                                        (black.ids / white.ids: the card ID of each line)
   4. printable_cards/                  — individual PNG card images (if Pillow is installed)
+  5. cards_against_maya.deck          — binary deck with scores, for deckfile.DeckFile
+  6. near_duplicates.txt              — reworded duplicate cards (with --dedupe)
+
+Outputs are only rewritten when the batch files they depend on changed since
+the last run (tracked in make_deck_manifest.json); unchanged ones are reported
+as up to date. Every card gets a stable ID from its normalised text
+(card_ids.py), which names its image files and joins it to its scores.
 
 Usage:
     python3 make_deck.py                 # CSV + text files only
     python3 make_deck.py --images        # also generate PNG card images
+    python3 make_deck.py --force         # rebuild every output
+    python3 make_deck.py --dedupe        # report near-duplicate cards
+    python3 make_deck.py --drop-dupes    # ...and keep only the first card of each cluster
+    python3 make_deck.py --profile       # time each stage (--cprofile adds a cProfile dump)
 """
 
 import csv
+import hashlib
+import io
+import json
 import os
+import random
 import re
 import sys
-import textwrap
+import time
+import unicodedata
+import zlib
 from pathlib import Path
 
+from card_ids import card_id, index_ids, normalize_text, unique_names
+from profiling import profiler
+
 # ── Configuration ──────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).parent
 BATCH_DIR = BASE_DIR / "batches"
-PROMPT_FILES = sorted(BATCH_DIR.glob("prompts_batch*.txt"))
-RESPONSE_FILES = sorted(BATCH_DIR.glob("responses_batch*.txt"))
 
 CSV_OUT = BASE_DIR / "cards_against_maya.csv"
 CAH_DIR = BASE_DIR / "cah_generator"
 IMG_DIR = BASE_DIR / "printable_cards"
-
-# Card dimensions (2.5 x 3.5 inches at 300 DPI)
-CARD_W, CARD_H = 750, 1050
-MARGIN = 60
-FONT_SIZE = 32
-SMALL_FONT_SIZE = 18
+DECK_OUT = BASE_DIR / "cards_against_maya.deck"
+SCORES_DIR = BASE_DIR / "scores"
+TOP_CSV = BASE_DIR / "cards_against_maya_top612.csv"
+BUILD_MANIFEST = BASE_DIR / "make_deck_manifest.json"
+DUPES_REPORT = BASE_DIR / "near_duplicates.txt"
+
+CAH_INFO = "Cards Against Maya\nv1.0\n"
+
+# Proof cards: generate_cards.py's layout rasterised at 300 DPI (822x1122, with bleed)
+PROOF_DPI = 300
+
+# Near-duplicates: Jaccard similarity of character shingles of the normalised text
+DEDUPE_THRESHOLD = 0.7
+SHINGLE_SIZE = 4
+MINHASH_BINS = 64        # signature length
+LSH_BANDS = 16           # 16 bands of 4 rows: pairs above ~0.5 similarity become candidates
+MINHASH_PROBES = [random.Random(b).sample(range(MINHASH_BINS), MINHASH_BINS)
+                  for b in range(MINHASH_BINS)]
+NUMBER_WORDS = {w: str(i) for i, w in enumerate(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen "
+    "fourteen fifteen sixteen seventeen eighteen nineteen twenty".split())}
+NUMBER_WORDS.update(thirty="30", forty="40", fifty="50", sixty="60", seventy="70",
+                    eighty="80", ninety="90", hundred="100", thousand="1000")
+
+# Bump when an output's format changes, to rebuild everything once
+BUILD_VERSION = 2
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
-def read_cards(files: list[Path]) -> list[str]:
-    """Read card lines from batch files, strip numbering prefix."""
+def find_batches(batch_dir: Path) -> tuple[list[Path], list[Path]]:
+    """Prompt and response batch files in batch_dir, in order."""
+    return (sorted(batch_dir.glob("prompts_batch*.txt")),
+            sorted(batch_dir.glob("responses_batch*.txt")))
+
+
+def read_cards(files: list[Path]) -> list[tuple[str, str]]:
+    """Read (card ID, text) from batch files, stripping the numbering prefix.
+
+    Exits if two different cards share an ID, since every join keyed on it
+    would silently merge them.
+    """
     cards = []
+    seen = {}       # card ID -> (normalised text, where)
     for f in files:
         with open(f, "r", encoding="utf-8") as fh:
-            for line in fh:
+            for lineno, line in enumerate(fh, 1):
                 line = line.strip()
                 if not line:
                     continue
                 # Strip leading number + dot:  "42. Card text" → "Card text"
                 text = re.sub(r"^\d+\.\s*", "", line)
-                if text:
-                    cards.append(text)
+                if not text:
+                    continue
+                cid = card_id(text)
+                first = seen.setdefault(cid, (normalize_text(text), f"{f.name}:{lineno}"))
+                if first[0] != normalize_text(text):
+                    print(f"ERROR: {f.name}:{lineno} and {first[1]} are different cards "
+                          f"with the same card ID {cid}.")
+                    sys.exit(1)
+                cards.append((cid, text))
     return cards
 
 
-def write_csv(prompts: list[str], responses: list[str], path: Path):
-    """Write master CSV with Type and CardText columns."""
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["Type", "CardText"])
-        for card in prompts:
-            w.writerow(["Prompt", card])
-        for card in responses:
-            w.writerow(["Response", card])
-    print(f"  CSV written: {path}  ({len(prompts)} prompts + {len(responses)} responses)")
-
-
-def write_cah_generator_files(prompts: list[str], responses: list[str], out_dir: Path):
-    """Write black.txt / white.txt for github.com/GrantBirki/cah-generator."""
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    info = out_dir / "info.txt"
-    info.write_text("Cards Against Maya\nv1.0\n", encoding="utf-8")
-
-    black = out_dir / "black.txt"
-    black.write_text("\n".join(prompts) + "\n", encoding="utf-8")
-
-    white = out_dir / "white.txt"
-    white.write_text("\n".join(responses) + "\n", encoding="utf-8")
-
-    print(f"  cah-generator files written to: {out_dir}/")
-
-
-def generate_card_images(prompts: list[str], responses: list[str], out_dir: Path):
-    """Generate individual PNG card images using Pillow."""
+def csv_text(prompts: list[tuple[str, str]], responses: list[tuple[str, str]]) -> str:
+    """Master CSV with CardID, Type and CardText columns."""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(["CardID", "Type", "CardText"])
+    for cid, card in prompts:
+        w.writerow([cid, "Prompt", card])
+    for cid, card in responses:
+        w.writerow([cid, "Response", card])
+    return buf.getvalue()
+
+
+def read_scores(files: list[Path]) -> dict[str, float]:
+    """Weighted score per card ID from score_cards.py's JSON/JSONL batches."""
+    from score_cards import compute_weighted_scores, read_batch
+    scores = {}
+    for path in files:
+        batch = read_batch(path)
+        scores.update(zip(batch.ids, compute_weighted_scores(batch.dims).tolist()))
+    return scores
+
+
+def read_top(path: Path) -> set[str]:
+    """Card IDs in score_cards.py's top-scored CSV."""
+    with open(path, "r", encoding="utf-8") as f:
+        return {row.get("CardID") or card_id(row["CardText"]) for row in csv.DictReader(f)}
+
+
+def deck_bytes(prompts: list[tuple[str, str]], responses: list[tuple[str, str]],
+               score_files: list[Path], top_csv: Path | None) -> bytes:
+    """Binary deck file, with score and top-scored columns when their inputs exist."""
+    from deckfile import pack_deck
+    ids = {text: cid for cid, text in prompts + responses}
+    cards = ([("Prompt", card) for _, card in prompts] +
+             [("Response", card) for _, card in responses])
+    scores = None
+    if score_files:
+        try:
+            by_id = read_scores(score_files)
+            scores = {text: by_id[cid] for text, cid in ids.items() if cid in by_id}
+        except ImportError:
+            print("\n  ⚠ NumPy not installed (needed by score_cards.py). Run:  pip install numpy")
+            print("    Writing the deck file without scores.\n")
+    top = None
+    if top_csv:
+        top_ids = read_top(top_csv)
+        top = {text for text, cid in ids.items() if cid in top_ids}
+    return pack_deck(cards, scores, top)
+
+
+def cah_text(cards: list[tuple[str, str]]) -> str:
+    """black.txt / white.txt for github.com/GrantBirki/cah-generator."""
+    return "\n".join(text for _, text in cards) + "\n"
+
+
+def cah_ids(cards: list[tuple[str, str]]) -> str:
+    """black.ids / white.ids: the card ID of each line of black.txt / white.txt."""
+    return "\n".join(cid for cid, _ in cards) + "\n"
+
+
+def write_atomic(path: Path, text: str | bytes):
+    """Replace path with text in one step, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    if isinstance(text, bytes):
+        tmp.write_bytes(text)
+    else:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+    os.replace(tmp, path)
+
+
+# ── Near-duplicate detection ───────────────────────────────────────────────────
+def normalize_card(text: str) -> str:
+    """Lowercase words without accents or punctuation, number words as digits."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return " ".join(NUMBER_WORDS.get(w, w) for w in re.findall(r"[a-z0-9]+", text))
+
+
+def shingles(text: str) -> set[bytes]:
+    """Overlapping SHINGLE_SIZE-character pieces of normalised (ASCII) text."""
+    data = f" {text} ".encode()
+    return {data[i:i + SHINGLE_SIZE] for i in range(max(len(data) - SHINGLE_SIZE + 1, 1))}
+
+
+def minhash(pieces: set[bytes]) -> list[int]:
+    """MINHASH_BINS-long signature from a single hash per shingle.
+
+    One-permutation MinHash: each shingle's CRC-32 picks a bin and the
+    smallest value in each bin is kept, so a card costs one hash per shingle
+    rather than one per shingle per bin. An empty bin copies the first filled
+    bin in its fixed probe order (optimal densification), which keeps two
+    cards' bins agreeing with probability ~ their similarity.
+    """
+    # Written in descending order, so the smallest value of each bin wins
+    bins = {h % MINHASH_BINS: h // MINHASH_BINS
+            for h in sorted(map(zlib.crc32, pieces), reverse=True)}
+    sig = list(map(bins.get, range(MINHASH_BINS)))
+    if len(bins) < MINHASH_BINS:
+        for b, probes in enumerate(MINHASH_PROBES):
+            if sig[b] is None:
+                for p in probes:
+                    if p in bins:
+                        sig[b] = bins[p]
+                        break
+    return sig
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def find_near_duplicates(cards: list[str], threshold: float = DEDUPE_THRESHOLD
+                         ) -> list[list[tuple[int, float]]]:
+    """Clusters of near-duplicate cards, earliest card first.
+
+    Each cluster is a list of (index into cards, similarity to the first
+    card). Cards that normalise to the same text are grouped directly; the
+    rest are bucketed by LSH bands of their MinHash signatures, and only
+    cards sharing a bucket are compared, so the cost grows with the number
+    of cards rather than the number of pairs.
+    """
+    rows = MINHASH_BINS // LSH_BANDS
+    parent = list(range(len(cards)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(a: int, b: int):
+        a, b = find(a), find(b)
+        parent[max(a, b)] = min(a, b)
+
+    first = {}      # normalised text -> first card with it
+    pieces = {}     # first card -> shingles
+    buckets = {}    # hash of (band number, that band's rows) -> first card in it
+    shared = {}     # same key -> every card in it, for buckets holding more than one
+    for i, card in enumerate(cards):
+        norm = normalize_card(card)
+        if norm in first:
+            union(first[norm], i)
+            continue
+        first[norm] = i
+        if not norm:
+            continue
+        pieces[i] = shingles(norm)
+        sig = minhash(pieces[i])
+        # Plain int keys: millions of tuples would keep the cyclic GC busy
+        for key in map(hash, enumerate(zip(*[iter(sig)] * rows))):
+            owner = buckets.setdefault(key, i)
+            if owner != i:
+                shared.setdefault(key, [owner]).append(i)
+
+    checked = set()
+    for members in shared.values():
+        for n, a in enumerate(members):
+            for b in members[n + 1:]:
+                if (a, b) in checked or find(a) == find(b):
+                    continue
+                checked.add((a, b))
+                if jaccard(pieces[a], pieces[b]) >= threshold:
+                    union(a, b)
+
+    # Roots are the lowest index in their cluster, so members come out earliest first
+    clusters = {}
+    for i in range(len(cards)):
+        clusters.setdefault(find(i), []).append(i)
+
+    def similarity(keep: int, i: int) -> float:
+        return jaccard(pieces.get(keep, set()), pieces.get(first[normalize_card(cards[i])], set()))
+
+    return [[(keep, 1.0)] + [(i, similarity(keep, i)) for i in members[1:]]
+            for keep, members in clusters.items() if len(members) > 1]
+
+
+def drop_duplicates(cards: list, clusters: list[list[tuple[int, float]]]) -> list:
+    """cards without all but the first card of each cluster."""
+    drop = {i for cluster in clusters for i, _ in cluster[1:]}
+    return [card for i, card in enumerate(cards) if i not in drop]
+
+
+def dupes_text(sections: list[tuple[str, list[str], list]]) -> str:
+    """Near-duplicate report for (card type, cards, clusters) sections."""
+    lines = [f"# Near-duplicate cards (similarity >= {DEDUPE_THRESHOLD:.2f} on normalised text)",
+             "# #N is the card's position in its deck; --drop-dupes keeps the first of each cluster"]
+    for kind, cards, clusters in sections:
+        dupes = sum(len(c) - 1 for c in clusters)
+        lines.append(f"\n## {kind}s: {len(clusters)} clusters, {dupes} duplicates "
+                     f"of {len(cards)} cards")
+        for cluster in clusters:
+            lines.append("")
+            for n, (i, sim) in enumerate(cluster):
+                lines.append(f"  {'keep' if n == 0 else 'drop'}  #{i + 1:<5d} "
+                             f"{'    ' if n == 0 else f'{sim:.2f}'}  {cards[i]}")
+    return "\n".join(lines) + "\n"
+
+
+# ── Build graph ────────────────────────────────────────────────────────────────
+def file_state(path: Path, previous: dict | None = None) -> dict:
+    """Size, mtime and SHA-256 of an input file.
+
+    The previous hash is reused while size and mtime match, so an unchanged
+    input costs one stat() instead of a read.
+    """
+    st = path.stat()
+    if previous and previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+        return previous
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "sha256": hashlib.sha256(path.read_bytes()).hexdigest()}
+
+
+class Build:
+    """Outputs rebuilt only when their inputs (or the output itself) changed.
+
+    Input hashes, target keys and per-card image keys are kept in a manifest
+    between runs.
+    """
+
+    def __init__(self, manifest_path: Path, base_dir: Path, force: bool = False):
+        self.manifest_path = manifest_path
+        self.base_dir = base_dir
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            old = {}
+        self.force = force
+        if force or old.get("version") != BUILD_VERSION:
+            old = {}
+        self.old_inputs = old.get("inputs", {})
+        self.old_targets = old.get("targets", {})
+        self.images = old.get("images", {})
+        self.inputs = {}
+        self.targets = {}
+        self.report = []   # (status, target, reason)
+
+    def rel(self, path: Path) -> str:
+        return path.relative_to(self.base_dir).as_posix()
+
+    def input_hash(self, path: Path) -> str:
+        name = self.rel(path)
+        if name not in self.inputs:
+            self.inputs[name] = file_state(path, self.old_inputs.get(name))
+        return self.inputs[name]["sha256"]
+
+    def target(self, path: Path, deps: list[Path], make, options: dict | None = None) -> bool:
+        """Write make() to path unless it and its deps are unchanged; True if rebuilt.
+
+        options holds any settings besides the deps that change the output.
+        """
+        name = self.rel(path)
+        dep_hashes = {self.rel(d): self.input_hash(d) for d in deps}
+        key = hashlib.sha256(json.dumps([name, sorted(dep_hashes.items())]
+                                        + ([options] if options else [])).encode()).hexdigest()
+        old = self.old_targets.get(name)
+        st = path.stat() if path.exists() else None
+
+        if old is None:
+            reason = "forced" if self.force else "new"
+        elif st is None:
+            reason = "output missing"
+        elif (st.st_size, st.st_mtime_ns) != (old["size"], old["mtime_ns"]):
+            reason = "output modified"
+        elif old["key"] != key:
+            changed = [d for d, h in dep_hashes.items()
+                       if self.old_inputs.get(d, {}).get("sha256") != h]
+            removed = [d for d in old.get("deps", []) if d not in dep_hashes]
+            reason = ", ".join(filter(None, [
+                changed and f"changed: {', '.join(changed)}",
+                removed and f"removed: {', '.join(removed)}",
+                old.get("options") != options and "options changed"])) or "inputs changed"
+        else:
+            self.targets[name] = old
+            self.report.append(("up to date", name, ""))
+            return False
+
+        write_atomic(path, make())
+        st = path.stat()
+        self.targets[name] = {"key": key, "deps": sorted(dep_hashes),
+                              "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if options:
+            self.targets[name]["options"] = options
+        self.report.append(("rebuilt", name, reason))
+        return True
+
+    def save(self):
+        """Write the manifest atomically."""
+        write_atomic(self.manifest_path, json.dumps({
+            "version": BUILD_VERSION, "inputs": self.inputs,
+            "targets": self.targets, "images": self.images,
+        }, indent=1, sort_keys=True))
+
+
+def generate_card_images(prompts: list[tuple[str, str]], responses: list[tuple[str, str]],
+                         out_dir: Path, previous: dict[str, str] | None = None) -> dict[str, str]:
+    """Generate 300 DPI proof PNGs with the same layout as generate_cards.py.
+
+    Each card is fitted once in print units (or its layout is taken from
+    generate_cards.py's layout cache) and rasterised at PROOF_DPI, so
+    line breaks match the 1200 DPI print deck exactly. Files are named after
+    card IDs, so reordering the deck renames nothing. Cards whose render key
+    is in previous ({path relative to out_dir: key}) and whose PNG exists are
+    skipped, stale PNGs are removed, and the new keys are returned.
+    """
+    previous = previous or {}
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        from generate_cards import (CARD_COLORS, CARD_TEMPLATES, LAYOUT_FILE, CardCompositor,
+                                    card_key, layout_card, load_layouts, rebrand_template,
+                                    text_key)
     except ImportError:
         print("\n  ⚠ Pillow not installed. Run:  pip install Pillow")
         print("    Skipping image generation.\n")
-        return
+        return previous
 
     out_dir.mkdir(parents=True, exist_ok=True)
     black_dir = out_dir / "prompts"
     white_dir = out_dir / "responses"
     black_dir.mkdir(exist_ok=True)
     white_dir.mkdir(exist_ok=True)
-
-    # Try to load a good font, fall back to default
-    font = None
-    bold_font = None
-    for font_path in [
-        "/System/Library/Fonts/Helvetica.ttc",
-        "/System/Library/Fonts/SFNSText.ttf",
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-    ]:
-        if os.path.exists(font_path):
-            try:
-                font = ImageFont.truetype(font_path, FONT_SIZE)
-                bold_font = ImageFont.truetype(font_path, SMALL_FONT_SIZE)
-                break
-            except Exception:
+    outputs = {}
+    # Layouts cached by `generate_cards.py layout` are reused as-is
+    layouts = load_layouts(LAYOUT_FILE)
+
+    def make_cards(cards: list[tuple[str, str]], kind: str, stem: str, dest: Path):
+        compositor = None
+        rendered = 0
+        for name, (_, card) in zip(unique_names(cid for cid, _ in cards), cards):
+            out = dest / f"{stem}_{name}.png"
+            name = out.relative_to(out_dir).as_posix()
+            outputs[name] = card_key(card, kind, "RGB", PROOF_DPI)
+            if previous.get(name) == outputs[name] and out.exists():
                 continue
-    if font is None:
-        font = ImageFont.load_default()
-        bold_font = font
-
-    def make_card(text: str, bg_color: str, fg_color: str, path: Path):
-        img = Image.new("RGB", (CARD_W, CARD_H), bg_color)
-        draw = ImageDraw.Draw(img)
-
-        # Word-wrap the text
-        wrapped = textwrap.fill(text, width=30)
-        draw.multiline_text(
-            (MARGIN, MARGIN),
-            wrapped,
-            fill=fg_color,
-            font=font,
-            spacing=8,
-        )
-
-        # Footer
-        draw.text(
-            (MARGIN, CARD_H - MARGIN - 20),
-            "Cards Against Maya",
-            fill=fg_color,
-            font=bold_font,
-        )
-
-        img.save(path, "PNG")
+            if compositor is None:
+                compositor = CardCompositor(
+                    rebrand_template(CARD_TEMPLATES[kind], *CARD_COLORS[kind], dpi=PROOF_DPI),
+                    PROOF_DPI)
+            with profiler.card(f"{stem}_{name}", kind=kind):
+                layout = layouts.get(text_key(card)) or layout_card(card)
+                with profiler.span("draw"):
+                    img = compositor.render(layout, CARD_COLORS[kind][1])
+                with profiler.span("encode"):
+                    tmp = out.with_name(out.name + ".tmp")
+                    img.save(tmp, "PNG")
+                    os.replace(tmp, out)
+            rendered += 1
+        # Cards past the end of the deck
+        for old in dest.glob(f"{stem}_*.png"):
+            if old.relative_to(out_dir).as_posix() not in outputs:
+                old.unlink()
+        return rendered
 
     print(f"  Generating {len(prompts)} prompt card images...")
-    for i, card in enumerate(prompts, 1):
-        make_card(card, "#000000", "#FFFFFF", black_dir / f"prompt_{i:03d}.png")
+    n = make_cards(prompts, "black", "prompt", black_dir)
+    print(f"    {n} rendered, {len(prompts) - n} unchanged")
 
     print(f"  Generating {len(responses)} response card images...")
-    for i, card in enumerate(responses, 1):
-        make_card(card, "#FFFFFF", "#000000", white_dir / f"response_{i:03d}.png")
+    n = make_cards(responses, "white", "response", white_dir)
+    print(f"    {n} rendered, {len(responses) - n} unchanged")
 
     print(f"  Card images saved to: {out_dir}/")
+    return outputs
 
 
 # ── Main ───────────────────────────────────────────────────────────────────────
 def main():
     print("\n=== Cards Against Maya - Deck Generator ===\n")
+    start = time.perf_counter()
+    if "--profile" in sys.argv or "--cprofile" in sys.argv:
+        profiler.enable("make_deck", "--cprofile" in sys.argv)
 
-    if not PROMPT_FILES:
+    prompt_files, response_files = find_batches(BATCH_DIR)
+    if not prompt_files:
         print("ERROR: No prompts_batch*.txt files found in", BATCH_DIR)
         sys.exit(1)
-    if not RESPONSE_FILES:
+    if not response_files:
         print("ERROR: No responses_batch*.txt files found in", BATCH_DIR)
         sys.exit(1)
 
-    prompts = read_cards(PROMPT_FILES)
-    responses = read_cards(RESPONSE_FILES)
-    print(f"  Loaded {len(prompts)} prompt cards from {len(PROMPT_FILES)} files")
-    print(f"  Loaded {len(responses)} response cards from {len(RESPONSE_FILES)} files")
-    print()
+    build = Build(BUILD_MANIFEST, BASE_DIR, force="--force" in sys.argv)
+    drop = "--drop-dupes" in sys.argv
+    options = {"drop_dupes": DEDUPE_THRESHOLD} if drop else None
+
+    # Batch files are only read once an output that depends on them is rebuilt
+    decks = {}
+    dupes = {}
+
+    def deck(files: list[Path]) -> list[tuple[str, str]]:
+        key = tuple(files)
+        if key not in decks:
+            with profiler.span("load"):
+                decks[key] = read_cards(files)
+            print(f"  Loaded {len(decks[key])} cards from {len(files)} files")
+            repeats = len(decks[key]) - len(index_ids(cid for cid, _ in decks[key]))
+            if repeats:
+                print(f"  ⚠ {repeats} cards repeat an earlier card's text "
+                      f"(same card ID); --dedupe lists them")
+        return decks[key]
+
+    def duplicates(files: list[Path]) -> list:
+        key = tuple(files)
+        if key not in dupes:
+            with profiler.span("dedupe"):
+                dupes[key] = find_near_duplicates([text for _, text in deck(files)])
+            print(f"  Found {sum(len(c) - 1 for c in dupes[key])} near-duplicates "
+                  f"in {len(dupes[key])} clusters")
+        return dupes[key]
+
+    def prompts():
+        if drop:
+            return drop_duplicates(deck(prompt_files), duplicates(prompt_files))
+        return deck(prompt_files)
+
+    def responses():
+        if drop:
+            return drop_duplicates(deck(response_files), duplicates(response_files))
+        return deck(response_files)
 
     # 1. Master CSV
-    write_csv(prompts, responses, CSV_OUT)
+    with profiler.span("csv"):
+        build.target(CSV_OUT, prompt_files + response_files,
+                     lambda: csv_text(prompts(), responses()), options)
 
     # 2. cah-generator format (black.txt + white.txt)
-    write_cah_generator_files(prompts, responses, CAH_DIR)
-
-    # 3. Optional: PNG images
+    with profiler.span("cah"):
+        build.target(CAH_DIR / "info.txt", [], lambda: CAH_INFO)
+        build.target(CAH_DIR / "black.txt", prompt_files, lambda: cah_text(prompts()), options)
+        build.target(CAH_DIR / "white.txt", response_files, lambda: cah_text(responses()),
+                     options)
+        build.target(CAH_DIR / "black.ids", prompt_files, lambda: cah_ids(prompts()), options)
+        build.target(CAH_DIR / "white.ids", response_files, lambda: cah_ids(responses()), options)
+
+    # 3. Binary deck (deckfile.py), with scores when score_cards.py's inputs are present
+    score_files = sorted([*SCORES_DIR.glob("batch_*.json"), *SCORES_DIR.glob("batch_*.jsonl")])
+    top_csv = TOP_CSV if TOP_CSV.exists() else None
+    deck_deps = prompt_files + response_files + score_files + ([top_csv] if top_csv else [])
+    with profiler.span("deck"):
+        build.target(DECK_OUT, deck_deps,
+                     lambda: deck_bytes(prompts(), responses(), score_files, top_csv), options)
+
+    # 4. Optional: near-duplicate report
+    if "--dedupe" in sys.argv or drop:
+        build.target(DUPES_REPORT, prompt_files + response_files, lambda: dupes_text([
+            ("Prompt", [text for _, text in deck(prompt_files)], duplicates(prompt_files)),
+            ("Response", [text for _, text in deck(response_files)], duplicates(response_files)),
+        ]), {"threshold": DEDUPE_THRESHOLD})
+
+    # 5. Optional: PNG images
     if "--images" in sys.argv:
         print()
-        generate_card_images(prompts, responses, IMG_DIR)
+        previous = build.images
+        build.images = generate_card_images(prompts(), responses(), IMG_DIR, previous)
+        changed = sum(1 for k, v in build.images.items() if previous.get(k) != v)
+        build.report.append(("rebuilt" if changed else "up to date", f"{IMG_DIR.name}/",
+                             f"{changed} of {len(build.images)} cards" if changed else ""))
+
+    build.save()
+    print()
+    for status, name, reason in build.report:
+        print(f"  {status:10s}  {name}" + (f"  ({reason})" if reason else ""))
 
-    print(f"\n=== Done! Total: {len(prompts) + len(responses)} cards ===")
+    rebuilt = sum(1 for status, _, _ in build.report if status == "rebuilt")
+    print(f"\n=== Done! {rebuilt} rebuilt, {len(build.report) - rebuilt} up to date "
+          f"in {1000 * (time.perf_counter() - start):.0f} ms ===")
     print()
     print("Next steps to print your deck:")
     print("  Option A: Use github.com/GrantBirki/cah-generator")
@@ -194,6 +589,7 @@ def main():
     print("  Option C: Run this script with --images flag:")
     print("            python3 make_deck.py --images")
     print("            Then upload PNGs to MakePlayingCards.com")
+    profiler.finish()
     print()
 
 
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Timing Spans
+
+Lightweight named timing spans shared by the card scripts:
+
+    from profiling import profiler
+
+    with profiler.span("load"):
+        cards = read_cards(files)
+    with profiler.card("prompt_001", kind="black"):
+        with profiler.span("fit"):
+            ...
+
+Spans are no-ops until profiler.enable() is called (the scripts' --profile
+flag), so instrumented code costs one method call per span when disabled.
+
+With profiling on, each card's span times are appended to
+profile/<script>/cards.<pid>.jsonl (render workers write their own file),
+spans outside a card are totalled per process, and --cprofile adds
+profile/<script>/<script>.prof for the main process. profiler.finish() prints
+the per-span totals and the slowest cards.
+"""
+
+import cProfile
+import json
+import os
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+PROFILE_DIR = Path(__file__).parent / "profile"
+SLOWEST_CARDS = 10
+
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler._add(self.name, time.perf_counter() - self.start)
+
+
+class _Card:
+    __slots__ = ("profiler", "record", "start")
+
+    def __init__(self, profiler: "Profiler", record: dict):
+        self.profiler = profiler
+        self.record = record
+
+    def __enter__(self):
+        self.profiler._current = self.record
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.record["total"] = round(time.perf_counter() - self.start, 6)
+        self.record["spans"] = {k: round(v, 6) for k, v in self.record["spans"].items()}
+        self.profiler._current = None
+        self.profiler._write(self.record)
+
+
+class Profiler:
+    """Collects span timings for one process."""
+
+    def __init__(self):
+        self.enabled = False
+        self.name = ""
+        self.out_dir: Path | None = None
+        self.totals: dict[str, list] = {}   # span name -> [count, seconds], outside cards
+        self._current: dict | None = None
+        self._file = None
+        self._cprofile: cProfile.Profile | None = None
+
+    def enable(self, name: str, cprofile: bool = False, reset: bool = True):
+        """Start recording into PROFILE_DIR/name.
+
+        The main process clears the previous run; render workers pass
+        reset=False and add their own cards.<pid>.jsonl.
+        """
+        self.enabled = True
+        self.name = name
+        self.out_dir = PROFILE_DIR / name
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if reset:
+            for old in self.out_dir.glob("cards.*.jsonl"):
+                old.unlink()
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def span(self, name: str):
+        """Context manager timing one named stage."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def card(self, card_id: str, **meta):
+        """Context manager grouping the spans of one card into a JSONL record."""
+        if not self.enabled:
+            return _NOOP
+        return _Card(self, {"card": card_id, **meta, "spans": {}})
+
+    def _add(self, name: str, seconds: float):
+        if self._current is not None:
+            spans = self._current["spans"]
+            spans[name] = spans.get(name, 0.0) + seconds
+        else:
+            total = self.totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+
+    def _write(self, record: dict):
+        if self._file is None:
+            # Line-buffered: pool workers exit without flushing Python buffers
+            self._file = open(self.out_dir / f"cards.{os.getpid()}.jsonl", "a",
+                              encoding="utf-8", buffering=1)
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def finish(self):
+        """Stop recording, write the cProfile dump if requested and print a summary."""
+        if not self.enabled:
+            return
+        if self._cprofile:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.out_dir / f"{self.name}.prof")
+        if self._file:
+            self._file.close()
+            self._file = None
+        self.enabled = False
+
+        cards = []
+        for path in sorted(self.out_dir.glob("cards.*.jsonl")):
+            with open(path, "r", encoding="utf-8") as f:
+                cards += [json.loads(line) for line in f if line.strip()]
+
+        totals = {k: list(v) for k, v in self.totals.items()}
+        for card in cards:
+            for span, seconds in card["spans"].items():
+                total = totals.setdefault(span, [0, 0.0])
+                total[0] += 1
+                total[1] += seconds
+
+        print(f"\n  Profile ({self.out_dir}):")
+        for span, (count, seconds) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+            print(f"    {span:10s} {seconds:9.3f}s  ({count} calls)")
+        if cards:
+            print(f"\n  Slowest {min(SLOWEST_CARDS, len(cards))} of {len(cards)} cards:")
+            for card in sorted(cards, key=lambda c: -c["total"])[:SLOWEST_CARDS]:
+                spans = ", ".join(f"{k} {1000 * v:.0f}ms" for k, v in
+                                  sorted(card["spans"].items(), key=lambda kv: -kv[1]))
+                print(f"    {1000 * card['total']:8.1f}ms  {card['card']}  ({spans})")
+        if self._cprofile:
+            print(f"\n  cProfile: {self.out_dir / f'{self.name}.prof'}")
+            self._cprofile = None
+
+
+# Shared per-process profiler used by all card scripts
+profiler = Profiler()
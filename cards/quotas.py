@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Deck Quotas
+
+Declarative constraints on the deck picked by score_cards.py --quotas:
+
+    [
+      {"name": "question prompts", "type": "Prompt", "pattern": "^[^_]*$", "min": 10},
+      {"name": "long cards", "min_chars": 120, "max": 40},
+      {"name": "deity", "each": ["\\\\bKrishna\\\\b", "\\\\bShiva\\\\b"], "max": 20}
+    ]
+
+Each quota bounds how many selected cards match it (min, max or both). A
+card matches when it passes every test the quota gives:
+    type                "Prompt" or "Response"
+    pattern             regex searched in the text, case-insensitive
+    blanks              at least this many blanks (runs of "_")
+    min_chars/max_chars text length bounds
+"each" expands into one quota per pattern, named "<name>: <pattern>".
+
+Selection is greedy with repair. Cards are taken best first, skipping any
+that would push a max quota over its bound, until each type has its target
+count. Each min quota still short then makes the cheapest swap of any type,
+one at a time: its best unselected card that fits, for the weakest selected
+card of that type that no other min quota needs (or that the incoming card
+also counts toward). With no quota in the way this is exactly the plain
+top-N; with a single min quota it is the best deck that meets it. Several
+quotas at once are a heuristic: test_quotas.py checks both against
+exhaustive search on small decks.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+BLANK = re.compile(r"_+")
+TESTS = ("type", "pattern", "blanks", "min_chars", "max_chars")
+
+
+class Quota(NamedTuple):
+    name: str
+    members: np.ndarray     # bool per card
+    low: int
+    high: int | None
+
+
+class QuotaResult(NamedTuple):
+    name: str
+    count: int              # selected cards matching
+    available: int          # candidate cards matching
+    low: int
+    high: int | None
+    status: str             # "binding", "unmet" or "slack"
+
+
+def load_quotas(path: Path) -> list[dict]:
+    """Quota specs from a JSON file, with "each" expanded; raises ValueError if malformed."""
+    try:
+        specs = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path.name}: invalid JSON ({e})") from None
+    if not isinstance(specs, list):
+        raise ValueError(f"{path.name}: expected a list of quotas")
+
+    quotas = []
+    for n, spec in enumerate(specs, 1):
+        if not isinstance(spec, dict):
+            raise ValueError(f"{path.name}: quota {n} is not an object")
+        unknown = set(spec) - {"name", "each", "min", "max", *TESTS}
+        if unknown:
+            raise ValueError(f"{path.name}: quota {n} has unknown keys {', '.join(sorted(unknown))}")
+        if "min" not in spec and "max" not in spec:
+            raise ValueError(f"{path.name}: quota {n} needs a min or a max")
+        for key in ("min", "max", "blanks", "min_chars", "max_chars"):
+            if key in spec and not (isinstance(spec[key], int) and spec[key] >= 0):
+                raise ValueError(f"{path.name}: quota {n}: {key} must be a whole number")
+        if spec.get("type", "Prompt") not in ("Prompt", "Response"):
+            raise ValueError(f"{path.name}: quota {n}: type must be Prompt or Response")
+        name = spec.get("name", f"quota {n}")
+        if "each" in spec:
+            if "pattern" in spec or not isinstance(spec["each"], list):
+                raise ValueError(f"{path.name}: quota {n}: each must be a list of patterns "
+                                 f"(and replaces pattern)")
+            quotas += [{**spec, "name": f"{name}: {p}", "pattern": p} for p in spec["each"]]
+        else:
+            quotas.append({**spec, "name": name})
+
+    for spec in quotas:
+        spec.pop("each", None)
+        try:
+            re.compile(spec.get("pattern", ""))
+        except re.error as e:
+            raise ValueError(f"{path.name}: {spec['name']}: bad pattern ({e})") from None
+    return quotas
+
+
+def quota_masks(specs: list[dict], texts: list[str], types: np.ndarray) -> list[Quota]:
+    """Match quota specs against the cards."""
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    blanks = None
+    quotas = []
+    for spec in specs:
+        members = np.ones(len(texts), dtype=bool)
+        if "type" in spec:
+            members &= types == spec["type"]
+        if "min_chars" in spec:
+            members &= lengths >= spec["min_chars"]
+        if "max_chars" in spec:
+            members &= lengths <= spec["max_chars"]
+        if "blanks" in spec:
+            if blanks is None:
+                blanks = np.fromiter((len(BLANK.findall(t)) for t in texts),
+                                     dtype=np.int64, count=len(texts))
+            members &= blanks >= spec["blanks"]
+        if "pattern" in spec:
+            search = re.compile(spec["pattern"], re.IGNORECASE).search
+            rows = np.flatnonzero(members)
+            members[rows] = [search(texts[i]) is not None for i in rows]
+        quotas.append(Quota(spec["name"], members, spec.get("min", 0), spec.get("max")))
+    return quotas
+
+
+def select_with_quotas(scores: np.ndarray, types: np.ndarray, targets: dict[str, int],
+                       quotas: list[Quota]) -> tuple[dict[str, np.ndarray], list[QuotaResult]]:
+    """Indices of the selected cards of each type, best first, and how each quota fared.
+
+    Ties are broken in load order, like top_indices().
+    """
+    n = len(scores)
+    member_of = [() for _ in range(n)]
+    for q, quota in enumerate(quotas):
+        for i in np.flatnonzero(quota.members).tolist():
+            member_of[i] += (q,)
+    high = [quota.high for quota in quotas]
+    low = [quota.low for quota in quotas]
+    counts = [0] * len(quotas)
+    blocked = [False] * len(quotas)
+    repaired = [False] * len(quotas)
+
+    order = np.lexsort((np.arange(n), -scores))
+    type_list = types.tolist()
+    taken = dict.fromkeys(targets, 0)
+    selected = np.zeros(n, dtype=bool)
+
+    def fits(i: int, leaving: tuple = ()) -> bool:
+        ok = True
+        for q in member_of[i]:
+            if high[q] is not None and counts[q] + 1 - (q in leaving) > high[q]:
+                blocked[q] = True
+                ok = False
+        return ok
+
+    def take(i: int):
+        selected[i] = True
+        taken[type_list[i]] += 1
+        for q in member_of[i]:
+            counts[q] += 1
+
+    def drop(i: int):
+        selected[i] = False
+        taken[type_list[i]] -= 1
+        for q in member_of[i]:
+            counts[q] -= 1
+
+    def next_swap(pending: list[int], weakest: list[int]) -> tuple | None:
+        """(score lost, card in, card out or None) for the best card that can come in."""
+        for i in pending:
+            out = None
+            if taken[type_list[i]] >= targets[type_list[i]]:
+                # A card may leave a min quota at its bound if the incoming card refills it
+                out = next((o for o in weakest
+                            if all(counts[p] > low[p] or p in member_of[i] for p in member_of[o])),
+                           None)
+                if out is None:
+                    continue
+            if fits(i, member_of[out] if out is not None else ()):
+                return (scores[out] if out is not None else 0) - scores[i], i, out
+        return None
+
+    # Greedy: best first, within the max quotas
+    open_types = sum(1 for kind in targets if targets[kind] > 0)
+    for i in order.tolist():
+        kind = type_list[i]
+        if kind not in taken or taken[kind] >= targets[kind]:
+            continue
+        if member_of[i] and not fits(i):
+            continue
+        take(i)
+        if taken[kind] == targets[kind]:
+            open_types -= 1
+            if not open_types:
+                break
+
+    # Repair: swap cards into each min quota that fell short, each time making
+    # the cheapest swap of any type: its best unselected member that fits in
+    # for the weakest selected card no min quota needs
+    for q, quota in enumerate(quotas):
+        if counts[q] >= low[q]:
+            continue
+        pending, weakest = {}, {}
+        for kind in targets:
+            rows = np.flatnonzero(selected & (types == kind) & ~quota.members)
+            weakest[kind] = rows[np.lexsort((-rows, scores[rows]))].tolist()
+            pending[kind] = [i for i in order[quota.members[order] & ~selected[order]].tolist()
+                             if type_list[i] == kind]
+        while counts[q] < low[q]:
+            best = None
+            for kind in targets:
+                swap = next_swap(pending[kind], weakest[kind])
+                if swap is not None and (best is None or swap[0] < best[0]):
+                    best = swap + (kind,)
+            if best is None:
+                break
+            _, i, out, kind = best
+            pending[kind].remove(i)
+            if out is not None:
+                weakest[kind].remove(out)
+                drop(out)
+            take(i)
+            repaired[q] = True
+
+    picks = {}
+    for kind in targets:
+        rows = np.flatnonzero(selected & (types == kind))
+        picks[kind] = rows[np.lexsort((rows, -scores[rows]))]
+    results = []
+    for q, quota in enumerate(quotas):
+        if counts[q] < low[q]:
+            status = "unmet"
+        elif repaired[q] or (blocked[q] and counts[q] == high[q]):
+            status = "binding"
+        else:
+            status = "slack"
+        results.append(QuotaResult(quota.name, counts[q], int(quota.members.sum()),
+                                   low[q], high[q], status))
+    return picks, results
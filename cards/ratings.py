@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Player Ratings
+
+Running per-card aggregates of the web app's 1-5 post-round ratings, behind
+score_cards.py --ratings, blended into the rubric scores:
+
+    with RatingStore(RATINGS_DB) as ratings:
+        ratings.ingest(Path("web/data/cards.db"))      # reads new ratings only
+        weighted, rated = blend_ratings(table, ratings.aggregates(), prior_weight=5)
+
+Sources are the app's SQLite database (card_ratings joined to cards) or an
+export of it: a CSV or JSONL file with the card_key or the card text
+(card_text or text) and the rating of each row. Ratings are matched to scored cards by card ID
+(card_ids.py): the card_key column of the app's cards table or of an
+export when there is one, else the hash of the card text.
+
+Each source keeps a high-water mark: the last card_ratings id read from a
+database, or the byte offset of the last complete row read from an export.
+Only rows past the mark are read, and their count, mean and variance are
+merged into the aggregates of the cards they rate, so ingesting a play
+night's ratings costs time in proportion to those ratings. Exports are
+expected to grow by appending; a source that shrank, or whose start changed,
+is read again from scratch (its old ratings are dropped first).
+
+Blending treats the rubric score as a prior worth prior_weight ratings:
+
+    score = (prior_weight * rubric + count * mean rating) / (prior_weight + count)
+
+so a card keeps its rubric score until players have rated it a few times.
+Both are on the 1-5 scale.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from card_ids import ID_SCHEME, card_id, is_card_id
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+HEAD_BYTES = 1 << 12        # bytes of an export fingerprinted to notice rewrites
+TEXT_COLUMNS = ("card_text", "text", "CardText")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY, kind TEXT NOT NULL, mark INTEGER NOT NULL,
+    head TEXT NOT NULL, ratings INTEGER NOT NULL, read_at REAL NOT NULL);
+-- Running aggregates (Welford: count, mean, sum of squared deviations) per source
+CREATE TABLE IF NOT EXISTS source_ratings (
+    source TEXT NOT NULL, card_id TEXT NOT NULL,
+    n INTEGER NOT NULL, mean REAL NOT NULL, m2 REAL NOT NULL,
+    PRIMARY KEY (card_id, source));
+CREATE INDEX IF NOT EXISTS source_ratings_source ON source_ratings (source);
+-- The same, combined over every source
+CREATE TABLE IF NOT EXISTS ratings (
+    card_id TEXT PRIMARY KEY, n INTEGER NOT NULL, mean REAL NOT NULL, m2 REAL NOT NULL);
+"""
+
+
+class Rating(NamedTuple):
+    count: int
+    mean: float
+    variance: float     # sample variance, 0 for a single rating
+
+
+def combine(a: tuple, b: tuple) -> tuple:
+    """Merge two (n, mean, m2) aggregates (Chan et al.'s parallel update)."""
+    n = a[0] + b[0]
+    if not n:
+        return 0, 0.0, 0.0
+    delta = b[1] - a[1]
+    return n, a[1] + delta * b[0] / n, a[2] + b[2] + delta * delta * a[0] * b[0] / n
+
+
+def aggregate(values: list[int]) -> tuple:
+    """(n, mean, m2) of a list of ratings."""
+    mean = sum(values) / len(values)
+    return len(values), mean, sum((v - mean) ** 2 for v in values)
+
+
+def source_kind(path: Path) -> str:
+    with open(path, "rb") as f:
+        if f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC:
+            return "sqlite"
+    return "jsonl" if path.suffix in (".jsonl", ".ndjson") else "csv"
+
+
+def parse_rating(value) -> int | None:
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 and rating == float(value) else None
+
+
+class RatingStore:
+    """Per-card rating aggregates kept in a SQLite database."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        scheme = self.db.execute("SELECT value FROM meta WHERE key = 'id_scheme'").fetchone()
+        if scheme is None or scheme[0] != str(ID_SCHEME):
+            # Aggregates are keyed by card IDs hashed differently: read every source again
+            with self.db:
+                for table in ("sources", "source_ratings", "ratings"):
+                    self.db.execute(f"DELETE FROM {table}")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('id_scheme', ?)",
+                                (str(ID_SCHEME),))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest(self, path: Path) -> dict[str, int]:
+        """Read a source's ratings past its mark; return counts of ratings per outcome."""
+        name = str(path.resolve())
+        kind = source_kind(path)
+        old = self.db.execute("SELECT kind, mark, head, ratings FROM sources WHERE name = ?",
+                              (name,)).fetchone()
+        mark, head, total = old[1:] if old else (0, "", 0)
+
+        counts = {"new": 0, "invalid": 0, "rewritten": 0}
+        if old and old[0] != kind:
+            counts["rewritten"], mark, total = 1, 0, 0
+        if kind == "sqlite":
+            src = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                if src.execute("SELECT COALESCE(MAX(id), 0) FROM card_ratings").fetchone()[0] < mark:
+                    counts["rewritten"], mark, total = 1, 0, 0
+                # Databases seeded before card IDs existed have no card_key column
+                key = ("c.card_key" if any(col[1] == "card_key" for col in
+                                           src.execute("PRAGMA table_info(cards)")) else "NULL")
+                rows = src.execute(
+                    f"SELECT r.id, {key}, c.text, r.rating FROM card_ratings r "
+                    "JOIN cards c ON c.id = r.card_id WHERE r.id > ? ORDER BY r.id",
+                    (mark,)).fetchall()
+            finally:
+                src.close()
+            if rows:
+                mark = rows[-1][0]
+            rows = [row[1:] for row in rows]
+        else:
+            with open(path, "rb") as f:
+                if mark and (path.stat().st_size < mark or
+                             hashlib.sha256(f.read(min(mark, HEAD_BYTES))).hexdigest() != head):
+                    counts["rewritten"], mark, total = 1, 0, 0
+                f.seek(0)
+                header = f.readline() if kind == "csv" else b""
+                f.seek(max(mark, len(header)))
+                data = f.read()
+                # Only complete rows; a row still being written is read next time
+                data = data[:data.rfind(b"\n") + 1]
+                f.seek(0)
+                new_mark = max(mark, len(header)) + len(data)
+                head = hashlib.sha256(f.read(min(new_mark, HEAD_BYTES))).hexdigest()
+            mark = new_mark
+            rows = (self._read_csv(header + data) if kind == "csv"
+                    else self._read_jsonl(data))
+
+        ratings: dict[str, list[int]] = {}
+        for key, text, value in rows:
+            rating = parse_rating(value)
+            if not is_card_id(key):
+                key = card_id(text) if isinstance(text, str) and text.strip() else None
+            if rating is None or key is None:
+                counts["invalid"] += 1
+                continue
+            ratings.setdefault(key, []).append(rating)
+            counts["new"] += 1
+
+        with self.db:
+            affected = set(ratings)
+            if counts["rewritten"]:
+                affected.update(row[0] for row in self.db.execute(
+                    "SELECT card_id FROM source_ratings WHERE source = ?", (name,)))
+                self.db.execute("DELETE FROM source_ratings WHERE source = ?", (name,))
+            for cid, values in ratings.items():
+                row = self.db.execute("SELECT n, mean, m2 FROM source_ratings "
+                                      "WHERE card_id = ? AND source = ?", (cid, name)).fetchone()
+                self.db.execute("INSERT OR REPLACE INTO source_ratings VALUES (?, ?, ?, ?, ?)",
+                                (name, cid, *combine(row or (0, 0.0, 0.0), aggregate(values))))
+            self._resolve(affected)
+            self.db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                            (name, kind, mark, head, total + counts["new"], time.time()))
+        return counts
+
+    @staticmethod
+    def _read_csv(data: bytes):
+        reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig", errors="replace")))
+        fields = reader.fieldnames or ()
+        column = next((c for c in TEXT_COLUMNS if c in fields), "card_key")
+        if column not in fields or "rating" not in fields:
+            raise ValueError(f"ratings CSV needs a rating column and card_key or one of "
+                             f"{', '.join(TEXT_COLUMNS)}")
+        return [(row.get("card_key"), row[column], row["rating"]) for row in reader]
+
+    @staticmethod
+    def _read_jsonl(data: bytes):
+        rows = []
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if not isinstance(record, dict):
+                rows.append((None, None, None))
+                continue
+            text = next((record[c] for c in TEXT_COLUMNS if c in record), None)
+            rows.append((record.get("card_key"), text, record.get("rating")))
+        return rows
+
+    def _resolve(self, ids):
+        """Recompute the combined aggregates of ids from their per-source rows."""
+        for cid in ids:
+            total = (0, 0.0, 0.0)
+            for row in self.db.execute("SELECT n, mean, m2 FROM source_ratings WHERE card_id = ?",
+                                       (cid,)):
+                total = combine(total, row)
+            if total[0]:
+                self.db.execute("INSERT OR REPLACE INTO ratings VALUES (?, ?, ?, ?)", (cid, *total))
+            else:
+                self.db.execute("DELETE FROM ratings WHERE card_id = ?", (cid,))
+
+    def aggregates(self) -> dict[str, Rating]:
+        """Rating aggregates of every rated card, by card id."""
+        return {cid: Rating(n, mean, m2 / (n - 1) if n > 1 else 0.0)
+                for cid, n, mean, m2 in self.db.execute("SELECT card_id, n, mean, m2 FROM ratings")}
+
+
+def blend_ratings(table, ratings: dict[str, Rating],
+                  prior_weight: float) -> tuple[np.ndarray, list[tuple[int, Rating]]]:
+    """Rubric scores of a ScoreTable blended with player ratings.
+
+    Returns the blended scores and the (row, rating) of each rated card.
+    """
+    rated = [(i, ratings[cid]) for i, cid in enumerate(table.ids) if cid in ratings]
+    rows = np.array([i for i, _ in rated], dtype=np.intp)
+    count = np.array([r.count for _, r in rated], dtype=np.float64)
+    mean = np.array([r.mean for _, r in rated], dtype=np.float64)
+    weighted = table.weighted.copy()
+    weighted[rows] = (prior_weight * weighted[rows] + count * mean) / (prior_weight + count)
+    return weighted, rated
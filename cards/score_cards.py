@@ -7,24 +7,58 @@ the top 102 prompts + 510 responses (612 total) for the final deck.
 
 Usage:
     python3 score_cards.py
+    python3 score_cards.py --profile     # time each stage (--cprofile adds a cProfile dump)
+    python3 score_cards.py --sweep 10000 # top-N stability under random weights around WEIGHTS
+    python3 score_cards.py --grid 0.05   # ...or under every weight vector on a 0.05 grid
+    python3 score_cards.py --workers 4   # parse score files on 4 processes
+    python3 score_cards.py --store       # merge new/changed batches into score_store.sqlite,
+                                         # select from it (--policy latest|mean for re-scored cards)
+    python3 score_cards.py --quotas      # select within the quotas of deck_quotas.json (see quotas.py)
+    python3 score_cards.py --ratings ../web/data/cards.db
+                                         # blend in new player ratings (see ratings.py)
 
 Inputs:
-    scores/batch_*.json  — JSON arrays of scored cards from LLM batches
+    scores/batch_*.json  — JSON arrays (or JSONL) of scored cards from LLM batches; a
+                           record's card_id (from the master CSV) overrides its text
+                           as the card's identity
+    scores/batch_*.jsonl — one scored card per line
+    deck_quotas.json     — deck quotas (--quotas only)
 
 Outputs:
-    cards_against_maya_top612.csv — curated 612-card CSV
+    cards_against_maya_top612.csv — curated 612-card CSV (CardID, Type, CardText)
+    weight_sweep.csv              — per-card top-N rates (--sweep / --grid only)
+    score_store.sqlite            — persistent score store (--store only, see score_store.py)
+    ratings.sqlite                — running player-rating aggregates (--ratings only)
 """
 
+import argparse
 import csv
+import itertools
 import json
 import os
+import re
+import sqlite3
 import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from card_ids import card_id, index_ids, is_card_id
+from profiling import profiler
 
 BASE_DIR = Path(__file__).parent
 SCORES_DIR = BASE_DIR / "scores"
 INPUT_CSV = BASE_DIR / "cards_against_maya.csv"
 OUTPUT_CSV = BASE_DIR / "cards_against_maya_top612.csv"
+SWEEP_CSV = BASE_DIR / "weight_sweep.csv"
+STORE_DB = BASE_DIR / "score_store.sqlite"
+RATINGS_DB = BASE_DIR / "ratings.sqlite"
+QUOTAS_JSON = BASE_DIR / "deck_quotas.json"
 
 # Rubric weights
 WEIGHTS = {
@@ -43,93 +77,322 @@ TARGET_TOTAL = TARGET_PROMPTS + TARGET_RESPONSES
 
 DIMENSIONS = ["humor", "appropriateness", "versatility", "cultural_relevance", "specificity", "originality"]
 
+# Score batches are streamed in chunks; a record larger than this is malformed
+READ_CHUNK = 1 << 20
+MAX_RECORD_CHARS = 1 << 24
+JSON_DECODER = json.JSONDecoder()
+JSON_SPACE = re.compile(r"[ \t\r\n]*")
+
+# Weight sweeps
+SWEEP_CONCENTRATION = 20     # Dirichlet concentration of --sweep samples; lower spreads them wider
+SWEEP_CHUNK = 1 << 24        # score matrix elements per batch (cards x weight vectors)
+SWEEP_SHOW = 10              # cards listed per flip list
+
+# Player ratings
+RATING_PRIOR_WEIGHT = 5      # ratings a card needs before they outweigh its rubric score
+RATINGS_SHOW = 5             # cards listed per ratings list
+
+
+class ScoreTable(NamedTuple):
+    """Scored cards as columns, one row per card in load order."""
+    ids: list[str]          # card IDs (card_ids.py)
+    texts: list[str]
+    types: np.ndarray       # "Prompt" / "Response"
+    dims: np.ndarray        # (cards, len(DIMENSIONS)) rubric scores
+    weighted: np.ndarray    # weighted score per card
+
+
+class ScoreBatch(NamedTuple):
+    """One score file's valid cards as columns, plus malformed record counts."""
+    name: str
+    ids: list[str]
+    texts: list[str]
+    types: list[str]
+    dims: np.ndarray
+    problems: dict[str, int]
+
 
 def compute_weighted_score(card: dict) -> float:
     """Compute the weighted score for a card."""
     return sum(card[dim] * WEIGHTS[dim] for dim in DIMENSIONS)
 
 
-def load_scores() -> list[dict]:
-    """Load all scored cards from JSON batch files in scores/ directory."""
-    all_cards = []
+def compute_weighted_scores(dims: np.ndarray, weights: np.ndarray | None = None) -> np.ndarray:
+    """Weighted score of every row of a (cards, DIMENSIONS) matrix.
+
+    With a (vectors, DIMENSIONS) matrix of weights, returns a (cards, vectors)
+    matrix of scores, one column per weight vector; by default scores under
+    WEIGHTS. The product is accumulated one dimension at a time in DIMENSIONS
+    order, so each score is bit-identical to compute_weighted_score() and
+    equal scores stay equal.
+    """
+    if weights is None:
+        return compute_weighted_scores(dims, np.array([[WEIGHTS[dim] for dim in DIMENSIONS]]))[:, 0]
+    total = np.zeros((len(dims), len(weights)))
+    for col in range(len(DIMENSIONS)):
+        total += dims[:, col, None] * weights[:, col]
+    return total
+
+
+def iter_records(f, chunk_size: int = READ_CHUNK):
+    """Parse a JSON array or JSONL text stream one record at a time.
+
+    A JSONL line that does not parse is yielded as a json.JSONDecodeError
+    and skipped. A broken JSON array raises JSONDecodeError instead, since
+    there is no telling where its next record starts. Only one chunk and the
+    record being parsed are held in memory.
+    """
+    buf = f.read(chunk_size)
+    pos = len(buf) - len(buf.lstrip())
+    if buf[pos:pos + 1] != "[":
+        # JSONL: finish the line cut off by the first chunk, then read by line.
+        # Split on "\n" only, as file iteration does: str.splitlines() would also
+        # cut at U+2028, U+0085 and the like, which JSON strings may hold raw
+        *lines, tail = buf.split("\n")
+        lines = [line + "\n" for line in lines]
+        tail += f.readline()
+        if tail:
+            lines.append(tail)
+        for n, line in enumerate(itertools.chain(lines, f), 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield json.JSONDecodeError(f"line {n}: {e.msg}", e.doc, e.pos)
+        return
+
+    eof = False
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        data = "" if eof else f.read(chunk_size)
+        eof = not data
+        buf = buf[pos:] + data
+        pos = 0
+        return not eof
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            pos = JSON_SPACE.match(buf, pos).end()
+            if pos < len(buf) or not more():
+                return buf[pos:pos + 1]
+
+    pos += 1
+    if next_char() == "]":
+        return
+    while True:
+        try:
+            record, end = JSON_DECODER.raw_decode(buf, pos)
+            if end == len(buf) and not eof:
+                raise json.JSONDecodeError("record ends at chunk boundary", buf, end)
+        except json.JSONDecodeError:
+            # Usually the record runs past the chunk: read on, up to a sane size
+            if len(buf) - pos < MAX_RECORD_CHARS and more():
+                continue
+            raise
+        yield record
+        pos = end
+        sep = next_char()
+        if sep == "]":
+            return
+        if sep != ",":
+            raise json.JSONDecodeError("expected ',' or ']'", buf, pos)
+        pos += 1
+        next_char()
+
+
+def read_batch(path: Path) -> ScoreBatch:
+    """Stream one score batch file into columns, counting malformed records."""
+    ids, texts, types, dims = [], [], [], array("d")
+    problems = Counter()
+    required = set(DIMENSIONS)
+    dim_values = itemgetter(*DIMENSIONS)
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            for card in iter_records(f):
+                if isinstance(card, json.JSONDecodeError):
+                    problems["invalid JSON"] += 1
+                elif not isinstance(card, dict):
+                    problems["not an object"] += 1
+                elif not required <= card.keys():
+                    problems["missing dimensions"] += 1
+                elif "card_text" not in card or "type" not in card:
+                    problems["missing card_text or type"] += 1
+                elif "card_id" in card and not is_card_id(card["card_id"]):
+                    problems["invalid card_id"] += 1
+                else:
+                    values = dim_values(card)
+                    if not set(map(type, values)) <= {int, float}:   # bools are not scores
+                        problems["non-numeric dimension"] += 1
+                        continue
+                    ids.append(card.get("card_id") or card_id(card["card_text"]))
+                    texts.append(card["card_text"])
+                    types.append(card["type"])
+                    dims.extend(values)
+        except json.JSONDecodeError:
+            problems["invalid JSON, rest of file skipped"] += 1
+    return ScoreBatch(path.name, ids, texts, types,
+                      np.frombuffer(dims, dtype=np.float64).reshape(-1, len(DIMENSIONS)),
+                      dict(problems))
+
+
+def find_score_files(scores_dir: Path) -> list[Path]:
+    """batch_*.json and batch_*.jsonl files in scores_dir, in name order."""
+    return sorted([*scores_dir.glob("batch_*.json"), *scores_dir.glob("batch_*.jsonl")],
+                  key=lambda p: p.name)
+
+
+def read_batches(files: list[Path], workers: int | None = None):
+    """read_batch() each file on up to workers processes (default: one per CPU).
+
+    Batches are yielded in file order.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        yield from map(read_batch, files)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(read_batch, files, chunksize=max(1, len(files) // (workers * 4)))
+
+
+def describe_batch(batch: ScoreBatch) -> str:
+    """One report line for a batch: its cards and any malformed records by reason."""
+    line = f"  {batch.name}: {len(batch.texts)} cards"
+    if batch.problems:
+        line += f", {sum(batch.problems.values())} malformed skipped (" + ", ".join(
+            f"{n} {kind}" for kind, n in sorted(batch.problems.items())) + ")"
+    return line
+
+
+def load_scores(workers: int | None = None) -> ScoreTable:
+    """Load all scored cards from JSON/JSONL batch files in scores/ directory.
+
+    Files are parsed on up to workers processes (default: one per CPU) and
+    joined in file name order. Malformed records are skipped and counted per
+    file. A card scored more than once keeps the place of its first record
+    and the scores of its last, as ScoreStore's "latest" policy resolves it.
+    """
     if not SCORES_DIR.exists():
         print(f"ERROR: {SCORES_DIR} directory not found.")
         print("Create the scores/ directory and place batch JSON files there.")
         sys.exit(1)
 
-    json_files = sorted(SCORES_DIR.glob("batch_*.json"))
-    if not json_files:
-        print(f"ERROR: No batch_*.json files found in {SCORES_DIR}/")
+    files = find_score_files(SCORES_DIR)
+    if not files:
+        print(f"ERROR: No batch_*.json or batch_*.jsonl files found in {SCORES_DIR}/")
         sys.exit(1)
 
-    for jf in json_files:
-        print(f"  Loading {jf.name}...")
-        with open(jf, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if not isinstance(data, list):
-            print(f"  WARNING: {jf.name} is not a JSON array, skipping.")
-            continue
-        for card in data:
-            # Validate required fields
-            missing = [d for d in DIMENSIONS if d not in card]
-            if missing:
-                print(f"  WARNING: Card missing dimensions {missing}: {card.get('card_text', '?')[:50]}")
-                continue
-            if "card_text" not in card or "type" not in card:
-                print(f"  WARNING: Card missing card_text or type, skipping.")
-                continue
-            card["weighted_score"] = compute_weighted_score(card)
-            all_cards.append(card)
-
-    return all_cards
-
-
-def load_original_csv() -> dict[str, str]:
-    """Load original CSV to get canonical card texts and types."""
+    ids, texts, types, dims = [], [], [], []
+    skipped = bad_files = 0
+    for batch in read_batches(files, workers):
+        ids += batch.ids
+        texts += batch.texts
+        types += batch.types
+        dims.append(batch.dims)
+        print(describe_batch(batch))
+        if batch.problems:
+            skipped += sum(batch.problems.values())
+            bad_files += 1
+    if skipped:
+        print(f"  WARNING: skipped {skipped} malformed records in {bad_files} files.")
+
+    dims = np.concatenate(dims) if dims else np.zeros((0, len(DIMENSIONS)))
+    first = index_ids(ids)
+    if len(first) < len(ids):
+        last = {cid: n for n, cid in enumerate(ids)}
+        rows = [last[cid] for cid in first]
+        print(f"  {len(ids) - len(first)} re-scored records: keeping each card's latest scores")
+        ids = list(first)
+        texts = [texts[n] for n in rows]
+        types = [types[n] for n in rows]
+        dims = dims[rows]
+    return ScoreTable(ids, texts, np.array(types, dtype=str), dims,
+                      compute_weighted_scores(dims))
+
+
+def load_original_csv() -> dict[str, tuple[str, str]]:
+    """Canonical (type, text) of each card in the master CSV, by card ID."""
     cards = {}
     with open(INPUT_CSV, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            cards[row["CardText"].strip()] = row["Type"]
+            text = row["CardText"].strip()
+            cards.setdefault(row.get("CardID") or card_id(text), (row["Type"], text))
     return cards
 
 
-def select_top_cards(all_cards: list[dict]) -> tuple[list[dict], list[dict]]:
-    """Separate into prompts/responses, sort by score, select top N."""
-    prompts = [c for c in all_cards if c["type"] == "Prompt"]
-    responses = [c for c in all_cards if c["type"] == "Response"]
-
-    # Sort by weighted score descending
-    prompts.sort(key=lambda c: c["weighted_score"], reverse=True)
-    responses.sort(key=lambda c: c["weighted_score"], reverse=True)
-
-    top_prompts = prompts[:TARGET_PROMPTS]
-    top_responses = responses[:TARGET_RESPONSES]
-
+def top_indices(scores: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    """The k highest-scoring of the candidate indices (ascending), best first.
+
+    Only the top k are sorted: a partition finds the k-th best score, and
+    cards tied with it are taken in load order, as a stable sort would.
+    """
+    if k < len(candidates):
+        cand_scores = scores[candidates]
+        kth = np.partition(cand_scores, len(candidates) - k)[len(candidates) - k]
+        above = candidates[cand_scores > kth]
+        tied = candidates[cand_scores == kth][:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def select_top_cards(table: ScoreTable) -> tuple[np.ndarray, np.ndarray]:
+    """Indices of the top N prompts and responses, best first."""
+    prompts = np.flatnonzero(table.types == "Prompt")
+    responses = np.flatnonzero(table.types == "Response")
+    return (top_indices(table.weighted, prompts, TARGET_PROMPTS),
+            top_indices(table.weighted, responses, TARGET_RESPONSES))
+
+
+def select_quota_cards(table: ScoreTable, specs: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """Like select_top_cards(), within deck quotas; prints how each quota fared."""
+    from quotas import quota_masks, select_with_quotas
+
+    picks, results = select_with_quotas(
+        table.weighted, table.types, {"Prompt": TARGET_PROMPTS, "Response": TARGET_RESPONSES},
+        quota_masks(specs, table.texts, table.types))
+    top_prompts, top_responses = picks["Prompt"], picks["Response"]
+    plain = sum(table.weighted[top].sum() for top in select_top_cards(table))
+    chosen = table.weighted[top_prompts].sum() + table.weighted[top_responses].sum()
+
+    print(f"  Quotas ({sum(r.status == 'binding' for r in results)} binding, "
+          f"score cost {plain - chosen:.2f}):")
+    for r in results:
+        bound = (f"{r.low}-{r.high}" if r.low and r.high is not None else
+                 f"≤ {r.high}" if r.high is not None else f"≥ {r.low}")
+        mark = {"binding": "●", "unmet": "⚠", "slack": " "}[r.status]
+        print(f"    {mark} {r.name:30s} {r.count:4d} of {r.available:<5d} {bound:>9s}  {r.status}")
+    for r in results:
+        if r.status == "unmet":
+            print(f"  ⚠ {r.name}: only {r.count} cards could be selected (needs {r.low})")
     return top_prompts, top_responses
 
 
-def print_stats(all_cards, top_prompts, top_responses):
+def print_stats(table: ScoreTable, top_prompts: np.ndarray, top_responses: np.ndarray):
     """Print scoring statistics."""
-    prompts = [c for c in all_cards if c["type"] == "Prompt"]
-    responses = [c for c in all_cards if c["type"] == "Response"]
+    is_prompt = table.types == "Prompt"
+    is_response = table.types == "Response"
+    kept = np.zeros(len(table.texts), dtype=bool)
+    kept[top_prompts] = True
+    kept[top_responses] = True
+    n_prompts, n_responses = int(is_prompt.sum()), int(is_response.sum())
 
     print(f"\n{'='*60}")
     print(f"SCORING STATISTICS")
     print(f"{'='*60}")
-    print(f"\n  Total cards scored: {len(all_cards)}")
-    print(f"    Prompts:  {len(prompts)}")
-    print(f"    Responses: {len(responses)}")
+    print(f"\n  Total cards scored: {len(table.texts)}")
+    print(f"    Prompts:  {n_prompts}")
+    print(f"    Responses: {n_responses}")
 
     print(f"\n  Selected for final deck:")
-    print(f"    Prompts:  {len(top_prompts)} / {len(prompts)} (cut {len(prompts) - len(top_prompts)})")
-    print(f"    Responses: {len(top_responses)} / {len(responses)} (cut {len(responses) - len(top_responses)})")
+    print(f"    Prompts:  {len(top_prompts)} / {n_prompts} (cut {n_prompts - len(top_prompts)})")
+    print(f"    Responses: {len(top_responses)} / {n_responses} (cut {n_responses - len(top_responses)})")
     print(f"    Total:    {len(top_prompts) + len(top_responses)}")
 
     # Score distribution
-    for label, cards in [("Prompts", prompts), ("Responses", responses)]:
-        scores = [c["weighted_score"] for c in cards]
-        scores.sort(reverse=True)
+    for label, mask in [("Prompts", is_prompt), ("Responses", is_response)]:
+        scores = np.sort(table.weighted[mask])[::-1]
         print(f"\n  {label} score distribution:")
         print(f"    Max:    {scores[0]:.2f}")
         print(f"    Top 25%: {scores[len(scores)//4]:.2f}")
@@ -139,69 +402,308 @@ def print_stats(all_cards, top_prompts, top_responses):
 
     # Cutoff scores
     if len(top_prompts) > 0:
-        print(f"\n  Prompt cutoff score: {top_prompts[-1]['weighted_score']:.2f}")
-        print(f"    Lowest kept:  \"{top_prompts[-1]['card_text'][:60]}...\"")
+        print(f"\n  Prompt cutoff score: {table.weighted[top_prompts[-1]]:.2f}")
+        print(f"    Lowest kept:  \"{table.texts[top_prompts[-1]][:60]}...\"")
     if len(top_responses) > 0:
-        print(f"\n  Response cutoff score: {top_responses[-1]['weighted_score']:.2f}")
-        print(f"    Lowest kept:  \"{top_responses[-1]['card_text'][:60]}...\"")
+        print(f"\n  Response cutoff score: {table.weighted[top_responses[-1]]:.2f}")
+        print(f"    Lowest kept:  \"{table.texts[top_responses[-1]][:60]}...\"")
 
     # Dimension averages for kept cards
     print(f"\n  Average dimension scores (kept cards):")
-    kept = top_prompts + top_responses
-    for dim in DIMENSIONS:
-        avg = sum(c[dim] for c in kept) / len(kept)
+    averages = table.dims[kept].mean(axis=0)
+    for dim, avg in zip(DIMENSIONS, averages):
         print(f"    {dim:20s}: {avg:.2f}")
 
-    # Show some cut cards that were close
-    cut_prompts = [c for c in prompts if c not in top_prompts]
-    cut_responses = [c for c in responses if c not in top_responses]
+    # Show the highest-scoring cards that were cut
+    cut_prompts = top_indices(table.weighted, np.flatnonzero(is_prompt & ~kept), 5)
+    cut_responses = top_indices(table.weighted, np.flatnonzero(is_response & ~kept), 5)
 
-    if cut_prompts:
+    if len(cut_prompts):
         print(f"\n  Top 5 cut prompts (just missed the cut):")
-        for c in cut_prompts[:5]:
-            print(f"    [{c['weighted_score']:.2f}] {c['card_text'][:70]}")
+        for i in cut_prompts:
+            print(f"    [{table.weighted[i]:.2f}] {table.texts[i][:70]}")
 
-    if cut_responses:
+    if len(cut_responses):
         print(f"\n  Top 5 cut responses (just missed the cut):")
-        for c in cut_responses[:5]:
-            print(f"    [{c['weighted_score']:.2f}] {c['card_text'][:70]}")
+        for i in cut_responses:
+            print(f"    [{table.weighted[i]:.2f}] {table.texts[i][:70]}")
 
 
-def write_output(top_prompts, top_responses):
+def write_output(table: ScoreTable, top_prompts: np.ndarray, top_responses: np.ndarray):
     """Write the final curated CSV."""
     with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
-        writer.writerow(["Type", "CardText"])
-        for card in top_prompts:
-            writer.writerow(["Prompt", card["card_text"]])
-        for card in top_responses:
-            writer.writerow(["Response", card["card_text"]])
+        writer.writerow(["CardID", "Type", "CardText"])
+        for i in top_prompts:
+            writer.writerow([table.ids[i], "Prompt", table.texts[i]])
+        for i in top_responses:
+            writer.writerow([table.ids[i], "Response", table.texts[i]])
 
     print(f"\n  Output written to: {OUTPUT_CSV}")
     print(f"  Total cards: {len(top_prompts) + len(top_responses)}")
 
 
+# ── Player ratings ─────────────────────────────────────────────────────────────
+def apply_ratings(table: ScoreTable, sources: list[Path], prior_weight: float) -> ScoreTable:
+    """Ingest new ratings from sources and blend all ratings into table's scores."""
+    from ratings import RatingStore, blend_ratings
+
+    with RatingStore(RATINGS_DB) as store:
+        for source in sources:
+            if not source.exists():
+                print(f"ERROR: Ratings source not found: {source}")
+                sys.exit(1)
+            try:
+                counts = store.ingest(source)
+            except (sqlite3.Error, ValueError) as e:
+                print(f"ERROR: {source}: {e}")
+                sys.exit(1)
+            note = ", re-read from the start" if counts["rewritten"] else ""
+            print(f"  {source.name}: {counts['new']} new ratings{note}")
+            if counts["invalid"]:
+                print(f"  ⚠ {source.name}: {counts['invalid']} rows without a card text "
+                      f"or a 1-5 rating skipped")
+        ratings = store.aggregates()
+
+    weighted, rated = blend_ratings(table, ratings, prior_weight)
+    print(f"  {len(rated)} of {len(table.texts)} scored cards rated "
+          f"({sum(r.count for _, r in rated)} ratings, prior weight {prior_weight:g})")
+    if rated:
+        print(f"\n  Moved most by ratings:")
+        moved = sorted(rated, key=lambda ir: -abs(weighted[ir[0]] - table.weighted[ir[0]]))
+        for i, r in moved[:RATINGS_SHOW]:
+            print(f"    {table.weighted[i]:.2f} → {weighted[i]:.2f}  ({r.count} × {r.mean:.2f})  "
+                  f"[{table.types[i][0]}] {table.texts[i][:60]}")
+        divisive = sorted((ir for ir in rated if ir[1].count > 1), key=lambda ir: -ir[1].variance)
+        if divisive:
+            print(f"\n  Most divisive (rating variance):")
+            for i, r in divisive[:RATINGS_SHOW]:
+                print(f"    {r.variance:.2f}  ({r.count} × {r.mean:.2f})  "
+                      f"[{table.types[i][0]}] {table.texts[i][:60]}")
+    print()
+    return table._replace(weighted=weighted)
+
+
+# ── Weight sweeps ──────────────────────────────────────────────────────────────
+def weight_grid(step: float) -> np.ndarray:
+    """Every weight vector whose weights are multiples of step and sum to 1."""
+    parts = round(1 / step)
+    if parts < 1 or abs(parts * step - 1) > 1e-9:
+        raise ValueError(f"grid step {step} does not divide 1")
+    # Stars and bars: each choice of len(DIMENSIONS) - 1 dividers among the
+    # parts is one way to split them between the dimensions
+    dividers = np.array(list(itertools.combinations(range(parts + len(DIMENSIONS) - 1),
+                                                    len(DIMENSIONS) - 1)))
+    edges = np.hstack([np.full((len(dividers), 1), -1), dividers,
+                       np.full((len(dividers), 1), parts + len(DIMENSIONS) - 1)])
+    return (np.diff(edges, axis=1) - 1) / parts
+
+
+def weight_samples(n: int, seed: int) -> np.ndarray:
+    """n random weight vectors, Dirichlet-distributed around WEIGHTS."""
+    base = np.array([WEIGHTS[dim] for dim in DIMENSIONS])
+    return np.random.default_rng(seed).dirichlet(SWEEP_CONCENTRATION * base, size=n)
+
+
+def top_k_counts(dims: np.ndarray, k: int, weights: np.ndarray) -> np.ndarray:
+    """For each card (row of dims), how many weight vectors put it in the top k.
+
+    Cards are scored under a batch of weight vectors at once; each column's
+    top k is found by partition, with ties at the cut-off taken in load order
+    like select_top_cards().
+    """
+    n = len(dims)
+    counts = np.zeros(n, dtype=np.int64)
+    if k >= n:
+        return counts + len(weights)
+    batch = max(1, SWEEP_CHUNK // max(n, 1))
+    for start in range(0, len(weights), batch):
+        scores = compute_weighted_scores(dims, weights[start:start + batch])
+        kth = np.partition(scores, n - k, axis=0)[n - k]
+        above = scores > kth
+        tied = scores == kth
+        room = k - above.sum(axis=0)
+        counts += (above | (tied & (np.cumsum(tied, axis=0) <= room))).sum(axis=1)
+    return counts
+
+
+def sweep_weights(table: ScoreTable, weights: np.ndarray, label: str):
+    """Report how stable top-N membership is across weight vectors."""
+    top_prompts, top_responses = select_top_cards(table)
+    rates = np.zeros(len(table.texts))
+    baseline = np.zeros(len(table.texts), dtype=bool)
+
+    print(f"\n{'='*60}")
+    print(f"WEIGHT SWEEP: {len(weights)} weight vectors ({label})")
+    print(f"{'='*60}")
+    print(f"\n  Weight ranges (current in brackets):")
+    for dim, low, high in zip(DIMENSIONS, weights.min(axis=0), weights.max(axis=0)):
+        print(f"    {dim:20s}: {low:.2f} - {high:.2f}  [{WEIGHTS[dim]:.2f}]")
+
+    for heading, kind, k, top in [("Prompts", "Prompt", TARGET_PROMPTS, top_prompts),
+                                  ("Responses", "Response", TARGET_RESPONSES, top_responses)]:
+        cards = np.flatnonzero(table.types == kind)
+        if not len(cards):
+            continue
+        with profiler.span("sweep"):
+            rate = top_k_counts(table.dims[cards], k, weights) / len(weights)
+        rates[cards] = rate
+        baseline[top] = True
+        kept = baseline[cards]
+
+        print(f"\n  {heading} (top {k} of {len(cards)}):")
+        print(f"    Always in:  {int((rate == 1).sum())}")
+        print(f"    Never in:   {int((rate == 0).sum())}")
+        print(f"    Contested:  {int(((rate > 0) & (rate < 1)).sum())}")
+        print(f"    Current top {k} still in, averaged over weight vectors: "
+              f"{rate[kept].mean():.1%}")
+
+        # Cards whose current membership loses under most weight vectors
+        flip_out = cards[kept & (rate < 0.5)]
+        flip_in = cards[~kept & (rate >= 0.5)]
+        for title, flips, order in [("drop out (kept now, in under < 50% of weights)",
+                                     flip_out, rates[flip_out]),
+                                    ("come in (cut now, in under >= 50% of weights)",
+                                     flip_in, -rates[flip_in])]:
+            print(f"\n    {len(flips)} likely to {title}:")
+            for i in flips[np.argsort(order, kind="stable")][:SWEEP_SHOW]:
+                print(f"      [{rates[i]:4.0%}] [{table.weighted[i]:.2f}] {table.texts[i][:60]}")
+
+    with open(SWEEP_CSV, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["CardID", "Type", "CardText", "WeightedScore", "InTop", "TopRate"])
+        for i in np.lexsort((np.arange(len(rates)), -rates)):
+            writer.writerow([table.ids[i], table.types[i], table.texts[i], f"{table.weighted[i]:.4f}",
+                             int(baseline[i]), f"{rates[i]:.4f}"])
+    print(f"\n  Per-card top-N rates written to: {SWEEP_CSV}")
+
+
 def main():
+    from quotas import load_quotas
+    from score_store import POLICIES, ScoreStore
+
+    parser = argparse.ArgumentParser(description="Score cards and select the final deck.")
+    parser.add_argument("--sweep", type=int, metavar="N",
+                        help="report top-N stability under N random weight vectors "
+                             "around WEIGHTS instead of writing the deck")
+    parser.add_argument("--grid", type=float, metavar="STEP",
+                        help="like --sweep, over every weight vector on a STEP grid (e.g. 0.05)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --sweep")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes reading score files (default: one per CPU)")
+    parser.add_argument("--store", nargs="?", type=Path, const=STORE_DB, metavar="DB",
+                        help=f"merge new and changed score files into a SQLite score store "
+                             f"and select from it (default DB: {STORE_DB.name})")
+    parser.add_argument("--policy", choices=POLICIES, default="latest",
+                        help="--store: scores of a card rated more than once (default: latest)")
+    parser.add_argument("--quotas", nargs="?", type=Path, const=QUOTAS_JSON, metavar="FILE",
+                        help=f"select within the deck quotas of a JSON file "
+                             f"(default: {QUOTAS_JSON.name})")
+    parser.add_argument("--ratings", nargs="+", type=Path, metavar="SOURCE",
+                        help="blend player ratings into the scores: the web app's SQLite "
+                             "database or CSV/JSONL exports of its card_ratings")
+    parser.add_argument("--prior-weight", type=float, default=RATING_PRIOR_WEIGHT, metavar="K",
+                        help=f"--ratings: ratings a rubric score counts as "
+                             f"(default: {RATING_PRIOR_WEIGHT})")
+    parser.add_argument("--profile", action="store_true", help="time each stage")
+    parser.add_argument("--cprofile", action="store_true", help="--profile plus a cProfile dump")
+    args = parser.parse_args()
+
     print("\n=== Cards Against Maya — Card Scorer & Selector ===\n")
+    if args.profile or args.cprofile:
+        profiler.enable("score_cards", args.cprofile)
+
+    weights = None
+    if args.grid is not None:
+        try:
+            weights = weight_grid(args.grid)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        label = f"grid step {args.grid}"
+    elif args.sweep is not None:
+        if args.sweep < 1:
+            print("ERROR: --sweep needs at least one weight vector")
+            sys.exit(1)
+        weights = weight_samples(args.sweep, args.seed)
+        label = f"random around WEIGHTS, seed {args.seed}"
+
+    quotas = None
+    if args.quotas:
+        try:
+            quotas = load_quotas(args.quotas)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
 
     # Load scores
-    print("Loading scored batches...")
-    all_cards = load_scores()
-    print(f"  Loaded {len(all_cards)} scored cards.\n")
+    store = None
+    if args.store:
+        print(f"Merging scored batches into {args.store.name} ({args.policy} policy)...")
+        with profiler.span("merge"):
+            store = ScoreStore(args.store, args.policy)
+            files = find_score_files(SCORES_DIR) if SCORES_DIR.exists() else []
+            counts = store.merge(files, max(1, args.workers))
+        print(f"  {counts['merged']} merged, {counts['unchanged']} unchanged")
+        with profiler.span("load"):
+            table = store.table()
+    else:
+        print("Loading scored batches...")
+        with profiler.span("load"):
+            table = load_scores(max(1, args.workers))
+    print(f"  Loaded {len(table.texts)} scored cards.\n")
+    if not len(table.texts):
+        print("ERROR: No scored cards.")
+        sys.exit(1)
+    if INPUT_CSV.exists():
+        deck = load_original_csv()
+        stale = sum(1 for cid in set(table.ids) if cid not in deck)
+        if stale:
+            print(f"  ⚠ {stale} scored cards are no longer in {INPUT_CSV.name}\n")
+
+    if weights is not None:
+        sweep_weights(table, weights, label)
+        print(f"\n{'='*60}")
+        if store:
+            store.close()
+        profiler.finish()
+        print()
+        return
+
+    # Blend in player ratings
+    if args.ratings:
+        print("Reading player ratings...")
+        with profiler.span("ratings"):
+            table = apply_ratings(table, args.ratings, args.prior_weight)
 
     # Select top cards
     print("Selecting top cards...")
-    top_prompts, top_responses = select_top_cards(all_cards)
+    with profiler.span("select"):
+        if quotas is not None:
+            top_prompts, top_responses = select_quota_cards(table, quotas)
+        elif store and not args.ratings:
+            position = index_ids(table.ids)
+            top_prompts, top_responses = (
+                np.array([position[cid] for cid in store.top(kind, n)], dtype=np.intp)
+                for kind, n in [("Prompt", TARGET_PROMPTS), ("Response", TARGET_RESPONSES)])
+        else:
+            top_prompts, top_responses = select_top_cards(table)
 
     # Print stats
-    print_stats(all_cards, top_prompts, top_responses)
+    with profiler.span("stats"):
+        print_stats(table, top_prompts, top_responses)
 
     # Write output
-    write_output(top_prompts, top_responses)
+    with profiler.span("write"):
+        write_output(table, top_prompts, top_responses)
 
     print(f"\n{'='*60}")
     print(f"Done! Run generate_cards.py to create card images.")
-    print(f"{'='*60}\n")
+    print(f"{'='*60}")
+    if store:
+        store.close()
+    profiler.finish()
+    print()
 
 
 if __name__ == "__main__":
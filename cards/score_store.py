@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Cards Against Maya — Score Store
+
+A persistent SQLite store of rubric scores, keyed by card ID (see
+card_ids.py), behind score_cards.py --store:
+
+    store = ScoreStore(STORE_DB, policy="mean")
+    store.merge(find_score_files(SCORES_DIR))      # parses new/changed files only
+    top = store.top("Prompt", 102)                   # indexed ORDER BY ... LIMIT
+
+Every valid record of every merged file is kept as an observation. A file
+is skipped while its size and mtime (or failing that, its SHA-256) match the
+last merge; a changed file's old observations are replaced. Only the cards a
+file touches are re-aggregated, so merging a batch costs time in proportion
+to that batch, not to the store.
+
+Cards scored more than once are resolved by the store's policy:
+    latest      scores from the most recently merged file that has the card
+    mean        per-dimension mean over every observation
+Ties keep load order, so a store merged from scores/ under "latest" selects
+exactly the deck the plain score_cards.py run does (test_score_store.py).
+
+Files that disappear from scores/ stay in the store; delete the database to
+start over.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from card_ids import ID_SCHEME, card_id
+from score_cards import (DIMENSIONS, WEIGHTS, ScoreTable, compute_weighted_score,
+                         describe_batch, read_batches)
+
+POLICIES = ("latest", "mean")
+HASH_CHUNK = 1 << 20
+
+_DIMS = ", ".join(DIMENSIONS)
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY, seq INTEGER NOT NULL, size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL, cards INTEGER NOT NULL,
+    merged_at REAL NOT NULL);
+-- One row per valid record; (seq, rec) is its position in merge order
+CREATE TABLE IF NOT EXISTS observations (
+    card_id TEXT NOT NULL, seq INTEGER NOT NULL, rec INTEGER NOT NULL,
+    type TEXT NOT NULL, text TEXT NOT NULL, {", ".join(f"{d} REAL NOT NULL" for d in DIMENSIONS)},
+    PRIMARY KEY (card_id, seq, rec));
+CREATE INDEX IF NOT EXISTS observations_seq ON observations (seq);
+-- One row per card, resolved by the policy; first_seq/first_rec keep load order for ties
+CREATE TABLE IF NOT EXISTS cards (
+    card_id TEXT PRIMARY KEY, type TEXT NOT NULL, text TEXT NOT NULL,
+    {", ".join(f"{d} REAL NOT NULL" for d in DIMENSIONS)},
+    weighted REAL NOT NULL, scores INTEGER NOT NULL,
+    first_seq INTEGER NOT NULL, first_rec INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS cards_top ON cards (type, weighted DESC, first_seq, first_rec);
+"""
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScoreStore:
+    """Scores merged from batch files into a SQLite database."""
+
+    def __init__(self, path: Path, policy: str = "latest"):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r} (choose from {', '.join(POLICIES)})")
+        self.path = path
+        self.policy = policy
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        # Cards are resolved under one policy and one set of weights; re-resolve on change
+        settings = json.dumps({"policy": policy, "weights": WEIGHTS}, sort_keys=True)
+        old = self.db.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+        scheme = self.db.execute("SELECT value FROM meta WHERE key = 'id_scheme'").fetchone()
+        if scheme is None or scheme[0] != str(ID_SCHEME):
+            # Card IDs are hashed differently now: re-key every observation by its text
+            with self.db:
+                self.db.create_function("card_id", 1, card_id, deterministic=True)
+                self.db.execute("UPDATE observations SET card_id = card_id(text)")
+                self.db.execute("DELETE FROM cards")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('id_scheme', ?)",
+                                (str(ID_SCHEME),))
+            old = None
+        if old is None or old[0] != settings:
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('settings', ?)", (settings,))
+                self._resolve([row[0] for row in
+                               self.db.execute("SELECT DISTINCT card_id FROM observations")])
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def merge(self, files: list[Path], workers: int | None = None) -> dict[str, int]:
+        """Merge new and changed score files; return counts of files per outcome."""
+        known = {row[0]: row[1:] for row in
+                 self.db.execute("SELECT name, size, mtime_ns, sha256, cards FROM files")}
+        changed = []
+        counts = {"unchanged": 0, "merged": 0}
+        for path in files:
+            st = path.stat()
+            old = known.get(path.name)
+            if old and old[:2] == (st.st_size, st.st_mtime_ns):
+                counts["unchanged"] += 1
+                continue
+            sha = file_sha256(path)
+            if old and old[2] == sha:
+                with self.db:
+                    self.db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE name = ?",
+                                    (st.st_size, st.st_mtime_ns, path.name))
+                counts["unchanged"] += 1
+                continue
+            changed.append((path, st, sha))
+
+        for (path, st, sha), batch in zip(changed, read_batches([c[0] for c in changed], workers)):
+            print(describe_batch(batch) + f" ({'updated' if path.name in known else 'new'})")
+            self._merge_batch(batch, st, sha)
+            counts["merged"] += 1
+        return counts
+
+    def _merge_batch(self, batch, st, sha: str):
+        ids = batch.ids
+        with self.db:
+            old = self.db.execute("SELECT seq FROM files WHERE name = ?", (batch.name,)).fetchone()
+            affected = set(ids)
+            if old:
+                affected.update(row[0] for row in self.db.execute(
+                    "SELECT card_id FROM observations WHERE seq = ?", old))
+                self.db.execute("DELETE FROM observations WHERE seq = ?", old)
+            # A changed file counts as the latest, so it moves to the end of merge order
+            seq = self.db.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM files").fetchone()[0]
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (batch.name, seq, st.st_size, st.st_mtime_ns, sha,
+                             len(ids), time.time()))
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(DIMENSIONS))})",
+                ((cid, seq, rec, kind, text, *row) for rec, (cid, kind, text, row) in
+                 enumerate(zip(ids, batch.types, batch.texts, batch.dims.tolist()))))
+            self._resolve(affected)
+
+    def _resolve(self, ids):
+        """Recompute the cards rows of ids from their observations."""
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS affected (card_id TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM temp.affected")
+        self.db.executemany("INSERT OR IGNORE INTO temp.affected VALUES (?)", ((i,) for i in ids))
+        observations = defaultdict(list)
+        for row in self.db.execute(
+                f"SELECT card_id, seq, rec, type, text, {_DIMS} FROM observations "
+                "WHERE card_id IN (SELECT card_id FROM temp.affected) ORDER BY card_id, seq, rec"):
+            observations[row[0]].append(row[1:])
+
+        rows = []
+        for cid, obs in observations.items():
+            # obs rows: seq, rec, type, text, dimensions...
+            first, latest = obs[0], obs[-1]
+            if self.policy == "mean":
+                dims = [sum(o[4 + n] for o in obs) / len(obs) for n in range(len(DIMENSIONS))]
+            else:
+                dims = list(latest[4:])
+            weighted = compute_weighted_score(dict(zip(DIMENSIONS, dims)))
+            rows.append((cid, latest[2], latest[3], *dims, weighted, len(obs),
+                         first[0], first[1]))
+        self.db.execute("DELETE FROM cards WHERE card_id IN (SELECT card_id FROM temp.affected)")
+        self.db.executemany(
+            f"INSERT INTO cards VALUES ({', '.join('?' * (len(DIMENSIONS) + 7))})", rows)
+
+    def top(self, kind: str, n: int) -> list[str]:
+        """Ids of the n best cards of a type, ties in load order (uses the cards_top index)."""
+        return [row[0] for row in self.db.execute(
+            "SELECT card_id FROM cards WHERE type = ? "
+            "ORDER BY weighted DESC, first_seq, first_rec LIMIT ?", (kind, n))]
+
+    def table(self) -> ScoreTable:
+        """A ScoreTable of every card, in load order."""
+        ids, texts, types, dims, weighted = [], [], [], [], []
+        for row in self.db.execute(f"SELECT card_id, text, type, {_DIMS}, weighted FROM cards "
+                                   "ORDER BY first_seq, first_rec"):
+            ids.append(row[0])
+            texts.append(row[1])
+            types.append(row[2])
+            dims.append(row[3:-1])
+            weighted.append(row[-1])
+        return ScoreTable(ids, texts, np.array(types, dtype=str),
+                          np.array(dims, dtype=np.float64).reshape(-1, len(DIMENSIONS)),
+                          np.array(weighted, dtype=np.float64))
@@ -0,0 +1,63 @@
+"""extract_cards.py must never overwrite a previous extraction with a partial one."""
+
+import sys
+
+import pytest
+
+import extract_cards
+
+FAMILY_CSV = "Prompt,What ruined Janmashtami?\nResponse,A ghee lamp.\n"
+
+
+@pytest.fixture
+def out_dir(monkeypatch, tmp_path):
+    out = tmp_path / "extracted"
+    out.mkdir()
+    for name in ("extracted_prompts.txt", "extracted_responses.txt"):
+        (out / name).write_text("1. An earlier card\n", encoding="utf-8")
+    monkeypatch.setattr(extract_cards, "OUT_DIR", out)
+    return out
+
+
+def run(monkeypatch, *files):
+    monkeypatch.setattr(sys, "argv", ["extract_cards.py", *map(str, files), "--workers", "1"])
+    extract_cards.main()
+
+
+def outputs(out_dir) -> list[str]:
+    return [(out_dir / name).read_text(encoding="utf-8")
+            for name in ("extracted_prompts.txt", "extracted_responses.txt")]
+
+
+def test_pdf_without_pypdf_leaves_outputs(monkeypatch, tmp_path, out_dir):
+    monkeypatch.setitem(sys.modules, "pypdf", None)     # import pypdf raises ImportError
+    pdf = tmp_path / "cards.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n")
+    csv_file = tmp_path / "cards.csv"
+    csv_file.write_text(FAMILY_CSV, encoding="utf-8")
+
+    before = outputs(out_dir)
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch, csv_file, pdf)
+    assert exit_info.value.code == 1
+    assert outputs(out_dir) == before
+
+
+def test_spreadsheet_cards_are_written(monkeypatch, tmp_path, out_dir):
+    csv_file = tmp_path / "cards.csv"
+    csv_file.write_text(FAMILY_CSV, encoding="utf-8")
+    run(monkeypatch, csv_file)
+    assert outputs(out_dir) == ["1. What ruined Janmashtami?\n", "1. A ghee lamp.\n"]
+
+
+def test_spreadsheet_without_card_columns_leaves_outputs(monkeypatch, tmp_path, out_dir):
+    good = tmp_path / "cards.csv"
+    good.write_text(FAMILY_CSV, encoding="utf-8")
+    other = tmp_path / "scores.csv"
+    other.write_text("Card,Score\nA ghee lamp.,4\n", encoding="utf-8")
+
+    before = outputs(out_dir)
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch, good, other)
+    assert exit_info.value.code == 1
+    assert outputs(out_dir) == before
@@ -0,0 +1,111 @@
+"""select_with_quotas() against exhaustive search on small decks."""
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from quotas import Quota, select_with_quotas
+from score_cards import top_indices
+
+KINDS = ("Prompt", "Response")
+
+
+def random_deck(rng: random.Random, n: int):
+    scores = np.array([float(rng.choice([1, 2, 3, 4])) for _ in range(n)])   # many ties
+    types = np.array([rng.choice(KINDS) for _ in range(n)])
+    targets = {kind: rng.randint(0, min(3, int((types == kind).sum()))) for kind in KINDS}
+    return scores, types, targets
+
+
+def random_quota(rng: random.Random, n: int, name: str, max_too: bool) -> Quota:
+    members = np.array([rng.random() < 0.4 for _ in range(n)])
+    low = rng.randint(0, 2)
+    high = rng.choice([None, rng.randint(low, 3)]) if max_too else None
+    return Quota(name, members, low, high)
+
+
+def best_feasible(scores, types, targets, quotas) -> float | None:
+    """Highest total score of any full selection within every quota, or None."""
+    pools = [itertools.combinations(np.flatnonzero(types == kind).tolist(), targets[kind])
+             for kind in targets]
+    best = None
+    for combo in itertools.product(*pools):
+        rows = [i for picks in combo for i in picks]
+        counts = [int(q.members[rows].sum()) for q in quotas]
+        if all(q.low <= c and (q.high is None or c <= q.high) for q, c in zip(quotas, counts)):
+            total = scores[rows].sum()
+            best = total if best is None or total > best else best
+    return best
+
+
+def check_result(quotas, picks, results, targets):
+    rows = np.concatenate([picks[kind] for kind in targets]).astype(int)
+    assert len(set(rows.tolist())) == len(rows)
+    for q, r in zip(quotas, results):
+        assert r.count == int(q.members[rows].sum())
+        assert q.high is None or r.count <= q.high
+        assert (r.status == "unmet") == (r.count < q.low)
+    for kind in targets:
+        assert len(picks[kind]) <= targets[kind]
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_one_min_quota_is_optimal(seed):
+    rng = random.Random(seed)
+    n = rng.randint(4, 10)
+    scores, types, targets = random_deck(rng, n)
+    quotas = [random_quota(rng, n, "q", max_too=False)]
+
+    picks, results = select_with_quotas(scores, types, targets, quotas)
+    rows = check_result(quotas, picks, results, targets)
+    best = best_feasible(scores, types, targets, quotas)
+    if best is None:
+        assert results[0].status == "unmet"
+    else:
+        assert results[0].status != "unmet"
+        assert all(len(picks[kind]) == targets[kind] for kind in targets)
+        assert scores[rows].sum() == best
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_any_quotas_stay_within_bounds(seed):
+    rng = random.Random(seed)
+    n = rng.randint(4, 10)
+    scores, types, targets = random_deck(rng, n)
+    quotas = [random_quota(rng, n, f"q{q}", max_too=True) for q in range(rng.randint(1, 3))]
+
+    picks, results = select_with_quotas(scores, types, targets, quotas)
+    rows = check_result(quotas, picks, results, targets)
+    best = best_feasible(scores, types, targets, quotas)
+    if all(r.status != "unmet" for r in results) and all(len(picks[k]) == targets[k] for k in targets):
+        assert best is not None and scores[rows].sum() <= best
+
+
+def test_swap_may_take_a_card_from_a_quota_it_refills():
+    # Card 0 is all of "a"'s count; card 1 keeps "a" met while meeting "b"
+    scores = np.array([5.0, 1.0])
+    types = np.array(["Prompt", "Prompt"])
+    quotas = [Quota("a", np.array([True, True]), 1, None),
+              Quota("b", np.array([False, True]), 1, None)]
+    picks, results = select_with_quotas(scores, types, {"Prompt": 1}, quotas)
+    assert picks["Prompt"].tolist() == [1]
+    assert [r.status for r in results] == ["slack", "binding"]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_slack_quotas_give_the_plain_top(seed):
+    rng = random.Random(seed)
+    n = rng.randint(4, 30)
+    scores, types, targets = random_deck(rng, n)
+    quotas = [Quota("any", np.ones(n, dtype=bool), 0, n)]
+
+    picks, _ = select_with_quotas(scores, types, targets, quotas)
+    for kind in targets:
+        if not targets[kind]:
+            assert len(picks[kind]) == 0
+            continue
+        plain = top_indices(scores, np.flatnonzero(types == kind), targets[kind])
+        assert picks[kind].tolist() == plain.tolist()
@@ -0,0 +1,38 @@
+"""score_cards.iter_records() on JSON arrays and JSONL score batches."""
+
+import json
+
+import pytest
+
+from score_cards import iter_records
+
+RECORDS = [{"card_text": f"Card {n}\u2028with a line separator", "humor": n} for n in range(20)]
+RECORDS.append({"card_text": "Next line\x85and paragraph\u2029marks", "humor": 3})
+
+
+def parse(path, chunk_size):
+    with open(path, "r", encoding="utf-8") as f:
+        return list(iter_records(f, chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 16])
+def test_jsonl_splits_on_newlines_only(tmp_path, chunk_size):
+    path = tmp_path / "batch_1.jsonl"
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in RECORDS),
+                    encoding="utf-8")
+    assert parse(path, chunk_size) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 16])
+def test_json_array(tmp_path, chunk_size):
+    path = tmp_path / "batch_1.json"
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False, indent=1), encoding="utf-8")
+    assert parse(path, chunk_size) == RECORDS
+
+
+def test_jsonl_bad_line_is_reported_and_skipped(tmp_path):
+    path = tmp_path / "batch_1.jsonl"
+    path.write_text('{"humor": 1}\n{"humor": \n\n{"humor": 2}', encoding="utf-8")
+    records = parse(path, 5)
+    assert records[0] == {"humor": 1} and records[2] == {"humor": 2}
+    assert isinstance(records[1], json.JSONDecodeError) and records[1].msg.startswith("line 2:")
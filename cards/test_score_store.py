@@ -0,0 +1,46 @@
+"""score_cards.py --store must write the same deck CSV as the plain path."""
+
+import json
+import random
+import sys
+
+import pytest
+
+import score_cards
+from score_cards import DIMENSIONS
+
+
+def write_batches(scores_dir, seed: int, cards: int = 300, files: int = 6):
+    """Random batches with coarse scores (many ties) and cards re-scored in later files."""
+    rng = random.Random(seed)
+    scores_dir.mkdir()
+    texts = [(f"Card {n} {'_____' if n % 4 == 0 else 'text'}.", "Prompt" if n % 4 == 0 else "Response")
+             for n in range(cards)]
+    for f in range(files):
+        batch = []
+        for text, kind in rng.sample(texts, cards // 3):
+            record = {"card_text": text, "type": kind}
+            record.update((dim, rng.choice([2, 3, 4])) for dim in DIMENSIONS)
+            batch.append(record)
+        (scores_dir / f"batch_{f + 1}.json").write_text(json.dumps(batch), encoding="utf-8")
+
+
+def run(monkeypatch, *args) -> str:
+    monkeypatch.setattr(sys, "argv", ["score_cards.py", *args])
+    score_cards.main()
+    return score_cards.OUTPUT_CSV.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_store_matches_plain(monkeypatch, tmp_path, seed):
+    write_batches(tmp_path / "scores", seed)
+    monkeypatch.setattr(score_cards, "SCORES_DIR", tmp_path / "scores")
+    monkeypatch.setattr(score_cards, "INPUT_CSV", tmp_path / "missing.csv")
+    monkeypatch.setattr(score_cards, "OUTPUT_CSV", tmp_path / "top.csv")
+    monkeypatch.setattr(score_cards, "TARGET_PROMPTS", 12)
+    monkeypatch.setattr(score_cards, "TARGET_RESPONSES", 40)
+
+    plain = run(monkeypatch, "--workers", "1")
+    store = run(monkeypatch, "--workers", "1", "--store", str(tmp_path / "store.sqlite"))
+    assert store == plain
+    assert len(plain.splitlines()) == 1 + 12 + 40
@@ -7,22 +7,34 @@ export function parseCSV(filePath: string): Card[] {
   const lines = content.split('\n');
   const cards: Card[] = [];
 
-  // Skip header
+  // Header: CardID,Type,CardText (CardID is missing from older CSVs). CardText
+  // is the last column; the columns before it never contain commas.
+  const header = lines[0].trim().split(',');
+  const idColumn = header.indexOf('CardID');
+  const typeColumn = header.indexOf('Type');
+  const textColumn = header.indexOf('CardText');
+  if (typeColumn < 0 || textColumn !== header.length - 1) {
+    return cards;
+  }
+
   for (let i = 1; i < lines.length; i++) {
     const line = lines[i].trim();
     if (!line) continue;
 
-    // Parse CSV line handling quoted fields
-    let type: string;
-    let text: string;
-
-    if (line.startsWith('Prompt,') || line.startsWith('Response,')) {
-      const commaIndex = line.indexOf(',');
-      type = line.substring(0, commaIndex);
-      text = line.substring(commaIndex + 1);
-    } else {
+    // Split off the leading columns; the rest of the line is the card text
+    const fields: string[] = [];
+    let rest = line;
+    for (let column = 0; column < textColumn; column++) {
+      const commaIndex = rest.indexOf(',');
+      if (commaIndex < 0) break;
+      fields.push(rest.substring(0, commaIndex));
+      rest = rest.substring(commaIndex + 1);
+    }
+    const type = fields[typeColumn];
+    if (fields.length !== textColumn || (type !== 'Prompt' && type !== 'Response')) {
       continue;
     }
+    let text = rest;
 
     // Remove surrounding quotes if present
     if (text.startsWith('"') && text.endsWith('"')) {
@@ -36,6 +48,7 @@ export function parseCSV(filePath: string): Card[] {
       type: type.toLowerCase() as 'prompt' | 'response',
       text,
       source: 'original',
+      ...(idColumn >= 0 && fields[idColumn] ? { card_key: fields[idColumn] } : {}),
     });
   }
 
@@ -26,6 +26,7 @@ function initSchema(): void {
       text TEXT NOT NULL,
       source TEXT NOT NULL DEFAULT 'original',
       is_top_scored INTEGER NOT NULL DEFAULT 0,
+      card_key TEXT,
       created_at TEXT NOT NULL DEFAULT (datetime('now'))
     );
 
@@ -46,6 +47,14 @@ function initSchema(): void {
   } catch {
     database.exec('ALTER TABLE cards ADD COLUMN is_top_scored INTEGER NOT NULL DEFAULT 0');
   }
+
+  // Add card_key column (stable card ID from the CSVs) if it doesn't exist
+  try {
+    database.prepare('SELECT card_key FROM cards LIMIT 1').get();
+  } catch {
+    database.exec('ALTER TABLE cards ADD COLUMN card_key TEXT');
+  }
+  database.exec('CREATE INDEX IF NOT EXISTS cards_card_key ON cards (card_key)');
 }
 
 function seedIfEmpty(): void {
@@ -56,29 +65,32 @@ function seedIfEmpty(): void {
     const csvPath = getCSVPath();
     const cards = parseCSV(csvPath);
 
-    // Load the curated top 612 card texts to flag them
+    // Load the curated top 612 cards to flag them, by card ID (or by text for
+    // CSVs written before card IDs)
     const topCsvPath = path.join(process.cwd(), 'data', 'cards_against_maya_top612.csv');
-    let topTexts: Set<string>;
+    let topKeys: Set<string>;
     try {
       const topCards = parseCSV(topCsvPath);
-      topTexts = new Set(topCards.map((c) => c.text));
+      topKeys = new Set(topCards.map((c) => c.card_key ?? c.text));
     } catch {
-      topTexts = new Set();
+      topKeys = new Set();
     }
 
     const insert = database.prepare(
-      'INSERT INTO cards (type, text, source, is_top_scored) VALUES (?, ?, ?, ?)'
+      'INSERT INTO cards (type, text, source, is_top_scored, card_key) VALUES (?, ?, ?, ?, ?)'
     );
 
+    let flagged = 0;
     const insertMany = database.transaction((cards: Card[]) => {
       for (const card of cards) {
-        const isTop = topTexts.has(card.text) ? 1 : 0;
-        insert.run(card.type, card.text, 'original', isTop);
+        const isTop = (card.card_key && topKeys.has(card.card_key)) || topKeys.has(card.text) ? 1 : 0;
+        flagged += isTop;
+        insert.run(card.type, card.text, 'original', isTop, card.card_key ?? null);
       }
     });
 
     insertMany(cards);
-    console.log(`Seeded ${cards.length} cards from CSV (${topTexts.size} flagged as top-scored)`);
+    console.log(`Seeded ${cards.length} cards from CSV (${flagged} flagged as top-scored)`);
   }
 }
 
@@ -5,6 +5,7 @@ export interface Card {
   text: string;
   source: 'original' | 'custom';
   is_top_scored?: boolean;
+  card_key?: string; // stable card ID from the CSV's CardID column
 }
 
 // Game phases